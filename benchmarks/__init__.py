@@ -0,0 +1,7 @@
+# Bộ benchmark của ứng dụng quản lý ký túc xá, chạy từ thư mục gốc của dự án:
+#
+#     python -m benchmarks.datagen bench.db --scale 1        # sinh dữ liệu SF1 vào file mới
+#     python -m benchmarks.harness --scale 0.1 --repeat 5    # sinh dữ liệu tạm, đo và ghi JSON
+#     python -m benchmarks.harness --db bench.db --compare benchmarks/results/<lần trước>.json
+#
+# Dữ liệu sinh ra chỉ phụ thuộc hệ số quy mô và seed, nên kết quả của các lần chạy so sánh được với nhau.
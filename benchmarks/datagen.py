@@ -0,0 +1,277 @@
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from dormitory.db import load_db_config, open_database
+from dormitory.schema import (create_audit_triggers, create_balance_triggers, create_occupancy_triggers,
+                              create_search_index, drop_audit_triggers, drop_balance_triggers,
+                              drop_occupancy_triggers, drop_search_index)
+
+# Số dòng của từng bảng ở hệ số quy mô 1 (SF1). Số dòng thực tế = số này x hệ số quy mô.
+SF1_ROWS = {
+    'Staff': 200,
+    'Rooms': 500,
+    'Students': 10000,
+    'Contracts': 10000,
+    'RoomAllocationHistory': 15000,
+    'Payments': 200000,
+    'MaintenanceRequests': 50000,
+    'Inventory': 2000,
+    'Complaints': 5000,
+    'FinesAndPenalties': 5000,
+}
+
+# Mốc thời gian cố định để dữ liệu sinh ra không phụ thuộc ngày chạy
+BASE_DATE = date(2024, 1, 1)
+
+# Tỉ lệ giường có người ở (để vẫn còn phòng trống và phòng ở một phần)
+OCCUPIED_BEDS = 0.85
+
+# Số dòng mỗi lần executemany
+INSERT_BATCH_SIZE = 5000
+
+FIRST_NAMES = ('An', 'Bình', 'Chi', 'Dũng', 'Đức', 'Giang', 'Hà', 'Hải', 'Hạnh', 'Hiếu', 'Hoa', 'Hùng', 'Hương',
+               'Khánh', 'Lan', 'Linh', 'Long', 'Mai', 'Minh', 'Nam', 'Ngọc', 'Phương', 'Quân', 'Quỳnh', 'Sơn',
+               'Thảo', 'Thành', 'Trang', 'Trung', 'Tuấn', 'Vân', 'Việt', 'Yến')
+LAST_NAMES = ('Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng', 'Bùi', 'Đỗ', 'Hồ',
+              'Ngô', 'Dương', 'Lý')
+PROGRAMS = ('Công nghệ thông tin', 'Kinh tế', 'Kế toán', 'Ngôn ngữ Anh', 'Cơ khí', 'Điện tử', 'Y khoa', 'Luật',
+            'Kiến trúc', 'Sư phạm')
+NATIONALITIES = ('Việt Nam',) * 9 + ('Lào', 'Campuchia', 'Hàn Quốc')
+CITIES = ('Hà Nội', 'Hồ Chí Minh', 'Đà Nẵng', 'Hải Phòng', 'Cần Thơ', 'Huế', 'Nghệ An', 'Thanh Hóa')
+BUILDINGS = ('A', 'B', 'C', 'D', 'E')
+AMENITIES = ('Điều hòa', 'Quạt', 'Tủ lạnh', 'Bình nóng lạnh', 'Wifi', 'Ban công')
+# Loại phòng và sức chứa tương ứng
+ROOM_TYPES = (('Single', 1), ('Double', 2), ('Shared', 4), ('Shared', 6))
+MAINTENANCE_ISSUES = ('Hỏng bóng đèn', 'Rò rỉ nước', 'Hỏng khóa cửa', 'Điều hòa không lạnh', 'Tắc bồn rửa',
+                      'Hỏng ổ cắm', 'Vỡ kính cửa sổ', 'Mất nước nóng', 'Wifi chập chờn', 'Hỏng quạt trần')
+COMPLAINT_SUBJECTS = ('Tiếng ồn', 'Vệ sinh', 'An ninh', 'Nước sinh hoạt', 'Điện', 'Bạn cùng phòng', 'Wifi')
+INVENTORY_ITEMS = ('Giường tầng', 'Nệm', 'Bàn học', 'Ghế', 'Tủ quần áo', 'Quạt trần', 'Bóng đèn', 'Bình chữa cháy',
+                   'Điều hòa', 'Rèm cửa')
+VIOLATIONS = (('Noise', 'Gây ồn sau 23h'), ('Late Payment', 'Thanh toán trễ hạn'), ('Damage', 'Làm hỏng tài sản'),
+              ('Other', 'Vi phạm nội quy'))
+
+def scaled(table, scale):
+    return max(1, round(SF1_ROWS[table] * scale))
+
+def day(offset):
+    return (BASE_DATE + timedelta(days=offset)).isoformat()
+
+def phone(rng):
+    return '0' + ''.join(rng.choice('0123456789') for _ in range(9))
+
+def insert_rows(db, table, columns, rows):
+    marks = ', '.join('?' * len(columns))
+    query = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({marks})'
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            db.executemany(query, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.executemany(query, batch)
+        count += len(batch)
+    return count
+
+def staff_rows(rng, count):
+    roles = ('Admin', 'Maintenance', 'Maintenance', 'Cleaner', 'Security')
+    for i in range(1, count + 1):
+        yield (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.choice(roles), phone(rng),
+               f'staff{i}@dormitory.vn', day(-rng.randint(30, 3000)), rng.choice(('06:00-14:00', '14:00-22:00', '22:00-06:00')),
+               rng.randint(60, 200) * 100000, None)
+
+# Phòng; các phòng không bảo trì được thêm vào rooms dạng (RoomID, Capacity) để phân sinh viên vào
+def room_rows(rng, count, rooms):
+    for i in range(1, count + 1):
+        room_type, capacity = rng.choice(ROOM_TYPES)
+        building = BUILDINGS[(i - 1) % len(BUILDINGS)]
+        floor = (i - 1) // len(BUILDINGS) // 20 + 1
+        status = 'Under Maintenance' if rng.random() < 0.03 else 'Available'
+        if status == 'Available':
+            rooms.append((i, capacity))
+        # CurrentOccupants và Status của phòng được trigger tính lại sau khi phân sinh viên vào phòng
+        yield (f'{building}{floor:02d}{i:04d}', room_type, capacity, 0, status, floor, f'Tòa {building}',
+               ', '.join(rng.sample(AMENITIES, 2)), None)
+
+# Sinh viên; được phân ngẫu nhiên vào các giường trống cho đến khi dùng hết OCCUPIED_BEDS số giường,
+# sinh viên còn lại chưa có phòng. Sinh viên có phòng được thêm vào placements dạng
+# (StudentID, RoomID, ngày nhận phòng).
+def student_rows(rng, count, rooms, placements):
+    beds = [room_id for room_id, capacity in rooms for _ in range(capacity)]
+    rng.shuffle(beds)
+    beds = beds[:int(len(beds) * OCCUPIED_BEDS)]
+    for i in range(1, count + 1):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        admission = -rng.randint(0, 1400)
+        room_id = beds[i - 1] if i <= len(beds) else None
+        allocation_date = None
+        if room_id is not None:
+            allocation_date = day(admission + rng.randint(0, 30))
+            placements.append((i, room_id, allocation_date))
+        yield (first_name, last_name, day(admission - rng.randint(18 * 365, 25 * 365)),
+               rng.choice(('Male', 'Female', 'Other')), phone(rng), f'student{i}@dormitory.vn',
+               rng.choice(CITIES), rng.choice(NATIONALITIES), rng.choice(PROGRAMS), None,
+               f'{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}', phone(rng), day(admission), room_id,
+               allocation_date)
+
+def contract_rows(rng, count, students, staff, contracts):
+    for i in range(1, count + 1):
+        student_id = (i - 1) % students + 1
+        start = -rng.randint(0, 1000)
+        end = start + rng.choice((180, 365, 730))
+        status = 'Active' if end > 0 else rng.choice(('Completed', 'Terminated'))
+        rent = rng.randint(8, 30) * 100000
+        contracts.append((i, student_id, rent))
+        signed = day(start - 1)
+        yield (student_id, day(start), day(end), status, rent, rent * 2, 'Điều khoản tiêu chuẩn', signed,
+               rng.random() < 0.3, None, rng.randint(1, staff), rng.randint(1, staff), signed, signed)
+
+# Lịch sử đổi phòng. Dòng chưa trả phòng nghĩa là sinh viên đang ở phòng đó, nên mỗi sinh viên có phòng
+# có đúng một dòng chưa trả phòng, trùng RoomID và ngày nhận phòng của sinh viên; các dòng còn lại là
+# các lần ở trước đó, đều đã trả phòng
+def allocation_rows(rng, count, students, rooms, placements):
+    for student_id, room_id, allocation_date in placements[:count]:
+        yield (student_id, room_id, allocation_date, None, None)
+    for _ in range(count - len(placements)):
+        start = -rng.randint(60, 1400)
+        release = start + rng.randint(30, min(365, -start - 1))
+        yield (rng.randint(1, students), rng.randint(1, rooms), day(start), day(release), None)
+
+def payment_rows(rng, count, contracts):
+    purposes = ('Rent',) * 6 + ('Utilities', 'Utilities', 'Deposit', 'Other')
+    for i in range(1, count + 1):
+        contract_id, student_id, rent = rng.choice(contracts)
+        purpose = rng.choice(purposes)
+        amount = rent if purpose == 'Rent' else rng.randint(1, 20) * 50000
+        status = rng.choice(('Completed',) * 8 + ('Pending', 'Failed'))
+        yield (student_id, contract_id, amount, rng.choice((0, 0, 0, 50000)), day(-rng.randint(0, 1000)), purpose,
+               rng.choice(('Cash', 'Card', 'Bank Transfer')), status, f'RC{i:08d}' if status == 'Completed' else None)
+
+def maintenance_rows(rng, count, students, staff):
+    for _ in range(count):
+        requested = -rng.randint(0, 1000)
+        status = rng.choice(('Pending', 'In Progress', 'Completed', 'Completed'))
+        completed = day(requested + rng.randint(0, 14)) if status == 'Completed' else None
+        assigned = rng.randint(1, staff) if status != 'Pending' else None
+        yield (rng.randint(1, students), rng.choice(MAINTENANCE_ISSUES), rng.choice(('Low', 'Medium', 'High')),
+               assigned, status, day(requested), completed, None)
+
+def inventory_rows(rng, count):
+    for _ in range(count):
+        yield (rng.choice(INVENTORY_ITEMS), rng.randint(0, 200), f'Tòa {rng.choice(BUILDINGS)}',
+               rng.choice(('Available', 'Available', 'In Use', 'Damaged', 'Lost')), None)
+
+def complaint_rows(rng, count, students):
+    for _ in range(count):
+        filed = -rng.randint(0, 1000)
+        status = rng.choice(('Pending', 'Resolved', 'Dismissed'))
+        resolved = day(filed + rng.randint(0, 30)) if status != 'Pending' else None
+        subject = rng.choice(COMPLAINT_SUBJECTS)
+        yield (rng.randint(1, students), subject, f'Phản ánh về {subject.lower()}', status, day(filed), resolved, None)
+
+# Khoản phạt kèm dòng StudentFines tương ứng (cùng sinh viên)
+def fine_rows(rng, count, students, student_fines):
+    for i in range(1, count + 1):
+        student_id = rng.randint(1, students)
+        violation, description = rng.choice(VIOLATIONS)
+        fined = day(-rng.randint(0, 1000))
+        status = rng.choice(('Unpaid', 'Paid'))
+        student_fines.append((student_id, i, fined, status, None))
+        yield (student_id, violation, description, rng.randint(1, 10) * 50000, fined, status, None)
+
+# Sinh dữ liệu vào database db (đã có schema, đang trống) theo hệ số quy mô scale.
+# Cùng scale và seed luôn cho ra cùng dữ liệu. Dữ liệu thỏa mọi ràng buộc CHECK và khóa ngoại.
+# Trả về dict tên bảng -> số dòng đã thêm.
+def generate(db, scale=1.0, seed=0):
+    rng = random.Random(seed)
+    counts = {table: scaled(table, scale) for table in SF1_ROWS}
+    rooms = []
+    placements = []
+    contracts = []
+    student_fines = []
+    inserted = {}
+    with db:
+        # Chỉ mục tìm kiếm, số người ở của phòng và công nợ của sinh viên được tính lại một lần
+        # sau khi nạp xong thay vì cập nhật qua trigger từng dòng; dữ liệu sinh ra không ghi nhật ký
+        drop_search_index(db)
+        drop_occupancy_triggers(db)
+        drop_balance_triggers(db)
+        drop_audit_triggers(db)
+        inserted['Staff'] = insert_rows(db, 'Staff', (
+            'FirstName', 'LastName', 'Role', 'ContactNumber', 'Email', 'HireDate', 'ShiftHours', 'Salary', 'Notes'),
+            staff_rows(rng, counts['Staff']))
+        inserted['Rooms'] = insert_rows(db, 'Rooms', (
+            'RoomNumber', 'Type', 'Capacity', 'CurrentOccupants', 'Status', 'FloorNumber', 'BuildingName',
+            'Amenities', 'Notes'), room_rows(rng, counts['Rooms'], rooms))
+        inserted['Students'] = insert_rows(db, 'Students', (
+            'FirstName', 'LastName', 'DateOfBirth', 'Gender', 'ContactNumber', 'Email', 'Address', 'Nationality',
+            'ProgramOfStudy', 'ProfilePicture', 'EmergencyContactName', 'EmergencyContactNumber', 'AdmissionDate',
+            'RoomID', 'RoomAllocationDate'), student_rows(rng, counts['Students'], rooms, placements))
+
+        inserted['Contracts'] = insert_rows(db, 'Contracts', (
+            'StudentID', 'StartDate', 'EndDate', 'ContractStatus', 'MonthlyRent', 'SecurityDeposit',
+            'TermsAndConditions', 'SignedDate', 'RenewalOption', 'Notes', 'CreatedByStaffID', 'LastUpdatedByStaffID',
+            'CreatedAt', 'LastUpdatedAt'),
+            contract_rows(rng, counts['Contracts'], counts['Students'], counts['Staff'], contracts))
+        inserted['RoomAllocationHistory'] = insert_rows(db, 'RoomAllocationHistory', (
+            'StudentID', 'RoomID', 'AllocationDate', 'ReleaseDate', 'Notes'),
+            allocation_rows(rng, counts['RoomAllocationHistory'], counts['Students'], counts['Rooms'],
+                            placements))
+        inserted['Payments'] = insert_rows(db, 'Payments', (
+            'StudentID', 'ContractID', 'Amount', 'LateFee', 'PaymentDate', 'Purpose', 'PaymentMethod',
+            'PaymentStatus', 'ReceiptNumber'), payment_rows(rng, counts['Payments'], contracts))
+        inserted['MaintenanceRequests'] = insert_rows(db, 'MaintenanceRequests', (
+            'StudentID', 'Description', 'UrgencyLevel', 'AssignedStaffID', 'Status', 'RequestDate',
+            'CompletionDate', 'Notes'),
+            maintenance_rows(rng, counts['MaintenanceRequests'], counts['Students'], counts['Staff']))
+        inserted['Inventory'] = insert_rows(db, 'Inventory', (
+            'ItemName', 'Quantity', 'Location', 'Status', 'Notes'), inventory_rows(rng, counts['Inventory']))
+        inserted['Complaints'] = insert_rows(db, 'Complaints', (
+            'StudentID', 'Subject', 'Description', 'Status', 'ComplaintDate', 'ResolutionDate', 'Notes'),
+            complaint_rows(rng, counts['Complaints'], counts['Students']))
+        inserted['FinesAndPenalties'] = insert_rows(db, 'FinesAndPenalties', (
+            'StudentID', 'ViolationType', 'Description', 'FineAmount', 'FineDate', 'Status', 'Notes'),
+            fine_rows(rng, counts['FinesAndPenalties'], counts['Students'], student_fines))
+        inserted['StudentFines'] = insert_rows(db, 'StudentFines', (
+            'StudentID', 'FineID', 'IssuedDate', 'Status', 'Notes'), student_fines)
+        create_search_index(db)
+        create_occupancy_triggers(db)
+        create_balance_triggers(db)
+        create_audit_triggers(db)
+    db.execute('ANALYZE')
+    return inserted
+
+# Tạo file database mới tại path và sinh dữ liệu vào đó
+def create_dataset(path, scale=1.0, seed=0):
+    if os.path.exists(path):
+        raise FileExistsError(f"File {path} đã tồn tại; hãy chọn file khác để không ghi đè dữ liệu thật")
+    db = open_database(dict(load_db_config(), path=path))
+    try:
+        return generate(db, scale, seed)
+    finally:
+        db.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sinh dữ liệu giả lập theo hệ số quy mô cho benchmark")
+    parser.add_argument('path', help="file database mới sẽ được tạo")
+    parser.add_argument('--scale', type=float, default=1.0, help="hệ số quy mô (SF1 = 10k sinh viên, 200k thanh toán)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    try:
+        inserted = create_dataset(args.path, args.scale, args.seed)
+    except FileExistsError as e:
+        sys.exit(str(e))
+    for table, count in inserted.items():
+        print(f'{table:24} {count:>9}')
+    print(f'Hoàn tất sau {time.perf_counter() - started:.1f}s')
+
+if __name__ == '__main__':
+    main()
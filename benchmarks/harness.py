@@ -0,0 +1,270 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.datagen import BASE_DATE, FIRST_NAMES, LAST_NAMES, PROGRAMS, create_dataset
+from dormitory.db import load_db_config, open_database
+from dormitory.importer import STUDENT_IMPORT_COLUMNS, import_students
+from dormitory.repository import repositories
+
+# Thư mục mặc định lưu kết quả (mỗi lần chạy một file JSON)
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Từ khóa tìm kiếm điển hình của từng màn hình (khớp nhiều dòng trong dữ liệu sinh ra)
+SEARCH_TERMS = {
+    'Students': 'nguyen',
+    'Contracts': 'active',
+    'Staff': 'maintenance',
+    'Rooms': 'toa a',
+    'RoomAllocationHistory': '15',
+    'Payments': 'rent completed',
+    'MaintenanceRequests': 'dieu hoa',
+    'Inventory': 'quat',
+    'Complaints': 'wifi',
+    'FinesAndPenalties': 'noise',
+    'StudentFines': 'unpaid',
+}
+
+# Ngày dùng cho tìm kiếm theo ngày (DD-MM-YYYY như người dùng nhập)
+SEARCH_DATE = (BASE_DATE - timedelta(days=100)).strftime('%d-%m-%Y')
+
+# Dòng mẫu để đo thêm/sửa/xóa; khóa ngoại trỏ tới dòng số 1 (luôn có ở mọi hệ số quy mô).
+# Phân phòng mẫu đã có ngày trả phòng để không chuyển phòng của sinh viên số 1
+SAMPLE_ROWS = {
+    'Students': {'FirstName': 'Bench', 'LastName': 'Mark', 'DateOfBirth': '01-01-2004', 'Gender': 'Other',
+                 'Email': 'benchmark@dormitory.vn', 'AdmissionDate': '01-09-2023'},
+    'Contracts': {'StudentID': 1, 'StartDate': '01-09-2023', 'EndDate': '01-09-2024', 'ContractStatus': 'Pending',
+                  'MonthlyRent': 1500000, 'SecurityDeposit': 3000000, 'CreatedByStaffID': 1},
+    'Staff': {'FirstName': 'Bench', 'LastName': 'Mark', 'Role': 'Cleaner', 'Email': 'benchmark@dormitory.vn'},
+    'Rooms': {'RoomNumber': 'BENCH-1', 'Type': 'Double', 'Capacity': 2, 'FloorNumber': 1, 'BuildingName': 'Tòa Z'},
+    'RoomAllocationHistory': {'StudentID': 1, 'RoomID': 1, 'AllocationDate': '01-09-2023',
+                              'ReleaseDate': '01-12-2023'},
+    'Payments': {'StudentID': 1, 'ContractID': 1, 'Amount': 1500000, 'PaymentDate': '05-09-2023',
+                 'Purpose': 'Rent', 'PaymentMethod': 'Cash', 'PaymentStatus': 'Completed'},
+    'MaintenanceRequests': {'StudentID': 1, 'Description': 'Hỏng bóng đèn', 'UrgencyLevel': 'Low',
+                            'RequestDate': '05-09-2023'},
+    'Inventory': {'ItemName': 'Ghế', 'Quantity': 10, 'Location': 'Tòa Z'},
+    'Complaints': {'StudentID': 1, 'Subject': 'Tiếng ồn', 'Description': 'Ồn ào sau 23h',
+                   'ComplaintDate': '05-09-2023'},
+    'FinesAndPenalties': {'StudentID': 1, 'ViolationType': 'Noise', 'Description': 'Gây ồn sau 23h',
+                          'FineAmount': 50000, 'FineDate': '05-09-2023'},
+    'StudentFines': {'FineID': 1, 'IssuedDate': '05-09-2023'},
+}
+
+# Giá trị dùng để đo thao tác sửa (mặc định sửa cột Notes)
+UPDATE_VALUES = {
+    'Students': {'Address': 'Cập nhật benchmark'},
+    'Payments': {'PaymentStatus': 'Failed'},
+}
+DEFAULT_UPDATE_VALUES = {'Notes': 'Cập nhật benchmark'}
+
+# Số dòng của file sinh viên dùng để đo nhập hàng loạt (mục tiêu: vài chục nghìn dòng trong vài giây)
+IMPORT_ROWS = 50000
+
+# Thời gian (ms) của mỗi lần chạy fn()
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def summarize(timings):
+    return {
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'runs': len(timings),
+    }
+
+# Dòng mẫu của bảng; với StudentFines chọn một sinh viên chưa có khoản phạt số 1 (khóa chính kép)
+def sample_row(db, table):
+    row = dict(SAMPLE_ROWS[table])
+    if table == 'StudentFines':
+        row['StudentID'] = db.execute('''SELECT MAX(StudentID) FROM Students WHERE StudentID NOT IN
+            (SELECT StudentID FROM StudentFines WHERE FineID = 1)''').fetchone()[0]
+    return row
+
+# Đo các thao tác của màn hình tương ứng với bảng table, qua cùng repository mà giao diện dùng:
+# load (trang đầu của load_*), scroll (trang kế tiếp khi cuộn), search (search_* theo từ khóa),
+# search_date (tìm theo ngày), add, update, delete (mỗi lần một transaction)
+def benchmark_table(db, table, repeat):
+    repository = repositories[table]
+    results = {}
+    first_page = repository.page(db)
+    results['load'] = measure(lambda: repository.page(db), repeat)
+    if first_page:
+        after = tuple(getattr(first_page[-1], column) for column in repository.key_columns)
+        results['scroll'] = measure(lambda: repository.page(db, after=after), repeat)
+    results['search'] = measure(lambda: repository.search(db, SEARCH_TERMS[table]), repeat)
+    if repository.date_columns:
+        results['search_date'] = measure(lambda: repository.search(db, SEARCH_DATE), repeat)
+
+    # Mỗi vòng thêm, sửa rồi xóa cùng một dòng mẫu, nên database không đổi sau khi đo
+    row = sample_row(db, table)
+    update_values = UPDATE_VALUES.get(table, DEFAULT_UPDATE_VALUES)
+    for name in ('add', 'update', 'delete'):
+        results[name] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with db:
+            key = repository.insert(db, row)
+        try:
+            added = time.perf_counter()
+            with db:
+                repository.update(db, key, update_values)
+            updated = time.perf_counter()
+        finally:
+            with db:
+                repository.delete(db, key)
+        deleted = time.perf_counter()
+        results['add'].append((added - started) * 1000)
+        results['update'].append((updated - added) * 1000)
+        results['delete'].append((deleted - updated) * 1000)
+    return {name: summarize(timings) for name, timings in results.items()}
+
+# Các bộ lọc có sẵn trên màn hình (thanh toán trong tháng, hợp đồng sắp hết hạn)
+def benchmark_filters(db, repeat):
+    month_start = BASE_DATE.replace(day=1) - timedelta(days=1)
+    month = (month_start.replace(day=1).isoformat(), month_start.isoformat())
+    expiring = (BASE_DATE.isoformat(), (BASE_DATE + timedelta(days=30)).isoformat())
+    payments = repositories['Payments']
+    contracts = repositories['Contracts']
+    return {
+        'Payments': {'filter_month': summarize(measure(
+            lambda: payments.page(db, 'PaymentDate BETWEEN ? AND ?', month, ('PaymentDate', 'PaymentID')), repeat))},
+        'Contracts': {'filter_expiring': summarize(measure(
+            lambda: contracts.page(db, 'EndDate BETWEEN ? AND ?', expiring, ('EndDate', 'ContractID')), repeat))},
+    }
+
+# Ghi file CSV gồm count sinh viên hợp lệ (email không trùng với dữ liệu sinh ra) để nhập
+def write_import_file(path, count):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(STUDENT_IMPORT_COLUMNS)
+        for i in range(count):
+            row = {'FirstName': FIRST_NAMES[i % len(FIRST_NAMES)], 'LastName': LAST_NAMES[i % len(LAST_NAMES)],
+                   'DateOfBirth': f'{i % 28 + 1:02d}-{i % 12 + 1:02d}-2004', 'Gender': 'Other',
+                   'ContactNumber': f'09{i:08d}', 'Email': f'import{i}@dormitory.vn',
+                   'ProgramOfStudy': PROGRAMS[i % len(PROGRAMS)], 'AdmissionDate': '01-09-2023'}
+            writer.writerow([row.get(column, '') for column in STUDENT_IMPORT_COLUMNS])
+
+# Đo nhập count sinh viên từ file CSV (cả kiểm tra, ghi và đánh chỉ mục tìm kiếm) trên một bản sao
+# của database ở path, để database đo các thao tác khác không bị đổi
+def benchmark_import(path, directory, count):
+    source = sqlite3.connect(path)
+    copy_path = os.path.join(directory, 'import.db')
+    copy = sqlite3.connect(copy_path)
+    try:
+        source.backup(copy)
+    finally:
+        source.close()
+        copy.close()
+    csv_path = os.path.join(directory, 'import.csv')
+    write_import_file(csv_path, count)
+    db = open_database(dict(load_db_config(), path=copy_path))
+    try:
+        started = time.perf_counter()
+        inserted, rejects = import_students(db, csv_path)
+        elapsed = (time.perf_counter() - started) * 1000
+    finally:
+        db.close()
+        os.remove(copy_path)
+        os.remove(csv_path)
+    if rejects:
+        raise RuntimeError(f"Nhập thử bị loại {len(rejects)} dòng: {rejects[0][2]}")
+    return summarize([elapsed])
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Chạy toàn bộ benchmark trên database ở path; trả về dict kết quả (ghi được ra JSON)
+def run_benchmark(path, repeat):
+    db = open_database(dict(load_db_config(), path=path))
+    try:
+        rows = {table: db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in repositories}
+        results = {table: benchmark_table(db, table, repeat) for table in repositories}
+        for table, filters in benchmark_filters(db, repeat).items():
+            results[table].update(filters)
+    finally:
+        db.close()
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'rows': rows,
+        'results': results,
+    }
+
+def print_report(report, baseline=None):
+    previous = baseline['results'] if baseline else {}
+    for table, operations in report['results'].items():
+        print(f"{table} ({report['rows'][table]} dòng)")
+        for name, timing in operations.items():
+            line = f"    {name:16} {timing['median_ms']:>10.3f} ms"
+            old = previous.get(table, {}).get(name)
+            if old and old['median_ms'] > 0:
+                line += f"   {timing['median_ms'] / old['median_ms']:>6.2f}x so với lần trước"
+            print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Đo thời gian các thao tác của từng màn hình trên dữ liệu giả lập")
+    parser.add_argument('--db', help="database có sẵn để đo, nên là bản sao (mặc định sinh dữ liệu mới vào thư mục tạm)")
+    parser.add_argument('--scale', type=float, default=1.0, help="hệ số quy mô khi sinh dữ liệu")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help="số lần đo mỗi thao tác")
+    parser.add_argument('--import-rows', type=int, default=IMPORT_ROWS,
+                        help="số dòng sinh viên khi đo nhập hàng loạt (0 để bỏ qua)")
+    parser.add_argument('--output', help="file JSON kết quả (mặc định benchmarks/results/<thời điểm>.json)")
+    parser.add_argument('--compare', help="file JSON của lần chạy trước để so sánh")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.db
+        datagen_seconds = None
+        if path is None:
+            path = os.path.join(directory, 'benchmark.db')
+            started = time.perf_counter()
+            create_dataset(path, args.scale, args.seed)
+            datagen_seconds = round(time.perf_counter() - started, 3)
+        report = run_benchmark(path, args.repeat)
+        if args.import_rows > 0:
+            report['results']['Students'][f'import_{args.import_rows}'] = benchmark_import(path, directory, args.import_rows)
+    report['database'] = args.db
+    report['scale'] = None if args.db else args.scale
+    report['seed'] = None if args.db else args.seed
+    report['datagen_seconds'] = datagen_seconds
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print_report(report, baseline)
+    print(f"Đã ghi kết quả vào {output}")
+
+if __name__ == '__main__':
+    main()
@@ -1,195 +1,33 @@
-import sqlite3
+import time
+
+# Các mốc thời gian khởi động, in ra khi chạy với --profile-startup
+startup_marks = [("Bắt đầu chạy doan.py", time.perf_counter())]
+
+import os
+import sys
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
-from tkinter import filedialog
-import re
-from datetime import datetime
-
-# Kết nối đến database SQLite
-conn = sqlite3.connect('dormitory.db')
-cursor = conn.cursor()
-
-create_tables_query = """
--- TABLE: Users
-CREATE TABLE IF NOT EXISTS Users (
-    UserID INTEGER PRIMARY KEY AUTOINCREMENT,
-    Username TEXT UNIQUE NOT NULL,
-    Password TEXT NOT NULL,
-    CreatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-
--- TABLE: Rooms
-CREATE TABLE IF NOT EXISTS Rooms (
-    RoomID INTEGER PRIMARY KEY AUTOINCREMENT,
-    RoomNumber TEXT UNIQUE NOT NULL,
-    Type TEXT CHECK (Type IN ('Single', 'Double', 'Shared')) NOT NULL,
-    Capacity INTEGER CHECK (Capacity > 0) NOT NULL,
-    CurrentOccupants INTEGER DEFAULT 0 CHECK (CurrentOccupants >= 0 AND CurrentOccupants <= Capacity),
-    Status TEXT CHECK (Status IN ('Available', 'Occupied', 'Under Maintenance')) DEFAULT 'Available',
-    FloorNumber INTEGER CHECK (FloorNumber > 0),
-    BuildingName TEXT NOT NULL,
-    Amenities TEXT,
-    Notes TEXT,
-    CONSTRAINT OccupantsCapacityCheck CHECK (CurrentOccupants <= Capacity)
-);
-
--- TABLE: Contracts
-CREATE TABLE IF NOT EXISTS Contracts (
-    ContractID INTEGER PRIMARY KEY AUTOINCREMENT,
-    StudentID INTEGER,
-    StartDate DATE NOT NULL,
-    EndDate DATE NOT NULL,
-    ContractStatus TEXT CHECK (ContractStatus IN ('Active', 'Terminated', 'Completed', 'Pending')) DEFAULT 'Pending',
-    MonthlyRent DECIMAL(10, 2) NOT NULL,
-    SecurityDeposit DECIMAL(10, 2) NOT NULL,
-    TermsAndConditions TEXT,
-    SignedDate DATE DEFAULT CURRENT_DATE,
-    RenewalOption BOOLEAN DEFAULT FALSE,
-    Notes TEXT,
-    CreatedByStaffID INTEGER,
-    LastUpdatedByStaffID INTEGER,
-    CreatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    LastUpdatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE,
-    FOREIGN KEY (CreatedByStaffID) REFERENCES Staff(StaffID) ON DELETE SET NULL,
-    FOREIGN KEY (LastUpdatedByStaffID) REFERENCES Staff(StaffID) ON DELETE SET NULL,
-    CONSTRAINT EndDateCheck CHECK (EndDate > StartDate)
-);
-
--- TABLE: Students
-CREATE TABLE IF NOT EXISTS Students (
-    StudentID INTEGER PRIMARY KEY AUTOINCREMENT,
-    FirstName TEXT NOT NULL,
-    LastName TEXT NOT NULL,
-    DateOfBirth DATE NOT NULL,
-    Gender TEXT CHECK (Gender IN ('Male', 'Female', 'Other')),
-    ContactNumber TEXT,
-    Email TEXT UNIQUE NOT NULL,
-    Address TEXT,
-    Nationality TEXT,
-    ProgramOfStudy TEXT,
-    ProfilePicture TEXT,
-    EmergencyContactName TEXT,
-    EmergencyContactNumber TEXT,
-    AdmissionDate DATE DEFAULT CURRENT_DATE,
-    RoomID INTEGER,
-    RoomAllocationDate DATE,
-    FOREIGN KEY (RoomID) REFERENCES Rooms(RoomID) ON DELETE SET NULL,
-    CONSTRAINT AllocationDateCheck CHECK (RoomAllocationDate >= AdmissionDate)
-);
-
--- TABLE: RoomAllocationHistory
-CREATE TABLE IF NOT EXISTS RoomAllocationHistory (
-    AllocationID INTEGER PRIMARY KEY AUTOINCREMENT,
-    StudentID INTEGER,
-    RoomID INTEGER,
-    AllocationDate DATE NOT NULL,
-    ReleaseDate DATE,
-    Notes TEXT,
-    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE,
-    FOREIGN KEY (RoomID) REFERENCES Rooms(RoomID) ON DELETE CASCADE,
-    CONSTRAINT ReleaseDateCheck CHECK (ReleaseDate IS NULL OR ReleaseDate > AllocationDate)
-);
-
--- TABLE: Payments
-CREATE TABLE IF NOT EXISTS Payments (
-    PaymentID INTEGER PRIMARY KEY AUTOINCREMENT,
-    StudentID INTEGER,
-    ContractID INTEGER,
-    Amount DECIMAL(10, 2) NOT NULL,
-    LateFee DECIMAL(10, 2) DEFAULT 0.00,
-    PaymentDate DATE DEFAULT CURRENT_DATE,
-    Purpose TEXT CHECK (Purpose IN ('Rent', 'Utilities', 'Deposit', 'Other')) NOT NULL,
-    PaymentMethod TEXT CHECK (PaymentMethod IN ('Cash', 'Card', 'Bank Transfer')) NOT NULL,
-    PaymentStatus TEXT CHECK (PaymentStatus IN ('Pending', 'Completed', 'Failed')) DEFAULT 'Pending',
-    ReceiptNumber TEXT UNIQUE,
-    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE,
-    FOREIGN KEY (ContractID) REFERENCES Contracts(ContractID) ON DELETE SET NULL
-);
-
--- TABLE: MaintenanceRequests
-CREATE TABLE IF NOT EXISTS MaintenanceRequests (
-    RequestID INTEGER PRIMARY KEY AUTOINCREMENT,
-    StudentID INTEGER,
-    Description TEXT NOT NULL,
-    UrgencyLevel TEXT CHECK (UrgencyLevel IN ('Low', 'Medium', 'High')) DEFAULT 'Medium',
-    AssignedStaffID INTEGER,
-    Status TEXT CHECK (Status IN ('Pending', 'In Progress', 'Completed')) DEFAULT 'Pending',
-    RequestDate DATE DEFAULT CURRENT_DATE,
-    CompletionDate DATE,
-    Notes TEXT,
-    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE,
-    FOREIGN KEY (AssignedStaffID) REFERENCES Staff(StaffID) ON DELETE SET NULL,
-    CONSTRAINT CompletionDateCheck CHECK (CompletionDate IS NULL OR CompletionDate >= RequestDate)
-);
-
--- TABLE: Inventory
-CREATE TABLE IF NOT EXISTS Inventory (
-    ItemID INTEGER PRIMARY KEY AUTOINCREMENT,
-    ItemName TEXT NOT NULL,
-    Quantity INTEGER CHECK (Quantity >= 0) NOT NULL,
-    Location TEXT,
-    Status TEXT CHECK (Status IN ('Available', 'In Use', 'Damaged', 'Lost')) DEFAULT 'Available',
-    Notes TEXT
-);
-
--- TABLE: Staff
-CREATE TABLE IF NOT EXISTS Staff (
-    StaffID INTEGER PRIMARY KEY AUTOINCREMENT,
-    FirstName TEXT NOT NULL,
-    LastName TEXT NOT NULL,
-    Role TEXT CHECK (Role IN ('Admin', 'Maintenance', 'Cleaner', 'Security')) NOT NULL,
-    ContactNumber TEXT,
-    Email TEXT UNIQUE NOT NULL,
-    HireDate DATE DEFAULT CURRENT_DATE,
-    ShiftHours TEXT,
-    Salary DECIMAL(10, 2) DEFAULT 0.00,
-    Notes TEXT
-);
-
--- TABLE: Complaints
-CREATE TABLE IF NOT EXISTS Complaints (
-    ComplaintID INTEGER PRIMARY KEY AUTOINCREMENT,
-    StudentID INTEGER,
-    Subject TEXT NOT NULL,
-    Description TEXT NOT NULL,
-    Status TEXT CHECK (Status IN ('Pending', 'Resolved', 'Dismissed')) DEFAULT 'Pending',
-    ComplaintDate DATE DEFAULT CURRENT_DATE,
-    ResolutionDate DATE,
-    Notes TEXT,
-    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE,
-    CONSTRAINT ResolutionDateCheck CHECK (ResolutionDate IS NULL OR ResolutionDate >= ComplaintDate)
-);
-
--- TABLE: FinesAndPenalties
-CREATE TABLE IF NOT EXISTS FinesAndPenalties (
-    FineID INTEGER PRIMARY KEY AUTOINCREMENT,
-    StudentID INTEGER,
-    ViolationType TEXT CHECK (ViolationType IN ('Noise', 'Late Payment', 'Damage', 'Other')) NOT NULL,
-    Description TEXT NOT NULL,
-    FineAmount DECIMAL(10, 2) CHECK (FineAmount > 0) NOT NULL,
-    FineDate DATE DEFAULT CURRENT_DATE,
-    Status TEXT CHECK (Status IN ('Unpaid', 'Paid')) DEFAULT 'Unpaid',
-    Notes TEXT,
-    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE
-);
-
--- TABLE: StudentFines
-CREATE TABLE IF NOT EXISTS StudentFines (
-    StudentID INTEGER,
-    FineID INTEGER,
-    IssuedDate DATE DEFAULT CURRENT_DATE,
-    Status TEXT CHECK (Status IN ('Unpaid', 'Paid', 'Waived')) DEFAULT 'Unpaid',
-    Notes TEXT,
-    PRIMARY KEY (StudentID, FineID),
-    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE,
-    FOREIGN KEY (FineID) REFERENCES FinesAndPenalties(FineID) ON DELETE CASCADE
-);
-"""
-
-cursor.executescript(create_tables_query)
-conn.commit()
+from datetime import date, timedelta
+
+startup_marks.append(("Import tkinter", time.perf_counter()))
+
+# Các module chỉ dùng trong hộp thoại (filedialog, xuất/nhập file, xếp phòng, lập hóa đơn, công nợ,
+# lịch sử thay đổi, sửa hàng loạt, sao lưu) được import khi mở hộp thoại để không làm chậm lúc khởi động
+from dormitory import auth
+from dormitory.audit import external_writes
+from dormitory.backup import apply_pending_restore, backup_due
+from dormitory.cache import QueryCache
+from dormitory.dashboard import DASHBOARD_SECTIONS, EXPIRING_DAYS, dashboard_section
+from dormitory.db import get_connection, get_db_config, open_database, set_audit_user
+from dormitory.executor import QueryExecutor
+from dormitory.queries import PAGE_SIZE, print_query_plans
+from dormitory.remote import RemoteServer
+from dormitory.repository import repositories
+from dormitory.validators import (is_valid_email, is_valid_phone, is_valid_date, parse_date, to_display_date,
+                                  to_db_date, month_range)
+
+startup_marks.append(("Import dormitory", time.perf_counter()))
 
 # Biến để lưu trữ nút hiện tại
 current_button = None
@@ -201,78 +39,1110 @@ def on_button_click(button):
     button.config(bg="#eb6a81")  # Đổi màu cho nút hiện tại
     current_button = button
 
+# Bộ thực thi truy vấn nền, được tạo trong main()
+executor = None
+
+# Máy chủ dùng chung (dormitory.server) khi cấu hình server được đặt; None khi làm việc thẳng với file database
+remote_server = None
+
+# Bộ đệm kết quả dùng chung cho mọi màn hình: quay lại một màn hình mà dữ liệu chưa đổi
+# thì hiện ngay, không phải truy vấn lại
+query_cache = QueryCache()
+
+# Chu kỳ (ms) kiểm tra database có bị tiến trình khác ghi vào không
+DATA_VERSION_INTERVAL = 2000
+
+# Gửi thao tác ghi fn(db) vào bảng table sang luồng ghi; khi xong thì bỏ kết quả cũ của bảng
+# trong bộ đệm, gọi on_done(kết quả của fn) để cập nhật giao diện và thông báo trên luồng giao diện
+def run_write(table, fn, on_done, success_message, error_message="Có lỗi xảy ra"):
+    def done(result):
+        query_cache.invalidate(table)
+        on_done(result)
+        messagebox.showinfo("Thành công", success_message)
+
+    def failed(e):
+        messagebox.showerror("Lỗi", f"{error_message}: {e}")
+
+    executor.submit_write(fn, done, failed)
+
+# Số dòng lỗi tối đa liệt kê trong thông báo sau một thao tác hàng loạt
+BULK_ERRORS_SHOWN = 10
+
+# Như run_write cho thao tác hàng loạt trên count dòng: fn(db) trả về (kết quả, danh sách (khóa, lỗi)
+# của các dòng bị bỏ qua); thông báo số dòng đã ghi và liệt kê các dòng lỗi
+def run_bulk_write(table, fn, on_done, count, success_message, error_message="Có lỗi xảy ra"):
+    def done(result):
+        written, failures = result
+        query_cache.invalidate(table)
+        on_done(written)
+        if failures:
+            details = '\n'.join(f"{'|'.join(map(str, key))}: {error}" for key, error in failures[:BULK_ERRORS_SHOWN])
+            if len(failures) > BULK_ERRORS_SHOWN:
+                details += f"\n... và {len(failures) - BULK_ERRORS_SHOWN} dòng khác"
+            messagebox.showwarning("Chưa hoàn tất", f"{success_message} {count - len(failures)}/{count} dòng. "
+                                   f"Các dòng sau không ghi được:\n{details}")
+        else:
+            messagebox.showinfo("Thành công", f"{success_message} {count} dòng.")
+
+    def failed(e):
+        messagebox.showerror("Lỗi", f"{error_message}: {e}")
+
+    executor.submit_write(fn, done, failed)
+
+# Khi cuộn quá tỉ lệ này của dữ liệu đã tải thì tải trang tiếp theo
+PREFETCH_THRESHOLD = 0.8
+# Thời gian (ms) chờ người dùng ngừng gõ trước khi gửi truy vấn tìm kiếm
+SEARCH_DEBOUNCE_MS = 250
+
+# Các hàm được gọi (trên luồng giao diện) sau khi phát hiện tiến trình khác ghi vào database
+external_write_listeners = []
+
+# Định kỳ chuyển nhật ký thay đổi đang chờ sang AuditLog (một lô trên luồng ghi) và theo dõi
+# PRAGMA data_version của kết nối ghi: giá trị này chỉ đổi khi một kết nối khác (script, một cửa sổ
+# ứng dụng khác...) commit. Khi đó chỉ bỏ kết quả của các bảng có trong lô nhật ký vừa chuyển;
+# nếu không có dòng nhật ký nào (kết nối kia ghi vào bảng không ghi nhật ký) thì bỏ cả bộ đệm.
+# Khi làm việc với máy chủ thì hỏi máy chủ các bảng mà máy khách khác vừa ghi.
+def watch_external_writes(root):
+    last_version = []
+
+    def check():
+        executor.submit_write(external_writes, changed, lambda e: schedule(), quiet=True)
+
+    def changed(result):
+        tables, version = result
+        if last_version and last_version[0] != version:
+            if tables:
+                for table in tables:
+                    query_cache.invalidate(table)
+            else:
+                query_cache.invalidate_all()
+            for listener in external_write_listeners:
+                listener()
+        last_version[:] = [version]
+        schedule()
+
+    def schedule():
+        root.after(DATA_VERSION_INTERVAL, check)
+
+    check()
+
+# Chu kỳ (ms) kiểm tra đã tới lúc sao lưu tự động chưa
+BACKUP_CHECK_INTERVAL = 60000
+
+# Sau mỗi lần sao lưu tự động lỗi liên tiếp thì chu kỳ kiểm tra tăng gấp đôi; lỗi liên tiếp
+# BACKUP_MAX_FAILURES lần thì ngừng sao lưu tự động cho tới lần khởi động sau
+BACKUP_MAX_FAILURES = 5
+
+# Sao lưu tự động khi ứng dụng đang chạy: định kỳ xem bản sao lưu mới nhất, nếu cũ hơn backup_interval
+# phút thì sao lưu trên một luồng riêng (giao diện và luồng ghi không bị chặn) rồi xoay vòng các bản cũ.
+# Lỗi chỉ được báo bằng hộp thoại ở lần đầu; các lần sau in ra stderr.
+# Khi làm việc với máy chủ thì việc sao lưu do máy chủ đảm nhận (python -m dormitory.backup trên máy chủ).
+def schedule_backups(root):
+    config = get_db_config()
+    if config['backup_interval'] <= 0 or remote_server is not None:
+        return
+    state = {'failures': 0}
+
+    def check():
+        if backup_due(config['backup_dir'], config['backup_interval']):
+            from dormitory.backup import run_backup
+            executor.run_in_thread(lambda db: run_backup(db, config), backed_up, failed, quiet=True)
+        else:
+            schedule()
+
+    def backed_up(result):
+        state['failures'] = 0
+        schedule()
+
+    def failed(e):
+        state['failures'] += 1
+        stopping = state['failures'] >= BACKUP_MAX_FAILURES
+        if state['failures'] == 1:
+            messagebox.showerror("Lỗi", f"Không thể sao lưu tự động: {e}")
+        else:
+            print(f"Sao lưu tự động lỗi lần {state['failures']}: {e}", file=sys.stderr)
+        if stopping:
+            print("Ngừng sao lưu tự động; hãy sao lưu thủ công trong cửa sổ Sao lưu", file=sys.stderr)
+        else:
+            schedule()
+
+    def schedule():
+        root.after(BACKUP_CHECK_INTERVAL * 2 ** state['failures'], check)
+
+    check()
+
+# Xuất toàn bộ dữ liệu đang xem của pager (cả bảng hoặc kết quả lọc/tìm kiếm, không chỉ các trang
+# đã tải) ra file CSV, JSON Lines hoặc Excel. Việc đọc và ghi chạy trên luồng riêng theo từng nhóm dòng.
+def export_table(pager):
+    from tkinter import filedialog
+    from dormitory.exporter import export_query
+
+    file_path = filedialog.asksaveasfilename(
+        title="Xuất dữ liệu",
+        initialfile=pager.repository.table,
+        defaultextension=".csv",
+        filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Excel", "*.xlsx")])
+    if not file_path:
+        return
+
+    progress_window = tk.Toplevel()
+    progress_window.title("Đang xuất dữ liệu")
+    progress_window.geometry("320x90")
+    status_label = tk.Label(progress_window, text="Đang đếm số dòng...")
+    status_label.pack(pady=10)
+    progress_bar = ttk.Progressbar(progress_window, length=280, mode='determinate')
+    progress_bar.pack(pady=5)
+
+    def show_progress(written, total):
+        progress_bar['maximum'] = max(total, 1)
+        progress_bar['value'] = written
+        status_label.config(text=f"Đã xuất {written}/{total} dòng")
+
+    def done(written):
+        progress_window.destroy()
+        messagebox.showinfo("Thành công", f"Đã xuất {written} dòng ra file {file_path}")
+
+    def failed(e):
+        progress_window.destroy()
+        messagebox.showerror("Lỗi", f"Không thể xuất dữ liệu: {e}")
+
+    query, params = pager.query
+    executor.run_in_thread(
+        lambda db: export_query(db, query, params, file_path,
+                                lambda written, total: executor.post(show_progress, written, total)),
+        done, failed)
+
+# Cửa sổ tìm phòng còn giường trống theo tòa nhà, loại phòng và số giường cần (truy vấn dùng chỉ mục
+# idx_rooms_free_beds nên trả về ngay cả khi có nhiều phòng). Chọn một phòng thì gọi on_pick(mã phòng).
+def find_free_bed(on_pick):
+    from dormitory.rooms import find_free_beds
+
+    window = tk.Toplevel()
+    window.title("Tìm giường trống")
+    window.geometry("640x340")
+
+    def search():
+        building = entry_building.get().strip()
+        room_type = room_type_var.get()
+        beds = entry_beds.get().strip() or "1"
+        if not beds.isdigit() or int(beds) < 1:
+            messagebox.showerror("Lỗi", "Số giường phải là số nguyên dương.")
+            return
+        status_label.config(text="Đang tìm...")
+        executor.submit(lambda db: find_free_beds(db, building, None if room_type == "Tất cả" else room_type, int(beds)),
+                        show_rooms, failed, key=window)
+
+    def show_rooms(rooms):
+        tree.delete(*tree.get_children())
+        for room in rooms:
+            tree.insert('', tk.END, values=[getattr(room, column) for column in column_mapping])
+        status_label.config(text=f"Tìm thấy {len(rooms)} phòng" if rooms else "Không còn phòng phù hợp")
+
+    def failed(e):
+        status_label.config(text="")
+        messagebox.showerror("Lỗi", f"Không thể tìm phòng trống: {e}")
+
+    def pick():
+        selected_item = tree.selection()
+        if not selected_item:
+            messagebox.showwarning("Chưa chọn phòng", "Vui lòng chọn một phòng.")
+            return
+        on_pick(tree.item(selected_item)['values'][0])
+        window.destroy()
+
+    filter_frame = tk.Frame(window)
+    filter_frame.pack(pady=10)
+    tk.Label(filter_frame, text="Tòa nhà:").grid(row=0, column=0, padx=5)
+    entry_building = tk.Entry(filter_frame, width=12)
+    entry_building.grid(row=0, column=1, padx=5)
+    tk.Label(filter_frame, text="Loại phòng:").grid(row=0, column=2, padx=5)
+    room_type_var = tk.StringVar()
+    room_type_var.set("Tất cả")
+    tk.OptionMenu(filter_frame, room_type_var, "Tất cả", "Single", "Double", "Shared").grid(row=0, column=3, padx=5)
+    tk.Label(filter_frame, text="Số giường:").grid(row=0, column=4, padx=5)
+    entry_beds = tk.Entry(filter_frame, width=5)
+    entry_beds.insert(0, "1")
+    entry_beds.grid(row=0, column=5, padx=5)
+    tk.Button(filter_frame, text="Tìm", command=search).grid(row=0, column=6, padx=5)
+
+    column_mapping = {
+        "RoomID": "Mã phòng",
+        "RoomNumber": "Số phòng",
+        "BuildingName": "Tòa nhà",
+        "FloorNumber": "Tầng",
+        "Type": "Loại phòng",
+        "FreeBeds": "Giường trống",
+    }
+    tree = ttk.Treeview(window, columns=list(column_mapping.keys()), show="headings", height=10)
+    for col in tree["columns"]:
+        tree.heading(col, text=column_mapping[col])
+        tree.column(col, anchor="w", width=100)
+    tree.pack(fill=tk.BOTH, expand=True, padx=10)
+    tree.bind('<Double-1>', lambda event: pick())
+
+    status_label = tk.Label(window, text="")
+    status_label.pack(side=tk.LEFT, padx=10, pady=10)
+    tk.Button(window, text="Chọn phòng", bg="#8BC34A", fg="white", command=pick).pack(side=tk.RIGHT, padx=10, pady=10)
+
+    search()
+
+# Số dòng tối đa hiện trong bảng xem trước của xếp phòng hàng loạt (kế hoạch vẫn gồm mọi sinh viên)
+ASSIGNMENT_PREVIEW_ROWS = 1000
+
+# Cửa sổ xếp phòng hàng loạt cho các sinh viên chưa có phòng: "Xem trước" lập kế hoạch trên luồng đọc
+# (chưa ghi gì), "Xác nhận" ghi đúng kế hoạch đó trong một transaction. Ghi xong thì gọi on_done().
+def batch_assign_rooms(on_done):
+    from dormitory.rooms import plan_room_assignments, apply_room_assignments
+
+    window = tk.Toplevel()
+    window.title("Xếp phòng hàng loạt")
+    window.geometry("820x460")
+    plan = []
+
+    def preview():
+        buildings = [name.strip() for name in entry_buildings.get().split(',') if name.strip()]
+        allocation_date = entry_allocation_date.get().strip()
+        if not is_valid_date(allocation_date):
+            messagebox.showerror("Lỗi", "Ngày không hợp lệ. Định dạng đúng là DD-MM-YYYY.")
+            return
+        plan[:] = []
+        confirm_button.config(state=tk.DISABLED)
+        status_label.config(text="Đang lập kế hoạch...")
+        executor.submit(lambda db: plan_room_assignments(db, buildings, to_db_date(allocation_date)),
+                        show_plan, failed, key=window)
+
+    def show_plan(result):
+        assignments, unassigned = result
+        plan[:] = assignments
+        tree.delete(*tree.get_children())
+        for assignment in assignments[:ASSIGNMENT_PREVIEW_ROWS]:
+            tree.insert('', tk.END, values=(
+                assignment.StudentID, f"{assignment.LastName} {assignment.FirstName}", assignment.Gender,
+                assignment.ProgramOfStudy, assignment.RoomNumber, assignment.BuildingName,
+                to_display_date(assignment.AllocationDate)))
+        rooms = len({assignment.RoomID for assignment in assignments})
+        text = f"Sẽ xếp {len(assignments)} sinh viên vào {rooms} phòng"
+        if unassigned:
+            text += f"; {len(unassigned)} sinh viên chưa có chỗ"
+        if len(assignments) > ASSIGNMENT_PREVIEW_ROWS:
+            text += f" (hiện {ASSIGNMENT_PREVIEW_ROWS} dòng đầu)"
+        status_label.config(text=text)
+        if assignments:
+            confirm_button.config(state=tk.NORMAL)
+
+    def failed(e):
+        status_label.config(text="")
+        messagebox.showerror("Lỗi", f"Không thể lập kế hoạch xếp phòng: {e}")
+
+    def confirm():
+        assignments = list(plan)
+        if not messagebox.askyesno("Xác nhận", f"Xếp phòng cho {len(assignments)} sinh viên?"):
+            return
+
+        def done(_):
+            window.destroy()
+            on_done()
+
+        run_write('RoomAllocationHistory', lambda db: apply_room_assignments(db, assignments), done,
+                  f"Đã xếp phòng cho {len(assignments)} sinh viên.", "Không thể xếp phòng")
+
+    form_frame = tk.Frame(window)
+    form_frame.pack(pady=10)
+    tk.Label(form_frame, text="Tòa nhà ưu tiên (cách nhau bởi dấu phẩy):").grid(row=0, column=0, padx=5, pady=5)
+    entry_buildings = tk.Entry(form_frame, width=30)
+    entry_buildings.grid(row=0, column=1, padx=5, pady=5)
+    tk.Label(form_frame, text="Ngày phân phòng (DD-MM-YYYY):").grid(row=1, column=0, padx=5, pady=5)
+    entry_allocation_date = tk.Entry(form_frame, width=30)
+    entry_allocation_date.insert(0, date.today().strftime('%d-%m-%Y'))
+    entry_allocation_date.grid(row=1, column=1, padx=5, pady=5)
+    tk.Button(form_frame, text="Xem trước", command=preview).grid(row=0, column=2, rowspan=2, padx=10)
+
+    column_mapping = {
+        "StudentID": "Mã sinh viên",
+        "FullName": "Họ tên",
+        "Gender": "Giới tính",
+        "ProgramOfStudy": "Ngành học",
+        "RoomNumber": "Số phòng",
+        "BuildingName": "Tòa nhà",
+        "AllocationDate": "Ngày phân phòng",
+    }
+    tree = ttk.Treeview(window, columns=list(column_mapping.keys()), show="headings", height=12)
+    for col in tree["columns"]:
+        tree.heading(col, text=column_mapping[col])
+        tree.column(col, anchor="w", width=110)
+    tree.pack(fill=tk.BOTH, expand=True, padx=10)
+
+    status_label = tk.Label(window, text="")
+    status_label.pack(side=tk.LEFT, padx=10, pady=10)
+    confirm_button = tk.Button(window, text="Xác nhận xếp phòng", bg="#8BC34A", fg="white", state=tk.DISABLED,
+                               command=confirm)
+    confirm_button.pack(side=tk.RIGHT, padx=10, pady=10)
+
+# Cửa sổ lập hóa đơn tiền phòng (và điện nước) của một tháng cho mọi hợp đồng đang hiệu lực.
+# Việc lập hóa đơn chạy trên luồng riêng theo từng nhóm hợp đồng; chạy lại cùng tháng không tạo hóa đơn
+# trùng và tiếp tục từ chỗ bị dừng nếu lần trước chưa xong. Xong thì gọi on_done().
+def billing_dialog(on_done):
+    from dormitory.billing import run_billing
+
+    window = tk.Toplevel()
+    window.title("Lập hóa đơn tháng")
+    window.geometry("420x200")
+
+    def start():
+        month_text = entry_month.get().strip()
+        utilities_text = entry_utilities.get().strip()
+        if not is_valid_date('01-' + month_text):
+            messagebox.showerror("Lỗi", "Tháng không hợp lệ. Định dạng đúng là MM-YYYY.")
+            return
+        if utilities_text and (not utilities_text.isdigit() or int(utilities_text) < 1):
+            messagebox.showerror("Lỗi", "Tiền điện nước phải là số nguyên dương.")
+            return
+        utilities_amount = int(utilities_text) if utilities_text else None
+        day = parse_date('01-' + month_text)
+        start_button.config(state=tk.DISABLED)
+        status_label.config(text="Đang lập hóa đơn...")
+        executor.run_in_thread(
+            lambda db: run_billing(db, day, utilities_amount,
+                                   on_progress=lambda done, total: executor.post(show_progress, done, total)),
+            finished, failed)
+
+    def show_progress(done, total):
+        progress_bar['maximum'] = max(total, 1)
+        progress_bar['value'] = done
+        status_label.config(text=f"Đã xử lý tới hợp đồng {done}/{total}")
+
+    def finished(result):
+        rent_charges, utility_charges = result
+        query_cache.invalidate('Payments')
+        window.destroy()
+        on_done()
+        messagebox.showinfo("Thành công", f"Đã lập {rent_charges} hóa đơn tiền phòng và {utility_charges} hóa đơn điện nước.")
+
+    def failed(e):
+        start_button.config(state=tk.NORMAL)
+        status_label.config(text="")
+        messagebox.showerror("Lỗi", f"Không thể lập hóa đơn: {e}. Chạy lại để tiếp tục từ chỗ bị dừng.")
+
+    form_frame = tk.Frame(window)
+    form_frame.pack(pady=10)
+    tk.Label(form_frame, text="Tháng (MM-YYYY):").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+    entry_month = tk.Entry(form_frame)
+    entry_month.insert(0, date.today().strftime('%m-%Y'))
+    entry_month.grid(row=0, column=1, padx=5, pady=5)
+    tk.Label(form_frame, text="Tiền điện nước mỗi hợp đồng:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+    entry_utilities = tk.Entry(form_frame)
+    entry_utilities.grid(row=1, column=1, padx=5, pady=5)
+
+    progress_bar = ttk.Progressbar(window, length=380, mode='determinate')
+    progress_bar.pack(pady=5)
+    status_label = tk.Label(window, text="Để trống tiền điện nước nếu chỉ lập hóa đơn tiền phòng")
+    status_label.pack(pady=5)
+    start_button = tk.Button(window, text="Lập hóa đơn", bg="#8BC34A", fg="white", command=start)
+    start_button.pack(pady=5)
+
+# Cửa sổ công nợ: danh sách sinh viên nợ trên một mức (đọc bảng StudentBalances qua chỉ mục Balance)
+# hoặc công nợ của một sinh viên theo mã
+def debtors_dialog():
+    from dormitory.balances import OWING_LIMIT, get_balance, students_owing
+
+    window = tk.Toplevel()
+    window.title("Công nợ sinh viên")
+    window.geometry("760x380")
+
+    def search():
+        student_id = entry_student.get().strip()
+        minimum = entry_minimum.get().strip() or "0"
+        if student_id and not student_id.isdigit():
+            messagebox.showerror("Lỗi", "Mã sinh viên phải là số nguyên.")
+            return
+        if not minimum.isdigit():
+            messagebox.showerror("Lỗi", "Mức nợ phải là số nguyên không âm.")
+            return
+        status_label.config(text="Đang tìm...")
+        if student_id:
+            executor.submit(lambda db: [balance for balance in [get_balance(db, int(student_id))] if balance],
+                            show_balances, failed, key=window)
+        else:
+            executor.submit(lambda db: students_owing(db, int(minimum)), show_balances, failed, key=window)
+
+    def show_balances(balances):
+        tree.delete(*tree.get_children())
+        for balance in balances:
+            tree.insert('', tk.END, values=[getattr(balance, column) for column in column_mapping])
+        if len(balances) == OWING_LIMIT:
+            status_label.config(text=f"Hiện {OWING_LIMIT} sinh viên nợ nhiều nhất")
+        else:
+            status_label.config(text=f"Tìm thấy {len(balances)} sinh viên" if balances else "Không có sinh viên phù hợp")
+
+    def failed(e):
+        status_label.config(text="")
+        messagebox.showerror("Lỗi", f"Không thể tải công nợ: {e}")
+
+    filter_frame = tk.Frame(window)
+    filter_frame.pack(pady=10)
+    tk.Label(filter_frame, text="Nợ trên:").grid(row=0, column=0, padx=5)
+    entry_minimum = tk.Entry(filter_frame, width=12)
+    entry_minimum.insert(0, "0")
+    entry_minimum.grid(row=0, column=1, padx=5)
+    tk.Label(filter_frame, text="Mã sinh viên:").grid(row=0, column=2, padx=5)
+    entry_student = tk.Entry(filter_frame, width=8)
+    entry_student.grid(row=0, column=3, padx=5)
+    tk.Button(filter_frame, text="Tìm", command=search).grid(row=0, column=4, padx=5)
+
+    column_mapping = {
+        "StudentID": "Mã sinh viên",
+        "FirstName": "Tên",
+        "LastName": "Họ",
+        "MonthlyRent": "Tiền thuê/tháng",
+        "PendingCharges": "Chưa thanh toán",
+        "UnpaidFines": "Tiền phạt chưa nộp",
+        "Balance": "Tổng nợ",
+    }
+    tree = ttk.Treeview(window, columns=list(column_mapping.keys()), show="headings", height=12)
+    for col in tree["columns"]:
+        tree.heading(col, text=column_mapping[col])
+        tree.column(col, anchor="w", width=100)
+    tree.pack(fill=tk.BOTH, expand=True, padx=10)
+
+    status_label = tk.Label(window, text="")
+    status_label.pack(side=tk.LEFT, padx=10, pady=10)
+
+    search()
+
+# Cửa sổ lịch sử thay đổi (đọc từ nhật ký thay đổi) của sinh viên hoặc phòng đang chọn trong tree,
+# lọc theo khoảng ngày; table là 'Students' hoặc 'Rooms'
+def change_history_dialog(tree, table):
+    from dormitory.audit import room_history, student_history
+    name, load_history = {'Students': ("sinh viên", student_history), 'Rooms': ("phòng", room_history)}[table]
+    selected_item = tree.selection()
+    if not selected_item:
+        messagebox.showwarning(f"Chưa chọn {name}", f"Vui lòng chọn {name} để xem lịch sử thay đổi.")
+        return
+    subject_id = tree.item(selected_item)['values'][0]
+
+    window = tk.Toplevel()
+    window.title(f"Lịch sử thay đổi của {name} {subject_id}")
+    window.geometry("900x400")
+
+    def search():
+        start_text = entry_start.get().strip()
+        end_text = entry_end.get().strip()
+        if (start_text and not is_valid_date(start_text)) or (end_text and not is_valid_date(end_text)):
+            messagebox.showerror("Lỗi", "Ngày không hợp lệ. Định dạng đúng là DD-MM-YYYY.")
+            return
+        start = parse_date(start_text) if start_text else None
+        end = parse_date(end_text) if end_text else None
+        status_label.config(text="Đang tải...")
+        executor.submit(lambda db: load_history(db, subject_id, start, end), show_history, failed, key=window)
+
+    def show_history(changes):
+        tree_history.delete(*tree_history.get_children())
+        for change in changes:
+            tree_history.insert('', tk.END, values=[getattr(change, column) or "" for column in column_mapping])
+        status_label.config(text=f"{len(changes)} thay đổi" if changes else "Không có thay đổi nào")
+
+    def failed(e):
+        status_label.config(text="")
+        messagebox.showerror("Lỗi", f"Không thể tải lịch sử thay đổi: {e}")
+
+    filter_frame = tk.Frame(window)
+    filter_frame.pack(pady=10)
+    tk.Label(filter_frame, text="Từ ngày (DD-MM-YYYY):").grid(row=0, column=0, padx=5)
+    entry_start = tk.Entry(filter_frame, width=12)
+    entry_start.grid(row=0, column=1, padx=5)
+    tk.Label(filter_frame, text="Đến ngày:").grid(row=0, column=2, padx=5)
+    entry_end = tk.Entry(filter_frame, width=12)
+    entry_end.grid(row=0, column=3, padx=5)
+    tk.Button(filter_frame, text="Lọc", command=search).grid(row=0, column=4, padx=5)
+
+    column_mapping = {
+        "ChangedAt": "Thời điểm",
+        "ChangedBy": "Người sửa",
+        "Operation": "Thao tác",
+        "TableName": "Bảng",
+        "RowKey": "Khóa",
+        "Changes": "Thay đổi",
+    }
+    tree_history = ttk.Treeview(window, columns=list(column_mapping.keys()), show="headings", height=14)
+    for col in tree_history["columns"]:
+        tree_history.heading(col, text=column_mapping[col])
+        tree_history.column(col, anchor="w", width=420 if col == "Changes" else 90)
+    tree_history.pack(fill=tk.BOTH, expand=True, padx=10)
+
+    status_label = tk.Label(window, text="")
+    status_label.pack(side=tk.LEFT, padx=10, pady=10)
+
+    search()
+
+# Cửa sổ sửa hàng loạt các dòng đang chọn trong bảng của pager (chọn nhiều dòng bằng Ctrl/Shift):
+# gán cùng một giá trị cho một cột, hoặc xóa tất cả. fields: tên cột -> (nhãn, các giá trị được chọn
+# hoặc None nếu nhập tự do). Mỗi thao tác là một lệnh executemany trong một transaction.
+def bulk_edit_dialog(pager, fields):
+    keys = pager.selected_keys()
+    if not keys:
+        messagebox.showwarning("Chưa chọn dòng", "Vui lòng chọn các dòng cần sửa (giữ Ctrl hoặc Shift để chọn nhiều dòng).")
+        return
+
+    window = tk.Toplevel()
+    window.title(f"Sửa hàng loạt {len(keys)} dòng")
+    columns = {label: column for column, (label, _) in fields.items()}
+
+    def show_value_input(label):
+        for widget in value_frame.winfo_children():
+            widget.destroy()
+        column = columns[label]
+        choices = fields[column][1]
+        if choices:
+            value_var.set(choices[0])
+            tk.OptionMenu(value_frame, value_var, *choices).pack(side=tk.LEFT)
+        else:
+            value_var.set("")
+            tk.Entry(value_frame, textvariable=value_var).pack(side=tk.LEFT)
+            if column in pager.repository.date_columns:
+                tk.Label(value_frame, text="(DD-MM-YYYY)").pack(side=tk.LEFT, padx=5)
+
+    def apply():
+        label = column_var.get()
+        column = columns[label]
+        value = value_var.get().strip()
+        if column in pager.repository.date_columns and value and not is_valid_date(value):
+            messagebox.showerror("Lỗi", "Ngày không hợp lệ. Định dạng đúng là DD-MM-YYYY.")
+            return
+        if messagebox.askyesno("Xác nhận", f"Đặt {label} = {value or '(trống)'} cho {len(keys)} dòng đã chọn?"):
+            pager.update_rows(keys, {column: value}, "Đã cập nhật")
+            window.destroy()
+
+    def delete():
+        if messagebox.askyesno("Xác nhận", f"Bạn có chắc chắn muốn xóa {len(keys)} dòng đã chọn?"):
+            pager.delete_rows(keys, "Đã xóa")
+            window.destroy()
+
+    form_frame = tk.Frame(window)
+    form_frame.pack(padx=10, pady=10)
+    tk.Label(form_frame, text=f"Đã chọn {len(keys)} dòng").grid(row=0, column=0, columnspan=2, pady=5)
+    tk.Label(form_frame, text="Cột:").grid(row=1, column=0, padx=5, pady=5)
+    column_var = tk.StringVar()
+    column_var.set(next(iter(columns)))
+    tk.OptionMenu(form_frame, column_var, *columns, command=show_value_input).grid(row=1, column=1, padx=5, pady=5, sticky="w")
+    tk.Label(form_frame, text="Giá trị mới:").grid(row=2, column=0, padx=5, pady=5)
+    value_var = tk.StringVar()
+    value_frame = tk.Frame(form_frame)
+    value_frame.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+    show_value_input(column_var.get())
+
+    button_frame = tk.Frame(window)
+    button_frame.pack(pady=10)
+    tk.Button(button_frame, text="Áp dụng", bg="#FFA500", fg="white", command=apply).grid(row=0, column=0, padx=10)
+    tk.Button(button_frame, text=f"Xóa {len(keys)} dòng", bg="#FF6347", fg="white", command=delete).grid(row=0, column=1, padx=10)
+
+# Cửa sổ sao lưu: danh sách các bản sao lưu, sao lưu ngay (trên luồng riêng, có tiến độ), kiểm tra toàn vẹn
+# và khôi phục một bản. Khôi phục chỉ chuẩn bị file; database được thay khi khởi động lại ứng dụng.
+def backup_dialog():
+    from dormitory.backup import check_backup, list_backups, run_backup, schedule_restore
+    config = get_db_config()
+
+    window = tk.Toplevel()
+    window.title("Sao lưu và khôi phục")
+    window.geometry("560x400")
+
+    def load_backups():
+        tree.delete(*tree.get_children())
+        for path, moment in list_backups(config['backup_dir']):
+            tree.insert('', tk.END, iid=path, values=(moment.strftime('%d-%m-%Y %H:%M:%S'),
+                                                      f"{os.path.getsize(path) / 1048576:.1f} MB"))
+
+    def selected_backup():
+        selected_item = tree.selection()
+        if not selected_item:
+            messagebox.showwarning("Chưa chọn bản sao lưu", "Vui lòng chọn một bản sao lưu.")
+            return None
+        return selected_item[0]
+
+    def backup_now():
+        set_buttons(tk.DISABLED)
+        status_label.config(text="Đang sao lưu...")
+        executor.run_in_thread(
+            lambda db: run_backup(db, config, on_progress=lambda done, total: executor.post(show_progress, done, total)),
+            backed_up, failed)
+
+    def show_progress(done, total):
+        progress_bar['maximum'] = max(total, 1)
+        progress_bar['value'] = done
+        status_label.config(text=f"Đã chép {done}/{total} trang")
+
+    def backed_up(result):
+        path, removed, warnings = result
+        set_buttons(tk.NORMAL)
+        load_backups()
+        status_label.config(text=f"Đã sao lưu vào {path}" + (f", xóa {len(removed)} bản cũ" if removed else ""))
+        if warnings:
+            show_warnings(warnings)
+
+    def check():
+        path = selected_backup()
+        if path:
+            set_buttons(tk.DISABLED)
+            status_label.config(text="Đang kiểm tra...")
+            executor.run_in_thread(lambda db: check_backup(path), checked, failed)
+
+    def checked(result):
+        problems, warnings = result
+        set_buttons(tk.NORMAL)
+        status_label.config(text="Bản sao lưu nguyên vẹn" if not problems else f"Bản sao lưu bị lỗi: {problems[0]}")
+        if warnings:
+            show_warnings(warnings)
+
+    # Dữ liệu vi phạm ràng buộc không làm hỏng bản sao lưu nhưng cần được sửa trong database
+    def show_warnings(warnings):
+        messagebox.showwarning("Cảnh báo", "Dữ liệu vi phạm ràng buộc (cần sửa trong database):\n" + '\n'.join(warnings[:5]))
+
+    def restore():
+        path = selected_backup()
+        if not path or not messagebox.askyesno(
+                "Xác nhận", f"Khôi phục database về bản sao lưu lúc {tree.item(path)['values'][0]}? "
+                            "Các thay đổi sau thời điểm đó sẽ mất khi khởi động lại ứng dụng."):
+            return
+        set_buttons(tk.DISABLED)
+        status_label.config(text="Đang kiểm tra bản sao lưu...")
+        executor.run_in_thread(lambda db: schedule_restore(path, config), restore_scheduled, failed)
+
+    def restore_scheduled(_):
+        set_buttons(tk.NORMAL)
+        status_label.config(text="")
+        messagebox.showinfo("Thành công", "Database sẽ được khôi phục khi khởi động lại ứng dụng. "
+                                          "Database hiện tại được giữ lại trong thư mục sao lưu.")
+
+    def failed(e):
+        set_buttons(tk.NORMAL)
+        status_label.config(text="")
+        messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+
+    def set_buttons(state):
+        for button in buttons:
+            button.config(state=state)
+
+    column_mapping = {
+        "Time": "Thời điểm sao lưu",
+        "Size": "Kích thước",
+    }
+    tree = ttk.Treeview(window, columns=list(column_mapping.keys()), show="headings", height=10, selectmode="browse")
+    for col in tree["columns"]:
+        tree.heading(col, text=column_mapping[col])
+        tree.column(col, anchor="w", width=200)
+    tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    progress_bar = ttk.Progressbar(window, length=520, mode='determinate')
+    progress_bar.pack(pady=5)
+    status_label = tk.Label(window, text=f"Thư mục sao lưu: {os.path.abspath(config['backup_dir'])}")
+    status_label.pack(pady=5)
+
+    button_frame = tk.Frame(window)
+    button_frame.pack(pady=5)
+    buttons = [
+        tk.Button(button_frame, text="Sao lưu ngay", bg="#8BC34A", fg="white", command=backup_now),
+        tk.Button(button_frame, text="Kiểm tra", bg="#607D8B", fg="white", command=check),
+        tk.Button(button_frame, text="Khôi phục", bg="#FF6347", fg="white", command=restore),
+    ]
+    for column, button in enumerate(buttons):
+        button.grid(row=0, column=column, padx=10)
+
+    load_backups()
+
+# Tải mục name của trang tổng quan vào ngày today rồi gọi on_rows(rows). Mỗi mục được lưu trong bộ đệm
+# theo bảng nguồn của nó: còn mới thì dùng ngay, nếu không thì tính trên luồng đọc rồi lưu lại.
+# Chỉ mục phụ thuộc ngày mới nhận today và có today trong khóa bộ đệm.
+def load_dashboard_section(name, today, on_rows, on_error):
+    table, _, dated = DASHBOARD_SECTIONS[name]
+    if not dated:
+        today = None
+    key = ('dashboard', name, today.isoformat() if today else None)
+    rows = query_cache.get(table, key)
+    if rows is not None:
+        on_rows(rows)
+        return
+    generation = query_cache.generation(table)
+
+    def done(rows):
+        query_cache.put(table, key, generation, rows)
+        on_rows(rows)
+
+    executor.submit(lambda db: dashboard_section(db, name, today), done, on_error, key=('dashboard', name))
+
+# Bảng Treeview tải dữ liệu theo từng trang (keyset pagination trên khóa chính)
+# thay vì SELECT * rồi fetchall() toàn bộ bảng. Dữ liệu được đọc qua repository của bảng.
+class PagedTable:
+    def __init__(self, tree, table, page_size=PAGE_SIZE):
+        self.tree = tree
+        self.repository = repositories[table]
+        self.page_size = page_size
+        self.fetch = None
+        self.cache_key = None
+        self.generation = None
+        self.query = self.repository.select_query()
+        self.order_columns = self.repository.key_columns
+        self.last_key = None
+        self.date_indexes = None
+        self.exhausted = False
+        self.loading = False
+        # Các dòng đang hiển thị (iid -> dòng gốc; iid là khóa chính của dòng) và chuỗi tìm kiếm
+        # tạo ra chúng ('' là cả bảng, None là đang lọc theo điều kiện khác hoặc chưa tải xong)
+        self.items = {}
+        self.search_term = None
+        self.search_timer = None
+
+        self.scrollbar = ttk.Scrollbar(tree.master, orient=tk.VERTICAL, command=tree.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y, before=tree)
+        tree.configure(yscrollcommand=self.on_scroll)
+
+    # Xóa dữ liệu đang hiển thị và tải lại từ trang đầu (có thể kèm điều kiện lọc)
+    def reset(self, where=None, params=(), order_columns=None):
+        repository = self.repository
+        page_size = self.page_size
+        # fetch(db, after) đọc trang kế tiếp sau khóa after; order_columns là thứ tự của các dòng trả về;
+        # cache_key xác định truy vấn trong bộ đệm kết quả (cùng với khóa after của từng trang)
+        self.fetch = lambda db, after: repository.page(db, where, params, order_columns, after, page_size)
+        self.order_columns = order_columns or repository.key_columns
+        self.cache_key = ('page', where, tuple(params), tuple(order_columns or ()), page_size)
+        self.query = repository.select_query(where, params, order_columns)
+        self.search_term = '' if where is None else None
+        self.restart()
+
+    # Tìm kiếm qua repository: kết quả toàn văn xếp theo độ liên quan, vẫn phân trang theo khóa
+    def search(self, search_term):
+        self.cancel_search_timer()
+        self.use_search(search_term)
+        self.restart()
+
+    # Chuyển truy vấn hiện tại sang tìm kiếm search_term (chưa tải lại dữ liệu)
+    def use_search(self, search_term):
+        repository = self.repository
+        page_size = self.page_size
+        self.fetch = lambda db, after: repository.search(db, search_term, after, page_size)
+        self.order_columns = repository.search_order(search_term)
+        self.cache_key = ('search', search_term, page_size)
+        self.query = repository.select_query(search_term=search_term)
+        self.search_term = search_term
+
+    # Xóa dữ liệu đang hiển thị và tải lại từ trang đầu theo truy vấn hiện tại
+    def restart(self):
+        self.generation = query_cache.generation(self.repository.table)
+        self.last_key = None
+        self.date_indexes = None
+        self.exhausted = False
+        self.loading = False
+        self.items = {}
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self.fetch_next()
+
+    # Lấy trang kế tiếp từ bộ đệm, hoặc gửi truy vấn sang luồng nền; kết quả được nối vào cuối Treeview
+    def fetch_next(self):
+        if self.loading or self.exhausted:
+            return
+        table = self.repository.table
+        key = (self.cache_key, self.last_key)
+        rows = query_cache.get(table, key)
+        if rows is not None:
+            self.show_page(rows)
+            return
+        self.loading = True
+        fetch = self.fetch
+        after = self.last_key
+        generation = query_cache.generation(table)
+
+        def done(rows):
+            query_cache.put(table, key, generation, rows)
+            self.show_page(rows)
+
+        executor.submit(lambda db: fetch(db, after), done, self.show_error, key=self)
+
+    def show_page(self, rows):
+        self.loading = False
+        if rows and self.date_indexes is None:
+            fields = rows[0]._fields
+            self.date_indexes = [i for i, name in enumerate(fields) if name in self.repository.date_columns]
+
+        for row in rows:
+            item = self.item_id(row)
+            if item not in self.items:
+                self.tree.insert('', tk.END, iid=item, values=self.display_values(row))
+                self.items[item] = row
+        if rows:
+            self.last_key = tuple(getattr(rows[-1], column) for column in self.order_columns)
+        if len(rows) < self.page_size:
+            self.exhausted = True
+
+    # Tìm kiếm khi đang gõ (gắn vào sự kiện <KeyRelease> của ô tìm kiếm). Nếu chuỗi mới chỉ thu hẹp
+    # kết quả đã tải đủ thì lọc ngay trên các dòng đang hiển thị; nếu không thì ngắt truy vấn đang chạy
+    # và chỉ truy vấn khi người dùng ngừng gõ SEARCH_DEBOUNCE_MS
+    def search_as_you_type(self, search_term):
+        self.cancel_search_timer()
+        if search_term == self.search_term:
+            return
+        if self.search_term is not None and self.exhausted and self.repository.narrows(self.search_term, search_term):
+            self.narrow(search_term)
+            return
+        if self.loading:
+            executor.cancel(self)
+            self.loading = False
+            self.search_term = None
+        self.search_timer = self.tree.after(SEARCH_DEBOUNCE_MS, lambda: self.search(search_term))
+
+    def cancel_search_timer(self):
+        if self.search_timer is not None:
+            self.tree.after_cancel(self.search_timer)
+            self.search_timer = None
+
+    # Bỏ các dòng không khớp search_term khỏi kết quả đang hiển thị (giữ nguyên thứ tự cũ)
+    def narrow(self, search_term):
+        removed = [item for item, row in self.items.items() if not self.repository.matches(row, search_term)]
+        if removed:
+            self.tree.delete(*removed)
+            for item in removed:
+                del self.items[item]
+        self.use_search(search_term)
+
+    # iid của dòng trong Treeview: khóa chính của dòng (nối bằng | với khóa nhiều cột)
+    def item_id(self, row):
+        return self.key_item_id(tuple(getattr(row, column) for column in self.repository.key_columns))
+
+    def key_item_id(self, key):
+        return '|'.join(str(value) for value in self.repository.key_tuple(key))
+
+    # Giá trị hiển thị của một dòng (ngày đổi sang DD-MM-YYYY)
+    def display_values(self, row):
+        if not self.date_indexes:
+            return row
+        values = list(row)
+        for i in self.date_indexes:
+            values[i] = to_display_date(values[i])
+        return values
+
+    # Thêm, sửa, xóa một dòng qua luồng ghi rồi chỉ cập nhật đúng dòng đó trong Treeview (không tải lại
+    # cả bảng, giữ nguyên vị trí cuộn và dòng đang chọn). Dòng sau khi ghi được đọc lại trong cùng
+    # transaction để hiển thị đúng giá trị database lưu (khóa tự tăng, giá trị mặc định, ngày ISO).
+    def add_row(self, values, success_message, error_message="Có lỗi xảy ra"):
+        repository = self.repository
+        run_write(repository.table, lambda db: repository.get(db, repository.insert(db, values)),
+                  self.patch_row, success_message, error_message)
+
+    def update_row(self, key, values, success_message, error_message="Có lỗi xảy ra"):
+        repository = self.repository
+
+        def write(db):
+            repository.update(db, key, values)
+            return repository.get(db, key)
+
+        run_write(repository.table, write, lambda row: self.patch_row(row, key), success_message, error_message)
+
+    def delete_row(self, key, success_message, error_message="Có lỗi xảy ra"):
+        repository = self.repository
+        run_write(repository.table, lambda db: repository.delete(db, key),
+                  lambda _: self.patch_row(None, key), success_message, error_message)
+
+    # Sửa hoặc xóa hàng loạt các dòng có khóa trong keys (các dòng đang chọn) bằng một executemany
+    # trong một transaction trên luồng ghi, rồi cập nhật Treeview một lần. Dòng vi phạm ràng buộc
+    # được bỏ qua (hoàn tác về savepoint) và liệt kê trong thông báo.
+    def update_rows(self, keys, values, success_message, error_message="Có lỗi xảy ra"):
+        from dormitory.bulk import bulk_update
+        table = self.repository.table
+        run_bulk_write(table, lambda db: bulk_update(db, table, keys, values), self.patch_rows, len(keys),
+                       success_message, error_message)
+
+    def delete_rows(self, keys, success_message, error_message="Có lỗi xảy ra"):
+        from dormitory.bulk import bulk_delete
+        table = self.repository.table
+        run_bulk_write(table, lambda db: bulk_delete(db, table, keys), lambda deleted: self.patch_rows((), deleted),
+                       len(keys), success_message, error_message)
+
+    # Khóa chính của các dòng đang chọn trong Treeview
+    def selected_keys(self):
+        key_columns = self.repository.key_columns
+        return [tuple(getattr(self.items[item], column) for column in key_columns)
+                for item in self.tree.selection() if item in self.items]
+
+    # Cập nhật Treeview theo dòng row vừa ghi (None nếu dòng có khóa key đã bị xóa)
+    def patch_row(self, row, key=None):
+        if row is None:
+            self.patch_rows((), (key,))
+        else:
+            self.patch_rows((row,))
+
+    # Cập nhật Treeview theo các dòng rows vừa ghi và khóa deleted của các dòng vừa bị xóa
+    def patch_rows(self, rows, deleted=()):
+        search_term = self.search_term
+        if rows and search_term is None:
+            # Đang lọc theo điều kiện SQL (ví dụ thanh toán trong tháng): tải lại kết quả
+            self.restart()
+            return
+        if rows and search_term and not self.repository.can_match(search_term):
+            # Đang tìm theo ngày hoặc cụm từ: không kiểm tra được dòng có thuộc kết quả không
+            self.restart()
+            return
+
+        removed = [item for item in map(self.key_item_id, deleted) if item in self.items]
+        for row in rows:
+            item = self.item_id(row)
+            visible = not search_term or self.repository.matches(row, search_term)
+            if item in self.items:
+                if visible:
+                    self.tree.item(item, values=self.display_values(row))
+                    self.items[item] = row
+                else:
+                    removed.append(item)
+            elif visible and self.exhausted:
+                # Dòng mới chỉ được chèn khi đã tải hết kết quả; nếu chưa, nó sẽ đến cùng các trang sau
+                if self.date_indexes is None:
+                    self.date_indexes = [i for i, name in enumerate(row._fields) if name in self.repository.date_columns]
+                self.tree.insert('', tk.END, iid=item, values=self.display_values(row))
+                self.items[item] = row
+        if removed:
+            self.tree.delete(*removed)
+            for item in removed:
+                del self.items[item]
+        self.generation = query_cache.generation(self.repository.table)
+
+    # Tải lại nếu bảng đã bị ghi (trong màn hình khác hoặc bởi tiến trình khác) kể từ lần tải trước;
+    # nếu không thì giữ nguyên dữ liệu, vị trí cuộn và dòng đang chọn
+    def refresh_if_stale(self):
+        if self.fetch is not None and self.generation != query_cache.generation(self.repository.table):
+            self.restart()
+
+    def show_error(self, error):
+        self.loading = False
+        self.exhausted = True
+        self.search_term = None
+        messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {error}")
+
+    # Được Treeview gọi mỗi khi vùng hiển thị thay đổi; gần cuối thì tải tiếp
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) >= PREFETCH_THRESHOLD and not self.exhausted and not self.loading:
+            self.tree.after_idle(self.fetch_next)
+
+# Quản lý các màn hình trong vùng nội dung: mỗi màn hình được dựng một lần ở lần mở đầu tiên rồi
+# giữ lại. Chuyển màn hình chỉ ẩn/hiện frame (pack_forget/pack), nên dữ liệu đang nhập trong form,
+# vị trí cuộn và dòng đang chọn của bảng vẫn còn khi quay lại.
+class ViewManager:
+    def __init__(self, container):
+        self.container = container
+        self.frames = {}
+        self.on_show = {}
+        self.current = None
+
+    # build(frame) dựng màn hình vào frame; giá trị trả về (nếu có) là hàm được gọi mỗi lần
+    # màn hình được hiện lại, ví dụ để tải lại dữ liệu đã cũ
+    def show(self, build):
+        if self.current is not None and self.current is not build:
+            self.frames[self.current].pack_forget()
+        frame = self.frames.get(build)
+        if frame is None:
+            frame = self.frames[build] = tk.Frame(self.container, bg=self.container['bg'])
+            frame.pack(fill=tk.BOTH, expand=True)
+            self.on_show[build] = build(frame)
+        else:
+            if self.current is not build:
+                frame.pack(fill=tk.BOTH, expand=True)
+            if self.on_show[build]:
+                self.on_show[build]()
+        self.current = build
 
-# Hàm kiểm tra email hợp lệ
-def is_valid_email(email):
-    pattern = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
-    return re.match(pattern, email) is not None
-
-# Hàm kiểm tra số điện thoại hợp lệ
-def is_valid_phone(phone):
-    pattern = r'^\d{10,11}$'
-    return re.match(pattern, phone) is not None
-
-# Hàm kiểm tra ngày sinh hợp lệ
-def is_valid_date(date_text):
-    try:
-        datetime.strptime(date_text, '%d-%m-%Y')
-        return True
-    except ValueError:
-        return False
-
-# Đăng ký người dùng
-def register_user():
-    username = entry_username.get()
-    password = entry_password.get()
-
-    if username and password:
-        try:
-            cursor.execute('INSERT INTO Users (Username, Password) VALUES (?, ?)', (username, password))
-            conn.commit()
-            messagebox.showinfo("Thành công", "Đăng ký thành công!")
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Lỗi", "Tên đăng nhập đã tồn tại.")
-    else:
-        messagebox.showerror("Lỗi", "Vui lòng nhập đầy đủ thông tin.")
-
-# Đăng nhập người dùng
-def login_user():
-    username = entry_username.get()
-    password = entry_password.get()
+# Mở ứng dụng chính sau khi đăng nhập
+def open_main_app(login_window):
+    login_window.destroy()
 
-    cursor.execute('SELECT * FROM Users WHERE Username = ? AND Password = ?', (username, password))
-    user = cursor.fetchone()
+    # Hàm dựng trang tổng quan; mỗi lần hiện lại chỉ các mục có bảng nguồn đã bị ghi mới được tính lại
+    def build_dashboard(content_frame):
+        shown = {}
 
-    if user:
-        messagebox.showinfo("Thành công", "Đăng nhập thành công!")
-        open_main_app()
-    else:
-        messagebox.showerror("Lỗi", "Sai tên đăng nhập hoặc mật khẩu.")
+        def refresh_dashboard():
+            today = date.today()
+            for name in DASHBOARD_SECTIONS:
+                load_dashboard_section(name, today, lambda rows, name=name: show_section(name, rows), failed)
 
-# Mở ứng dụng chính sau khi đăng nhập
-def open_main_app():
-    login_window.destroy()
+        # Khi có tiến trình khác ghi vào database thì tính lại ngay nếu đang xem trang tổng quan
+        def refresh_if_visible():
+            if views.current is build_dashboard:
+                refresh_dashboard()
 
-    # Hàm hiển thị trang sinh viên
-    def show_students():
-        on_button_click(btn_students)
-        clear_frame(content_frame)
+        def failed(e):
+            messagebox.showerror("Lỗi", f"Không thể tải số liệu tổng quan: {e}")
 
+        def show_section(name, rows):
+            if shown.get(name) is rows:
+                return
+            shown[name] = rows
+            if name == 'occupancy':
+                occupancy_tree.delete(*occupancy_tree.get_children())
+                for row in rows:
+                    rate = f"{row.Occupants * 100 / row.Beds:.1f}%" if row.Beds else ""
+                    occupancy_tree.insert('', tk.END, values=(row.BuildingName, row.Rooms, row.Beds, row.Occupants,
+                                                              rate, row.UnderMaintenance))
+            elif name == 'maintenance':
+                maintenance_tree.delete(*maintenance_tree.get_children())
+                for row in rows:
+                    maintenance_tree.insert('', tk.END, values=(row.UrgencyLevel, row.Pending, row.InProgress))
+            elif name == 'outstanding':
+                row = rows[0]
+                summary_labels['fines'].config(text=f"{row.UnpaidFines:,.0f}")
+                summary_labels['pending'].config(text=f"{row.PendingCharges:,.0f}")
+                summary_labels['debtors'].config(text=str(row.Debtors))
+            elif name == 'revenue':
+                row = rows[0]
+                summary_labels['revenue'].config(text=f"{row.Revenue:,.0f} ({row.Completed} khoản, {row.Pending} đang chờ)")
+            elif name == 'expiring':
+                row = rows[0]
+                summary_labels['expiring'].config(text=f"{row.Contracts} hợp đồng ({row.MonthlyRent:,.0f}/tháng)")
+
+        tk.Label(content_frame, text="Tổng quan", font=("Arial", 16, "bold"), bg="#ecf0f1").pack(pady=10)
+
+        summary_frame = tk.Frame(content_frame, bg="#ecf0f1")
+        summary_frame.pack(pady=5)
+        summary_labels = {}
+        for row_index, (name, text) in enumerate((
+                ('revenue', "Doanh thu tháng này:"),
+                ('pending', "Tiền chưa thanh toán:"),
+                ('fines', "Tiền phạt chưa nộp:"),
+                ('debtors', "Số sinh viên đang nợ:"),
+                ('expiring', f"Hết hạn trong {EXPIRING_DAYS} ngày:"))):
+            tk.Label(summary_frame, text=text, bg="#ecf0f1").grid(row=row_index, column=0, padx=10, pady=2, sticky="w")
+            summary_labels[name] = tk.Label(summary_frame, text="...", bg="#ecf0f1", font=("Arial", 10, "bold"))
+            summary_labels[name].grid(row=row_index, column=1, padx=10, pady=2, sticky="w")
+
+        tables_frame = tk.Frame(content_frame, bg="#ecf0f1")
+        tables_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        occupancy_frame = tk.LabelFrame(tables_frame, text="Tỉ lệ lấp đầy theo tòa nhà", bg="#ecf0f1")
+        occupancy_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
+        occupancy_columns = ("Tòa nhà", "Số phòng", "Số giường", "Đang ở", "Tỉ lệ", "Bảo trì")
+        occupancy_tree = ttk.Treeview(occupancy_frame, columns=occupancy_columns, show="headings", height=10)
+        for col in occupancy_columns:
+            occupancy_tree.heading(col, text=col)
+            occupancy_tree.column(col, anchor="w", width=80)
+        occupancy_tree.pack(fill=tk.BOTH, expand=True)
+
+        maintenance_frame = tk.LabelFrame(tables_frame, text="Yêu cầu bảo trì chưa xong", bg="#ecf0f1")
+        maintenance_frame.pack(side=tk.LEFT, fill=tk.BOTH, padx=5)
+        maintenance_columns = ("Mức độ", "Chờ xử lý", "Đang xử lý")
+        maintenance_tree = ttk.Treeview(maintenance_frame, columns=maintenance_columns, show="headings", height=10)
+        for col in maintenance_columns:
+            maintenance_tree.heading(col, text=col)
+            maintenance_tree.column(col, anchor="w", width=80)
+        maintenance_tree.pack(fill=tk.BOTH, expand=True)
+
+        external_write_listeners.append(refresh_if_visible)
+        refresh_dashboard()
+        return refresh_dashboard
+
+    # Hàm dựng trang sinh viên (chỉ chạy ở lần đầu mở trang)
+    def build_students(content_frame):
         def load_students():
-            for row in student_tree.get_children():
-                student_tree.delete(row)
-            cursor.execute('SELECT * FROM Students')
-            for student in cursor.fetchall():
-                student_tree.insert('', tk.END, values=student)
+            student_pager.reset()
 
         def search_students():
             search_term = entry_search.get()
-            for row in student_tree.get_children():
-                student_tree.delete(row)
-            cursor.execute('SELECT * FROM Students WHERE StudentID LIKE ? OR FirstName LIKE ? OR LastName LIKE ?', 
-                        ('%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%'))
-            for student in cursor.fetchall():
-                student_tree.insert('', tk.END, values=student)
+            student_pager.search(search_term)
 
         def add_student():
             first_name = entry_first_name.get()
@@ -303,20 +1173,19 @@ def open_main_app():
                 messagebox.showerror("Lỗi", "Ngày sinh không hợp lệ. Định dạng đúng là DD-MM-YYYY.")
                 return
 
+            if (admission_date and not is_valid_date(admission_date)) or (room_allocation_date and not is_valid_date(room_allocation_date)):
+                messagebox.showerror("Lỗi", "Ngày không hợp lệ. Định dạng đúng là DD-MM-YYYY.")
+                return
+
             if first_name and last_name and dob and email:
-                try:
-                    cursor.execute('''INSERT INTO Students (
-                        FirstName, LastName, DateOfBirth, Gender, ContactNumber, Email, Address, Nationality,
-                        ProgramOfStudy, ProfilePicture, EmergencyContactName, EmergencyContactNumber, AdmissionDate,
-                        RoomID, RoomAllocationDate
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                        (first_name, last_name, dob, gender, contact, email, address, nationality, program, profile_picture,
-                        emergency_name, emergency_contact, admission_date, room_id, room_allocation_date))
-                    conn.commit()
-                    load_students()
-                    messagebox.showinfo("Thành công", "Thêm sinh viên thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'FirstName': first_name, 'LastName': last_name, 'DateOfBirth': dob, 'Gender': gender,
+                    'ContactNumber': contact, 'Email': email, 'Address': address, 'Nationality': nationality,
+                    'ProgramOfStudy': program, 'ProfilePicture': profile_picture, 'EmergencyContactName': emergency_name,
+                    'EmergencyContactNumber': emergency_contact, 'AdmissionDate': admission_date, 'RoomID': room_id,
+                    'RoomAllocationDate': room_allocation_date,
+                }
+                student_pager.add_row(values, "Thêm sinh viên thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -355,20 +1224,19 @@ def open_main_app():
                 messagebox.showerror("Lỗi", "Ngày sinh không hợp lệ. Định dạng đúng là DD-MM-YYYY.")
                 return
 
+            if (admission_date and not is_valid_date(admission_date)) or (room_allocation_date and not is_valid_date(room_allocation_date)):
+                messagebox.showerror("Lỗi", "Ngày không hợp lệ. Định dạng đúng là DD-MM-YYYY.")
+                return
+
             if first_name and last_name and dob and email:
-                try:
-                    cursor.execute('''UPDATE Students SET
-                        FirstName = ?, LastName = ?, DateOfBirth = ?, Gender = ?, ContactNumber = ?, Email = ?, 
-                        Address = ?, Nationality = ?, ProgramOfStudy = ?, ProfilePicture = ?, EmergencyContactName = ?, 
-                        EmergencyContactNumber = ?, AdmissionDate = ?, RoomID = ?, RoomAllocationDate = ?
-                        WHERE StudentID = ?''', 
-                        (first_name, last_name, dob, gender, contact, email, address, nationality, program, profile_picture,
-                        emergency_name, emergency_contact, admission_date, room_id, room_allocation_date, student_id))
-                    conn.commit()
-                    load_students()
-                    messagebox.showinfo("Thành công", "Cập nhật sinh viên thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'FirstName': first_name, 'LastName': last_name, 'DateOfBirth': dob, 'Gender': gender,
+                    'ContactNumber': contact, 'Email': email, 'Address': address, 'Nationality': nationality,
+                    'ProgramOfStudy': program, 'ProfilePicture': profile_picture, 'EmergencyContactName': emergency_name,
+                    'EmergencyContactNumber': emergency_contact, 'AdmissionDate': admission_date, 'RoomID': room_id,
+                    'RoomAllocationDate': room_allocation_date,
+                }
+                student_pager.update_row(student_id, values, "Cập nhật sinh viên thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -381,15 +1249,42 @@ def open_main_app():
             student_id = student_tree.item(selected_item)['values'][0]
             confirm = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa sinh viên này?")
             if confirm:
-                try:
-                    cursor.execute('DELETE FROM Students WHERE StudentID = ?', (student_id,))
-                    conn.commit()
-                    load_students()
-                    messagebox.showinfo("Thành công", "Xóa sinh viên thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                student_pager.delete_row(student_id, "Xóa sinh viên thành công!")
+
+        # Nhập danh sách sinh viên từ file CSV/Excel trên luồng ghi, sau đó cho lưu báo cáo các dòng bị loại
+        def import_student_file():
+            from tkinter import filedialog
+            from dormitory.importer import import_students, write_reject_report
+
+            file_path = filedialog.askopenfilename(filetypes=[("Bảng tính", "*.csv *.xlsx"), ("CSV", "*.csv"), ("Excel", "*.xlsx")])
+            if not file_path:
+                return
+
+            def done(result):
+                inserted, rejects = result
+                query_cache.invalidate('Students')
+                load_students()
+                message = f"Đã thêm {inserted} sinh viên."
+                if not rejects:
+                    messagebox.showinfo("Thành công", message)
+                    return
+                if messagebox.askyesno("Nhập dữ liệu", f"{message}\n{len(rejects)} dòng bị loại. Lưu báo cáo các dòng bị loại?"):
+                    report_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")],
+                                                               initialfile="sinh_vien_bi_loai.csv")
+                    if report_path:
+                        try:
+                            write_reject_report(report_path, rejects)
+                        except OSError as e:
+                            messagebox.showerror("Lỗi", f"Không thể lưu báo cáo: {e}")
+
+            def failed(e):
+                messagebox.showerror("Lỗi", f"Không thể nhập file: {e}")
+
+            executor.submit_write(lambda db: import_students(db, file_path), done, failed)
 
         def upload_picture():
+            from tkinter import filedialog
+
             file_path = filedialog.askopenfilename(filetypes=[("Image Files", "*.png;*.jpg;*.jpeg")])
             if file_path:
                 entry_profile_picture.delete(0, tk.END)
@@ -404,6 +1299,7 @@ def open_main_app():
         entry_search = tk.Entry(search_frame)
         entry_search.pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Tìm kiếm", command=search_students).pack(side=tk.LEFT, padx=5)
+        entry_search.bind('<KeyRelease>', lambda event: student_pager.search_as_you_type(entry_search.get()))
 
         form_frame = tk.Frame(content_frame)
         form_frame.pack(pady=10)
@@ -476,6 +1372,10 @@ def open_main_app():
         tk.Button(button_frame, text="Thêm sinh viên", bg="#8BC34A", fg="white", command=add_student).grid(row=0, column=0, padx=10)
         tk.Button(button_frame, text="Sửa thông tin", bg="#FFA500", fg="white", command=update_student).grid(row=0, column=1, padx=10)
         tk.Button(button_frame, text="Xóa sinh viên", bg="#FF6347", fg="white", command=delete_student).grid(row=0, column=2, padx=10)
+        tk.Button(button_frame, text="Nhập từ file", bg="#03A9F4", fg="white", command=import_student_file).grid(row=0, column=3, padx=10)
+        tk.Button(button_frame, text="Xuất dữ liệu", bg="#607D8B", fg="white", command=lambda: export_table(student_pager)).grid(row=0, column=4, padx=10)
+        tk.Button(button_frame, text="Xếp phòng hàng loạt", bg="#03A9F4", fg="white", command=lambda: batch_assign_rooms(load_students)).grid(row=0, column=5, padx=10)
+        tk.Button(button_frame, text="Lịch sử thay đổi", bg="#607D8B", fg="white", command=lambda: change_history_dialog(student_tree, 'Students')).grid(row=0, column=6, padx=10)
 
         column_mapping = {
             "StudentID": "Mã sinh viên",
@@ -496,35 +1396,37 @@ def open_main_app():
             "RoomAllocationDate": "Ngày phân phòng"
         }
 
-        student_tree = ttk.Treeview(content_frame, columns=list(column_mapping.keys()), show="headings")
-        student_tree.pack(pady=10, fill=tk.BOTH, expand=True)
+        tree_frame = tk.Frame(content_frame)
+        tree_frame.pack(pady=10, fill=tk.BOTH, expand=True)
+
+        student_tree = ttk.Treeview(tree_frame, columns=list(column_mapping.keys()), show="headings")
+        student_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        student_pager = PagedTable(student_tree, 'Students')
 
         for col in student_tree['columns']:
             student_tree.heading(col, text=column_mapping[col])
             student_tree.column(col, width=100)
 
         load_students()
+        return student_pager.refresh_if_stale
     
-    # Hàm hiển thị trang hợp đồng
-    def show_contracts():
-        on_button_click(btn_contracts)
-        clear_frame(content_frame)
-
+    # Hàm dựng trang hợp đồng (chỉ chạy ở lần đầu mở trang)
+    def build_contracts(content_frame):
         def load_contracts():
-            for row in contract_tree.get_children():
-                contract_tree.delete(row)
-            cursor.execute('SELECT * FROM Contracts')
-            for contract in cursor.fetchall():
-                contract_tree.insert('', tk.END, values=contract)
+            contract_pager.reset()
 
         def search_contracts():
             search_term = entry_search.get()
-            for row in contract_tree.get_children():
-                contract_tree.delete(row)
-            cursor.execute('SELECT * FROM Contracts WHERE ContractID LIKE ? OR StudentID LIKE ? OR StartDate LIKE ? OR EndDate LIKE ?', 
-                        ('%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%'))
-            for contract in cursor.fetchall():
-                contract_tree.insert('', tk.END, values=contract)
+            contract_pager.search(search_term)
+
+        # Lọc hợp đồng theo khoảng ngày kết thúc (dùng chỉ mục trên EndDate)
+        def filter_contracts(choice):
+            if choice == "Hết hạn trong 30 ngày":
+                today = date.today()
+                contract_pager.reset('EndDate BETWEEN ? AND ?', (today.isoformat(), (today + timedelta(days=30)).isoformat()),
+                                     order_columns=('EndDate', 'ContractID'))
+            else:
+                load_contracts()
 
         def add_contract():
             student_id = entry_student_id.get()
@@ -540,23 +1442,18 @@ def open_main_app():
             created_by_staff_id = entry_created_by_staff_id.get()
             last_updated_by_staff_id = entry_last_updated_by_staff_id.get()
 
-            if not is_valid_date(start_date) or not is_valid_date(end_date):
+            if not is_valid_date(start_date) or not is_valid_date(end_date) or (signed_date and not is_valid_date(signed_date)):
                 messagebox.showerror("Lỗi", "Ngày không hợp lệ. Định dạng đúng là DD-MM-YYYY.")
                 return
 
             if student_id and start_date and end_date and monthly_rent and security_deposit:
-                try:
-                    cursor.execute('''INSERT INTO Contracts (
-                        StudentID, StartDate, EndDate, ContractStatus, MonthlyRent, SecurityDeposit, TermsAndConditions,
-                        SignedDate, RenewalOption, Notes, CreatedByStaffID, LastUpdatedByStaffID
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                        (student_id, start_date, end_date, contract_status, monthly_rent, security_deposit, terms_and_conditions,
-                        signed_date, renewal_option, notes, created_by_staff_id, last_updated_by_staff_id))
-                    conn.commit()
-                    load_contracts()
-                    messagebox.showinfo("Thành công", "Thêm hợp đồng thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'StudentID': student_id, 'StartDate': start_date, 'EndDate': end_date, 'ContractStatus': contract_status,
+                    'MonthlyRent': monthly_rent, 'SecurityDeposit': security_deposit, 'TermsAndConditions': terms_and_conditions,
+                    'SignedDate': signed_date, 'RenewalOption': renewal_option, 'Notes': notes,
+                    'CreatedByStaffID': created_by_staff_id, 'LastUpdatedByStaffID': last_updated_by_staff_id,
+                }
+                contract_pager.add_row(values, "Thêm hợp đồng thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -580,23 +1477,18 @@ def open_main_app():
             created_by_staff_id = entry_created_by_staff_id.get()
             last_updated_by_staff_id = entry_last_updated_by_staff_id.get()
 
-            if not is_valid_date(start_date) or not is_valid_date(end_date):
+            if not is_valid_date(start_date) or not is_valid_date(end_date) or (signed_date and not is_valid_date(signed_date)):
                 messagebox.showerror("Lỗi", "Ngày không hợp lệ. Định dạng đúng là DD-MM-YYYY.")
                 return
 
             if student_id and start_date and end_date and monthly_rent and security_deposit:
-                try:
-                    cursor.execute('''UPDATE Contracts SET
-                        StudentID = ?, StartDate = ?, EndDate = ?, ContractStatus = ?, MonthlyRent = ?, SecurityDeposit = ?,
-                        TermsAndConditions = ?, SignedDate = ?, RenewalOption = ?, Notes = ?, CreatedByStaffID = ?, LastUpdatedByStaffID = ?
-                        WHERE ContractID = ?''',
-                        (student_id, start_date, end_date, contract_status, monthly_rent, security_deposit, terms_and_conditions,
-                        signed_date, renewal_option, notes, created_by_staff_id, last_updated_by_staff_id, contract_id))
-                    conn.commit()
-                    load_contracts()
-                    messagebox.showinfo("Thành công", "Cập nhật hợp đồng thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'StudentID': student_id, 'StartDate': start_date, 'EndDate': end_date, 'ContractStatus': contract_status,
+                    'MonthlyRent': monthly_rent, 'SecurityDeposit': security_deposit, 'TermsAndConditions': terms_and_conditions,
+                    'SignedDate': signed_date, 'RenewalOption': renewal_option, 'Notes': notes,
+                    'CreatedByStaffID': created_by_staff_id, 'LastUpdatedByStaffID': last_updated_by_staff_id,
+                }
+                contract_pager.update_row(contract_id, values, "Cập nhật hợp đồng thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -609,13 +1501,7 @@ def open_main_app():
             contract_id = contract_tree.item(selected_item)['values'][0]
             confirm = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa hợp đồng này?")
             if confirm:
-                try:
-                    cursor.execute('DELETE FROM Contracts WHERE ContractID = ?', (contract_id,))
-                    conn.commit()
-                    load_contracts()
-                    messagebox.showinfo("Thành công", "Xóa hợp đồng thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                contract_pager.delete_row(contract_id, "Xóa hợp đồng thành công!")
 
         tk.Label(content_frame, text="Quản lý hợp đồng", font=("Helvetica", 16), bg="#f0f0f0").pack(pady=10)
 
@@ -626,6 +1512,11 @@ def open_main_app():
         entry_search = tk.Entry(search_frame)
         entry_search.pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Tìm kiếm", command=search_contracts).pack(side=tk.LEFT, padx=5)
+        entry_search.bind('<KeyRelease>', lambda event: contract_pager.search_as_you_type(entry_search.get()))
+
+        filter_var = tk.StringVar()
+        filter_var.set("Tất cả")
+        tk.OptionMenu(search_frame, filter_var, "Tất cả", "Hết hạn trong 30 ngày", command=filter_contracts).pack(side=tk.LEFT, padx=5)
 
         form_frame = tk.Frame(content_frame, bg="#f0f0f0")
         form_frame.pack(pady=10)
@@ -691,6 +1582,7 @@ def open_main_app():
         tk.Button(button_frame, text="Tạo hợp đồng", bg="#8BC34A", fg="white", command=add_contract).grid(row=0, column=0, padx=10)
         tk.Button(button_frame, text="Sửa hợp đồng", bg="#FFA500", fg="white", command=update_contract).grid(row=0, column=1, padx=10)
         tk.Button(button_frame, text="Xóa hợp đồng", bg="#FF6347", fg="white", command=delete_contract).grid(row=0, column=2, padx=10)
+        tk.Button(button_frame, text="Xuất dữ liệu", bg="#607D8B", fg="white", command=lambda: export_table(contract_pager)).grid(row=0, column=3, padx=10)
 
         # Từ điển ánh xạ các tiêu đề cột từ tiếng Anh sang tiếng Việt
         column_mapping = {
@@ -711,64 +1603,66 @@ def open_main_app():
             "LastUpdatedAt": "Ngày cập nhật"
         }
 
-        contract_tree = ttk.Treeview(content_frame, columns=list(column_mapping.keys()), show="headings")
-        contract_tree.pack(fill=tk.BOTH, expand=True)
+        tree_frame = tk.Frame(content_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        contract_tree = ttk.Treeview(tree_frame, columns=list(column_mapping.keys()), show="headings")
+        contract_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        contract_pager = PagedTable(contract_tree, 'Contracts')
 
         for col in contract_tree["columns"]:
             contract_tree.heading(col, text=column_mapping[col])
             contract_tree.column(col, anchor="w", width=100, stretch=tk.YES)
 
         load_contracts()
+        return contract_pager.refresh_if_stale
     
-    # Hàm hiển thị trang nhân viên
-    def show_staff():
-        on_button_click(btn_staff)
-        clear_frame(content_frame)
-
+    # Hàm dựng trang nhân viên (chỉ chạy ở lần đầu mở trang)
+    def build_staff(content_frame):
         def load_staff():
-            for row in staff_tree.get_children():
-                staff_tree.delete(row)
-            cursor.execute('SELECT * FROM Staff')
-            for staff in cursor.fetchall():
-                staff_tree.insert('', tk.END, values=staff)
+            staff_pager.reset()
 
         def search_staff():
             search_term = entry_search.get()
-            for row in staff_tree.get_children():
-                staff_tree.delete(row)
-            cursor.execute('SELECT * FROM Staff WHERE StaffID LIKE ? OR Name LIKE ? OR Position LIKE ? OR Department LIKE ? OR Phone LIKE ?', 
-                        ('%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%'))
-            for staff in cursor.fetchall():
-                staff_tree.insert('', tk.END, values=staff)
+            staff_pager.search(search_term)
 
-        def add_staff():
-            staff_id = entry_staff_id.get()
-            name = entry_name.get()
-            position = entry_position.get()
-            department = entry_department.get()
-            phone = entry_phone.get()
+        # Đọc và kiểm tra dữ liệu trên form; trả về None nếu dữ liệu không hợp lệ
+        def staff_form_values():
+            first_name = entry_first_name.get()
+            last_name = entry_last_name.get()
+            role = role_var.get()
+            contact = entry_contact.get()
             email = entry_email.get()
-            address = entry_address.get()
             hire_date = entry_hire_date.get()
+            shift_hours = entry_shift_hours.get()
+            salary = entry_salary.get()
             notes = entry_notes.get()
 
+            if not (first_name and last_name and role and email):
+                messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
+                return None
+
+            if not is_valid_email(email):
+                messagebox.showerror("Lỗi", "Email không hợp lệ.")
+                return None
+
+            if contact and not is_valid_phone(contact):
+                messagebox.showerror("Lỗi", "Số điện thoại không hợp lệ.")
+                return None
+
             if not is_valid_date(hire_date):
                 messagebox.showerror("Lỗi", "Ngày không hợp lệ. Định dạng đúng là DD-MM-YYYY.")
-                return
+                return None
 
-            if staff_id and name and position and department and phone:
-                try:
-                    cursor.execute('''INSERT INTO Staff (
-                        StaffID, Name, Position, Department, Phone, Email, Address, HireDate, Notes
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                        (staff_id, name, position, department, phone, email, address, hire_date, notes))
-                    conn.commit()
-                    load_staff()
-                    messagebox.showinfo("Thành công", "Thêm nhân viên thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
-            else:
-                messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
+            return {
+                'FirstName': first_name, 'LastName': last_name, 'Role': role, 'ContactNumber': contact,
+                'Email': email, 'HireDate': hire_date, 'ShiftHours': shift_hours, 'Salary': salary or 0, 'Notes': notes,
+            }
+
+        def add_staff():
+            values = staff_form_values()
+            if values:
+                staff_pager.add_row(values, "Thêm nhân viên thành công!")
 
         def update_staff():
             selected_item = staff_tree.selection()
@@ -777,32 +1671,9 @@ def open_main_app():
                 return
 
             staff_id = staff_tree.item(selected_item)['values'][0]
-            name = entry_name.get()
-            position = entry_position.get()
-            department = entry_department.get()
-            phone = entry_phone.get()
-            email = entry_email.get()
-            address = entry_address.get()
-            hire_date = entry_hire_date.get()
-            notes = entry_notes.get()
-
-            if not is_valid_date(hire_date):
-                messagebox.showerror("Lỗi", "Ngày không hợp lệ. Định dạng đúng là DD-MM-YYYY.")
-                return
-
-            if staff_id and name and position and department and phone:
-                try:
-                    cursor.execute('''UPDATE Staff SET
-                        Name = ?, Position = ?, Department = ?, Phone = ?, Email = ?, Address = ?, HireDate = ?, Notes = ?
-                        WHERE StaffID = ?''',
-                        (name, position, department, phone, email, address, hire_date, notes, staff_id))
-                    conn.commit()
-                    load_staff()
-                    messagebox.showinfo("Thành công", "Cập nhật nhân viên thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
-            else:
-                messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
+            values = staff_form_values()
+            if values:
+                staff_pager.update_row(staff_id, values, "Cập nhật nhân viên thành công!")
 
         def delete_staff():
             selected_item = staff_tree.selection()
@@ -813,13 +1684,7 @@ def open_main_app():
             staff_id = staff_tree.item(selected_item)['values'][0]
             confirm = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa nhân viên này?")
             if confirm:
-                try:
-                    cursor.execute('DELETE FROM Staff WHERE StaffID = ?', (staff_id,))
-                    conn.commit()
-                    load_staff()
-                    messagebox.showinfo("Thành công", "Xóa nhân viên thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                staff_pager.delete_row(staff_id, "Xóa nhân viên thành công!")
 
         tk.Label(content_frame, text="Quản lý nhân viên", font=("Helvetica", 16), bg="#f0f0f0").pack(pady=10)
 
@@ -830,43 +1695,45 @@ def open_main_app():
         entry_search = tk.Entry(search_frame)
         entry_search.pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Tìm kiếm", command=search_staff).pack(side=tk.LEFT, padx=5)
+        entry_search.bind('<KeyRelease>', lambda event: staff_pager.search_as_you_type(entry_search.get()))
 
         form_frame = tk.Frame(content_frame, bg="#f0f0f0")
         form_frame.pack(pady=10)
 
         # Cột 1
-        tk.Label(form_frame, text="Mã nhân viên:").grid(row=0, column=0, padx=5, pady=10)
-        entry_staff_id = tk.Entry(form_frame)
-        entry_staff_id.grid(row=0, column=1, padx=5, pady=10)
+        tk.Label(form_frame, text="Họ:").grid(row=0, column=0, padx=5, pady=10)
+        entry_first_name = tk.Entry(form_frame)
+        entry_first_name.grid(row=0, column=1, padx=5, pady=10)
 
         tk.Label(form_frame, text="Tên:").grid(row=1, column=0, padx=5, pady=10)
-        entry_name = tk.Entry(form_frame)
-        entry_name.grid(row=1, column=1, padx=5, pady=10)
+        entry_last_name = tk.Entry(form_frame)
+        entry_last_name.grid(row=1, column=1, padx=5, pady=10)
 
         tk.Label(form_frame, text="Chức vụ:").grid(row=2, column=0, padx=5, pady=10)
-        entry_position = tk.Entry(form_frame)
-        entry_position.grid(row=2, column=1, padx=5, pady=10)
+        role_var = tk.StringVar()
+        role_var.set("Admin")
+        tk.OptionMenu(form_frame, role_var, "Admin", "Maintenance", "Cleaner", "Security").grid(row=2, column=1, padx=5, pady=10)
 
-        tk.Label(form_frame, text="Phòng ban:").grid(row=3, column=0, padx=5, pady=10)
-        entry_department = tk.Entry(form_frame)
-        entry_department.grid(row=3, column=1, padx=5, pady=10)
+        tk.Label(form_frame, text="Số điện thoại:").grid(row=3, column=0, padx=5, pady=10)
+        entry_contact = tk.Entry(form_frame)
+        entry_contact.grid(row=3, column=1, padx=5, pady=10)
 
-        tk.Label(form_frame, text="Số điện thoại:").grid(row=4, column=0, padx=5, pady=10)
-        entry_phone = tk.Entry(form_frame)
-        entry_phone.grid(row=4, column=1, padx=5, pady=10)
+        tk.Label(form_frame, text="Email:").grid(row=4, column=0, padx=5, pady=10)
+        entry_email = tk.Entry(form_frame)
+        entry_email.grid(row=4, column=1, padx=5, pady=10)
 
         # Cột 2
-        tk.Label(form_frame, text="Email:").grid(row=0, column=2, padx=(30, 10), pady=10)
-        entry_email = tk.Entry(form_frame)
-        entry_email.grid(row=0, column=3, padx=5, pady=10)
+        tk.Label(form_frame, text="Ngày thuê (DD-MM-YYYY):").grid(row=0, column=2, padx=(30, 10), pady=10)
+        entry_hire_date = tk.Entry(form_frame)
+        entry_hire_date.grid(row=0, column=3, padx=5, pady=10)
 
-        tk.Label(form_frame, text="Địa chỉ:").grid(row=1, column=2, padx=(30, 10), pady=10)
-        entry_address = tk.Entry(form_frame)
-        entry_address.grid(row=1, column=3, padx=5, pady=10)
+        tk.Label(form_frame, text="Ca làm việc:").grid(row=1, column=2, padx=(30, 10), pady=10)
+        entry_shift_hours = tk.Entry(form_frame)
+        entry_shift_hours.grid(row=1, column=3, padx=5, pady=10)
 
-        tk.Label(form_frame, text="Ngày thuê (DD-MM-YYYY):").grid(row=2, column=2, padx=(30, 10), pady=10)
-        entry_hire_date = tk.Entry(form_frame)
-        entry_hire_date.grid(row=2, column=3, padx=5, pady=10)
+        tk.Label(form_frame, text="Lương:").grid(row=2, column=2, padx=(30, 10), pady=10)
+        entry_salary = tk.Entry(form_frame)
+        entry_salary.grid(row=2, column=3, padx=5, pady=10)
 
         tk.Label(form_frame, text="Ghi chú:").grid(row=3, column=2, padx=(30, 10), pady=10)
         entry_notes = tk.Entry(form_frame)
@@ -879,57 +1746,49 @@ def open_main_app():
         tk.Button(button_frame, text="Thêm nhân viên", bg="#8BC34A", fg="white", command=add_staff).grid(row=0, column=0, padx=10)
         tk.Button(button_frame, text="Sửa nhân viên", bg="#FFA500", fg="white", command=update_staff).grid(row=0, column=1, padx=10)
         tk.Button(button_frame, text="Xóa nhân viên", bg="#FF6347", fg="white", command=delete_staff).grid(row=0, column=2, padx=10)
+        tk.Button(button_frame, text="Xuất dữ liệu", bg="#607D8B", fg="white", command=lambda: export_table(staff_pager)).grid(row=0, column=3, padx=10)
 
         # Từ điển ánh xạ các tiêu đề cột từ tiếng Anh sang tiếng Việt
         column_mapping = {
             "StaffID": "Mã nhân viên",
-            "Name": "Tên",
-            "Position": "Chức vụ",
-            "Department": "Phòng ban",
-            "Phone": "Số điện thoại",
+            "FirstName": "Họ",
+            "LastName": "Tên",
+            "Role": "Chức vụ",
+            "ContactNumber": "Số điện thoại",
             "Email": "Email",
-            "Address": "Địa chỉ",
             "HireDate": "Ngày thuê",
+            "ShiftHours": "Ca làm việc",
+            "Salary": "Lương",
             "Notes": "Ghi chú"
         }
 
-        staff_tree = ttk.Treeview(content_frame, columns=list(column_mapping.keys()), show="headings")
-        staff_tree.pack(fill=tk.BOTH, expand=True)
+        tree_frame = tk.Frame(content_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        staff_tree = ttk.Treeview(tree_frame, columns=list(column_mapping.keys()), show="headings")
+        staff_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        staff_pager = PagedTable(staff_tree, 'Staff')
 
         for col in staff_tree["columns"]:
             staff_tree.heading(col, text=column_mapping[col])
             staff_tree.column(col, anchor="w", width=100, stretch=tk.YES)
 
         load_staff()
+        return staff_pager.refresh_if_stale
     
-    # Hàm hiển thị trang phòng ở
-    def show_room():
-        on_button_click(btn_room)
-        clear_frame(content_frame)
-
+    # Hàm dựng trang phòng ở (chỉ chạy ở lần đầu mở trang)
+    def build_room(content_frame):
         def load_rooms():
-            for row in room_tree.get_children():
-                room_tree.delete(row)
-            cursor.execute('SELECT * FROM Rooms')
-            for room in cursor.fetchall():
-                room_tree.insert('', tk.END, values=room)
+            room_pager.reset()
 
         def search_rooms():
             search_term = entry_search.get()
-            for row in room_tree.get_children():
-                room_tree.delete(row)
-            cursor.execute('''SELECT * FROM Rooms WHERE RoomNumber LIKE ? OR Type LIKE ? OR Capacity LIKE ? OR CurrentOccupants LIKE ? 
-                            OR Status LIKE ? OR FloorNumber LIKE ? OR BuildingName LIKE ? OR Amenities LIKE ?''', 
-                        ('%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', 
-                            '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%'))
-            for room in cursor.fetchall():
-                room_tree.insert('', tk.END, values=room)
+            room_pager.search(search_term)
 
         def add_room():
             room_number = entry_room_number.get()
             room_type = room_type_var.get()
             capacity = entry_capacity.get()
-            current_occupants = entry_current_occupants.get()
             status = status_var.get()
             floor_number = entry_floor_number.get()
             building_name = entry_building_name.get()
@@ -937,16 +1796,11 @@ def open_main_app():
             notes = entry_notes.get()
 
             if room_number and room_type and capacity and floor_number and building_name:
-                try:
-                    cursor.execute('''INSERT INTO Rooms (
-                        RoomNumber, Type, Capacity, CurrentOccupants, Status, FloorNumber, BuildingName, Amenities, Notes
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                        (room_number, room_type, capacity, current_occupants, status, floor_number, building_name, amenities, notes))
-                    conn.commit()
-                    load_rooms()
-                    messagebox.showinfo("Thành công", "Thêm phòng thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'RoomNumber': room_number, 'Type': room_type, 'Capacity': capacity, 'Status': status,
+                    'FloorNumber': floor_number, 'BuildingName': building_name, 'Amenities': amenities, 'Notes': notes,
+                }
+                room_pager.add_row(values, "Thêm phòng thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -960,7 +1814,6 @@ def open_main_app():
             room_number = entry_room_number.get()
             room_type = room_type_var.get()
             capacity = entry_capacity.get()
-            current_occupants = entry_current_occupants.get()
             status = status_var.get()
             floor_number = entry_floor_number.get()
             building_name = entry_building_name.get()
@@ -968,16 +1821,11 @@ def open_main_app():
             notes = entry_notes.get()
 
             if room_number and room_type and capacity and floor_number and building_name:
-                try:
-                    cursor.execute('''UPDATE Rooms SET
-                        RoomNumber = ?, Type = ?, Capacity = ?, CurrentOccupants = ?, Status = ?, FloorNumber = ?, BuildingName = ?, Amenities = ?, Notes = ?
-                        WHERE RoomID = ?''',
-                        (room_number, room_type, capacity, current_occupants, status, floor_number, building_name, amenities, notes, room_id))
-                    conn.commit()
-                    load_rooms()
-                    messagebox.showinfo("Thành công", "Cập nhật phòng thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'RoomNumber': room_number, 'Type': room_type, 'Capacity': capacity, 'Status': status,
+                    'FloorNumber': floor_number, 'BuildingName': building_name, 'Amenities': amenities, 'Notes': notes,
+                }
+                room_pager.update_row(room_id, values, "Cập nhật phòng thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -990,13 +1838,7 @@ def open_main_app():
             room_id = room_tree.item(selected_item)['values'][0]
             confirm = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa phòng này?")
             if confirm:
-                try:
-                    cursor.execute('DELETE FROM Rooms WHERE RoomID = ?', (room_id,))
-                    conn.commit()
-                    load_rooms()
-                    messagebox.showinfo("Thành công", "Xóa phòng thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                room_pager.delete_row(room_id, "Xóa phòng thành công!")
 
         tk.Label(content_frame, text="Quản lý phòng ở", font=("Helvetica", 16), bg="#f0f0f0").pack(pady=10)
 
@@ -1007,6 +1849,7 @@ def open_main_app():
         entry_search = tk.Entry(search_frame)
         entry_search.pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Tìm kiếm", command=search_rooms).pack(side=tk.LEFT, padx=5)
+        entry_search.bind('<KeyRelease>', lambda event: room_pager.search_as_you_type(entry_search.get()))
 
         form_frame = tk.Frame(content_frame, bg="#f0f0f0")
         form_frame.pack(pady=10)
@@ -1025,14 +1868,12 @@ def open_main_app():
         entry_capacity = tk.Entry(form_frame)
         entry_capacity.grid(row=2, column=1, padx=5, pady=10)
 
-        tk.Label(form_frame, text="Số người hiện tại:").grid(row=3, column=0, padx=5, pady=10)
-        entry_current_occupants = tk.Entry(form_frame)
-        entry_current_occupants.grid(row=3, column=1, padx=5, pady=10)
-
-        tk.Label(form_frame, text="Trạng thái:").grid(row=4, column=0, padx=5, pady=10)
+        # Số người hiện tại và trạng thái Occupied được database tính từ danh sách sinh viên trong phòng,
+        # người dùng chỉ chọn phòng có đang bảo trì hay không
+        tk.Label(form_frame, text="Trạng thái:").grid(row=3, column=0, padx=5, pady=10)
         status_var = tk.StringVar()
         status_var.set("Available")
-        tk.OptionMenu(form_frame, status_var, "Available", "Occupied", "Under Maintenance").grid(row=4, column=1, padx=5, pady=10)
+        tk.OptionMenu(form_frame, status_var, "Available", "Under Maintenance").grid(row=3, column=1, padx=5, pady=10)
 
         # Cột 2
         tk.Label(form_frame, text="Số tầng:").grid(row=0, column=2, padx=(30, 10), pady=10)
@@ -1058,6 +1899,8 @@ def open_main_app():
         tk.Button(button_frame, text="Thêm phòng", bg="#8BC34A", fg="white", command=add_room).grid(row=0, column=0, padx=10)
         tk.Button(button_frame, text="Sửa thông tin", bg="#FFA500", fg="white", command=update_room).grid(row=0, column=1, padx=10)
         tk.Button(button_frame, text="Xóa phòng", bg="#FF6347", fg="white", command=delete_room).grid(row=0, column=2, padx=10)
+        tk.Button(button_frame, text="Xuất dữ liệu", bg="#607D8B", fg="white", command=lambda: export_table(room_pager)).grid(row=0, column=3, padx=10)
+        tk.Button(button_frame, text="Lịch sử thay đổi", bg="#607D8B", fg="white", command=lambda: change_history_dialog(room_tree, 'Rooms')).grid(row=0, column=4, padx=10)
 
         # Từ điển ánh xạ các tiêu đề cột từ tiếng Anh sang tiếng Việt
         column_mapping = {
@@ -1073,35 +1916,28 @@ def open_main_app():
             "Notes": "Ghi chú"
         }
 
-        room_tree = ttk.Treeview(content_frame, columns=list(column_mapping.keys()), show="headings")
-        room_tree.pack(fill=tk.BOTH, expand=True)
+        tree_frame = tk.Frame(content_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        room_tree = ttk.Treeview(tree_frame, columns=list(column_mapping.keys()), show="headings")
+        room_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        room_pager = PagedTable(room_tree, 'Rooms')
 
         for col in room_tree["columns"]:
             room_tree.heading(col, text=column_mapping[col])
             room_tree.column(col, anchor="w", width=100, stretch=tk.YES)
 
         load_rooms()
+        return room_pager.refresh_if_stale
 
-    # Hàm hiển thị trang lịch sử phân phòng
-    def show_room_allocation_history():
-        on_button_click(btn_room_allocation_history)
-        clear_frame(content_frame)
-
+    # Hàm dựng trang lịch sử phân phòng (chỉ chạy ở lần đầu mở trang)
+    def build_room_allocation_history(content_frame):
         def load_room_allocations():
-            for row in allocation_tree.get_children():
-                allocation_tree.delete(row)
-            cursor.execute('SELECT * FROM RoomAllocationHistory')
-            for allocation in cursor.fetchall():
-                allocation_tree.insert('', tk.END, values=allocation)
+            allocation_pager.reset()
 
         def search_allocations():
             search_term = entry_search.get()
-            for row in allocation_tree.get_children():
-                allocation_tree.delete(row)
-            cursor.execute('''SELECT * FROM RoomAllocationHistory WHERE StudentID LIKE ? OR RoomID LIKE ? OR AllocationDate LIKE ? OR ReleaseDate LIKE ?''', 
-                        ('%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%'))
-            for allocation in cursor.fetchall():
-                allocation_tree.insert('', tk.END, values=allocation)
+            allocation_pager.search(search_term)
 
         def add_allocation():
             student_id = entry_student_id.get()
@@ -1115,16 +1951,11 @@ def open_main_app():
                 return
 
             if student_id and room_id and allocation_date:
-                try:
-                    cursor.execute('''INSERT INTO RoomAllocationHistory (
-                        StudentID, RoomID, AllocationDate, ReleaseDate, Notes
-                    ) VALUES (?, ?, ?, ?, ?)''',
-                        (student_id, room_id, allocation_date, release_date, notes))
-                    conn.commit()
-                    load_room_allocations()
-                    messagebox.showinfo("Thành công", "Thêm phân phòng thành công.")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Không thể thêm phân phòng: {e}")
+                values = {
+                    'StudentID': student_id, 'RoomID': room_id, 'AllocationDate': allocation_date,
+                    'ReleaseDate': release_date, 'Notes': notes,
+                }
+                allocation_pager.add_row(values, "Thêm phân phòng thành công.", "Không thể thêm phân phòng")
 
         def update_allocation():
             selected_item = allocation_tree.selection()
@@ -1144,16 +1975,11 @@ def open_main_app():
                 return
 
             if student_id and room_id and allocation_date:
-                try:
-                    cursor.execute('''UPDATE RoomAllocationHistory SET
-                        StudentID = ?, RoomID = ?, AllocationDate = ?, ReleaseDate = ?, Notes = ?
-                        WHERE AllocationID = ?''',
-                        (student_id, room_id, allocation_date, release_date, notes, allocation_id))
-                    conn.commit()
-                    load_room_allocations()
-                    messagebox.showinfo("Thành công", "Cập nhật phân phòng thành công.")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Không thể cập nhật phân phòng: {e}")
+                values = {
+                    'StudentID': student_id, 'RoomID': room_id, 'AllocationDate': allocation_date,
+                    'ReleaseDate': release_date, 'Notes': notes,
+                }
+                allocation_pager.update_row(allocation_id, values, "Cập nhật phân phòng thành công.", "Không thể cập nhật phân phòng")
 
         def delete_allocation():
             selected_item = allocation_tree.selection()
@@ -1164,13 +1990,12 @@ def open_main_app():
             allocation_id = allocation_tree.item(selected_item)['values'][0]
             confirm = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa phân phòng này?")
             if confirm:
-                try:
-                    cursor.execute('DELETE FROM RoomAllocationHistory WHERE AllocationID = ?', (allocation_id,))
-                    conn.commit()
-                    load_room_allocations()
-                    messagebox.showinfo("Thành công", "Xóa phân phòng thành công.")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Không thể xóa phân phòng: {e}")
+                allocation_pager.delete_row(allocation_id, "Xóa phân phòng thành công.", "Không thể xóa phân phòng")
+
+        # Điền mã phòng được chọn trong cửa sổ tìm giường trống vào form
+        def pick_room(room_id):
+            entry_room_id.delete(0, tk.END)
+            entry_room_id.insert(0, room_id)
 
         tk.Label(content_frame, text="Lịch sử phân phòng", font=("Helvetica", 16), bg="#f0f0f0").pack(pady=10)
 
@@ -1181,6 +2006,7 @@ def open_main_app():
         entry_search = tk.Entry(search_frame)
         entry_search.pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Tìm kiếm", command=search_allocations).pack(side=tk.LEFT, padx=5)
+        entry_search.bind('<KeyRelease>', lambda event: allocation_pager.search_as_you_type(entry_search.get()))
 
         form_frame = tk.Frame(content_frame, bg="#f0f0f0")
         form_frame.pack(pady=10)
@@ -1214,6 +2040,8 @@ def open_main_app():
         tk.Button(button_frame, text="Thêm phân phòng", bg="#8BC34A", fg="white", command=add_allocation).grid(row=0, column=0, padx=10)
         tk.Button(button_frame, text="Sửa thông tin", bg="#FFA500", fg="white", command=update_allocation).grid(row=0, column=1, padx=10)
         tk.Button(button_frame, text="Xóa phân phòng", bg="#FF6347", fg="white", command=delete_allocation).grid(row=0, column=2, padx=10)
+        tk.Button(button_frame, text="Xuất dữ liệu", bg="#607D8B", fg="white", command=lambda: export_table(allocation_pager)).grid(row=0, column=3, padx=10)
+        tk.Button(button_frame, text="Tìm giường trống", bg="#03A9F4", fg="white", command=lambda: find_free_bed(pick_room)).grid(row=0, column=4, padx=10)
 
         # Từ điển ánh xạ các tiêu đề cột từ tiếng Anh sang tiếng Việt
         column_mapping = {
@@ -1225,38 +2053,42 @@ def open_main_app():
             "Notes": "Ghi chú"
         }
 
-        allocation_tree = ttk.Treeview(content_frame, columns=list(column_mapping.keys()), show="headings")
-        allocation_tree.pack(fill=tk.BOTH, expand=True)
+        tree_frame = tk.Frame(content_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        allocation_tree = ttk.Treeview(tree_frame, columns=list(column_mapping.keys()), show="headings")
+        allocation_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        allocation_pager = PagedTable(allocation_tree, 'RoomAllocationHistory')
 
         for col in allocation_tree["columns"]:
             allocation_tree.heading(col, text=column_mapping[col])
             allocation_tree.column(col, anchor="w", width=100, stretch=tk.YES)
 
         load_room_allocations()
+        return allocation_pager.refresh_if_stale
     
     
-    # Hàm hiển thị trang hóa đơn
-    def show_payments():
-        on_button_click(btn_payments)
-        clear_frame(content_frame)
-
+    # Hàm dựng trang hóa đơn (chỉ chạy ở lần đầu mở trang)
+    def build_payments(content_frame):
         def load_payments():
-            for row in payment_tree.get_children():
-                payment_tree.delete(row)
-            cursor.execute('SELECT * FROM Payments')
-            for payment in cursor.fetchall():
-                payment_tree.insert('', tk.END, values=payment)
+            payment_pager.reset()
 
         def search_payments():
             search_term = entry_search.get()
-            for row in payment_tree.get_children():
-                payment_tree.delete(row)
-            cursor.execute('''SELECT * FROM Payments WHERE StudentID LIKE ? OR ContractID LIKE ? OR Amount LIKE ? OR LateFee LIKE ? 
-                            OR PaymentDate LIKE ? OR Purpose LIKE ? OR PaymentMethod LIKE ? OR PaymentStatus LIKE ? OR ReceiptNumber LIKE ?''', 
-                        ('%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', 
-                            '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%'))
-            for payment in cursor.fetchall():
-                payment_tree.insert('', tk.END, values=payment)
+            payment_pager.search(search_term)
+
+        # Lọc thanh toán theo khoảng ngày thanh toán (dùng chỉ mục trên PaymentDate)
+        def filter_payments(choice):
+            today = date.today()
+            if choice == "Tháng này":
+                start, end = month_range(today)
+            elif choice == "Tháng trước":
+                start, end = month_range(today.replace(day=1) - timedelta(days=1))
+            else:
+                load_payments()
+                return
+            payment_pager.reset('PaymentDate BETWEEN ? AND ?', (start.isoformat(), end.isoformat()),
+                                order_columns=('PaymentDate', 'PaymentID'))
 
         def add_payment():
             student_id = entry_student_id.get()
@@ -1274,16 +2106,12 @@ def open_main_app():
                 return
 
             if student_id and amount and purpose and payment_method:
-                try:
-                    cursor.execute('''INSERT INTO Payments (
-                        StudentID, ContractID, Amount, LateFee, PaymentDate, Purpose, PaymentMethod, PaymentStatus, ReceiptNumber
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                        (student_id, contract_id, amount, late_fee, payment_date, purpose, payment_method, payment_status, receipt_number))
-                    conn.commit()
-                    load_payments()
-                    messagebox.showinfo("Thành công", "Thêm thanh toán thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'StudentID': student_id, 'ContractID': contract_id, 'Amount': amount, 'LateFee': late_fee,
+                    'PaymentDate': payment_date, 'Purpose': purpose, 'PaymentMethod': payment_method,
+                    'PaymentStatus': payment_status, 'ReceiptNumber': receipt_number,
+                }
+                payment_pager.add_row(values, "Thêm thanh toán thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -1309,16 +2137,12 @@ def open_main_app():
                 return
 
             if student_id and amount and purpose and payment_method:
-                try:
-                    cursor.execute('''UPDATE Payments SET
-                        StudentID = ?, ContractID = ?, Amount = ?, LateFee = ?, PaymentDate = ?, Purpose = ?, PaymentMethod = ?, PaymentStatus = ?, ReceiptNumber = ?
-                        WHERE PaymentID = ?''',
-                        (student_id, contract_id, amount, late_fee, payment_date, purpose, payment_method, payment_status, receipt_number, payment_id))
-                    conn.commit()
-                    load_payments()
-                    messagebox.showinfo("Thành công", "Cập nhật thanh toán thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'StudentID': student_id, 'ContractID': contract_id, 'Amount': amount, 'LateFee': late_fee,
+                    'PaymentDate': payment_date, 'Purpose': purpose, 'PaymentMethod': payment_method,
+                    'PaymentStatus': payment_status, 'ReceiptNumber': receipt_number,
+                }
+                payment_pager.update_row(payment_id, values, "Cập nhật thanh toán thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -1331,13 +2155,7 @@ def open_main_app():
             payment_id = payment_tree.item(selected_item)['values'][0]
             confirm = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa thanh toán này?")
             if confirm:
-                try:
-                    cursor.execute('DELETE FROM Payments WHERE PaymentID = ?', (payment_id,))
-                    conn.commit()
-                    load_payments()
-                    messagebox.showinfo("Thành công", "Xóa thanh toán thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                payment_pager.delete_row(payment_id, "Xóa thanh toán thành công!")
 
         tk.Label(content_frame, text="Quản lý thanh toán", font=("Helvetica", 16), bg="#f0f0f0").pack(pady=10)
 
@@ -1348,6 +2166,11 @@ def open_main_app():
         entry_search = tk.Entry(search_frame)
         entry_search.pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Tìm kiếm", command=search_payments).pack(side=tk.LEFT, padx=5)
+        entry_search.bind('<KeyRelease>', lambda event: payment_pager.search_as_you_type(entry_search.get()))
+
+        filter_var = tk.StringVar()
+        filter_var.set("Tất cả")
+        tk.OptionMenu(search_frame, filter_var, "Tất cả", "Tháng này", "Tháng trước", command=filter_payments).pack(side=tk.LEFT, padx=5)
 
         form_frame = tk.Frame(content_frame, bg="#f0f0f0")
         form_frame.pack(pady=10)
@@ -1400,6 +2223,14 @@ def open_main_app():
         tk.Button(button_frame, text="Thêm thanh toán", bg="#8BC34A", fg="white", command=add_payment).grid(row=0, column=0, padx=10)
         tk.Button(button_frame, text="Sửa thanh toán", bg="#FFA500", fg="white", command=update_payment).grid(row=0, column=1, padx=10)
         tk.Button(button_frame, text="Xóa thanh toán", bg="#FF6347", fg="white", command=delete_payment).grid(row=0, column=2, padx=10)
+        tk.Button(button_frame, text="Xuất dữ liệu", bg="#607D8B", fg="white", command=lambda: export_table(payment_pager)).grid(row=0, column=3, padx=10)
+        tk.Button(button_frame, text="Lập hóa đơn tháng", bg="#03A9F4", fg="white", command=lambda: billing_dialog(load_payments)).grid(row=0, column=4, padx=10)
+        tk.Button(button_frame, text="Công nợ", bg="#03A9F4", fg="white", command=debtors_dialog).grid(row=0, column=5, padx=10)
+        bulk_fields = {
+            "PaymentStatus": ("Trạng thái", ("Pending", "Completed", "Failed")),
+            "PaymentMethod": ("Phương thức", ("Cash", "Card", "Bank Transfer")),
+        }
+        tk.Button(button_frame, text="Sửa hàng loạt", bg="#9C27B0", fg="white", command=lambda: bulk_edit_dialog(payment_pager, bulk_fields)).grid(row=0, column=6, padx=10)
 
         # Từ điển ánh xạ các tiêu đề cột từ tiếng Anh sang tiếng Việt
         column_mapping = {
@@ -1415,38 +2246,29 @@ def open_main_app():
             "ReceiptNumber": "Số biên lai"
         }
 
-        payment_tree = ttk.Treeview(content_frame, columns=list(column_mapping.keys()), show="headings")
-        payment_tree.pack(fill=tk.BOTH, expand=True)
+        tree_frame = tk.Frame(content_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        payment_tree = ttk.Treeview(tree_frame, columns=list(column_mapping.keys()), show="headings")
+        payment_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        payment_pager = PagedTable(payment_tree, 'Payments')
 
         for col in payment_tree["columns"]:
             payment_tree.heading(col, text=column_mapping[col])
             payment_tree.column(col, anchor="w", width=100, stretch=tk.YES)
 
         load_payments()
+        return payment_pager.refresh_if_stale
     
     
-    # Hàm hiển thị trang yêu cầu bảo trì
-    def show_maintenance_request():
-        on_button_click(btn_maintenance_request)
-        clear_frame(content_frame)
-
+    # Hàm dựng trang yêu cầu bảo trì (chỉ chạy ở lần đầu mở trang)
+    def build_maintenance_request(content_frame):
         def load_requests():
-            for row in request_tree.get_children():
-                request_tree.delete(row)
-            cursor.execute('SELECT * FROM MaintenanceRequests')
-            for request in cursor.fetchall():
-                request_tree.insert('', tk.END, values=request)
+            request_pager.reset()
 
         def search_requests():
             search_term = entry_search.get()
-            for row in request_tree.get_children():
-                request_tree.delete(row)
-            cursor.execute('''SELECT * FROM MaintenanceRequests WHERE StudentID LIKE ? OR Description LIKE ? OR UrgencyLevel LIKE ? 
-                            OR AssignedStaffID LIKE ? OR Status LIKE ? OR RequestDate LIKE ? OR CompletionDate LIKE ?''', 
-                        ('%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', 
-                            '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%'))
-            for request in cursor.fetchall():
-                request_tree.insert('', tk.END, values=request)
+            request_pager.search(search_term)
 
         def add_request():
             student_id = entry_student_id.get()
@@ -1463,16 +2285,12 @@ def open_main_app():
                 return
 
             if student_id and description and urgency_level and status:
-                try:
-                    cursor.execute('''INSERT INTO MaintenanceRequests (
-                        StudentID, Description, UrgencyLevel, AssignedStaffID, Status, RequestDate, CompletionDate, Notes
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                        (student_id, description, urgency_level, assigned_staff_id, status, request_date, completion_date, notes))
-                    conn.commit()
-                    load_requests()
-                    messagebox.showinfo("Thành công", "Thêm yêu cầu bảo trì thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'StudentID': student_id, 'Description': description, 'UrgencyLevel': urgency_level,
+                    'AssignedStaffID': assigned_staff_id, 'Status': status, 'RequestDate': request_date,
+                    'CompletionDate': completion_date, 'Notes': notes,
+                }
+                request_pager.add_row(values, "Thêm yêu cầu bảo trì thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -1497,16 +2315,12 @@ def open_main_app():
                 return
 
             if student_id and description and urgency_level and status:
-                try:
-                    cursor.execute('''UPDATE MaintenanceRequests SET
-                        StudentID = ?, Description = ?, UrgencyLevel = ?, AssignedStaffID = ?, Status = ?, RequestDate = ?, CompletionDate = ?, Notes = ?
-                        WHERE RequestID = ?''',
-                        (student_id, description, urgency_level, assigned_staff_id, status, request_date, completion_date, notes, request_id))
-                    conn.commit()
-                    load_requests()
-                    messagebox.showinfo("Thành công", "Cập nhật yêu cầu bảo trì thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'StudentID': student_id, 'Description': description, 'UrgencyLevel': urgency_level,
+                    'AssignedStaffID': assigned_staff_id, 'Status': status, 'RequestDate': request_date,
+                    'CompletionDate': completion_date, 'Notes': notes,
+                }
+                request_pager.update_row(request_id, values, "Cập nhật yêu cầu bảo trì thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -1519,13 +2333,7 @@ def open_main_app():
             request_id = request_tree.item(selected_item)['values'][0]
             confirm = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa yêu cầu này?")
             if confirm:
-                try:
-                    cursor.execute('DELETE FROM MaintenanceRequests WHERE RequestID = ?', (request_id,))
-                    conn.commit()
-                    load_requests()
-                    messagebox.showinfo("Thành công", "Xóa yêu cầu bảo trì thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                request_pager.delete_row(request_id, "Xóa yêu cầu bảo trì thành công!")
 
         tk.Label(content_frame, text="Quản lý yêu cầu bảo trì", font=("Helvetica", 16), bg="#f0f0f0").pack(pady=10)
 
@@ -1536,6 +2344,7 @@ def open_main_app():
         entry_search = tk.Entry(search_frame)
         entry_search.pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Tìm kiếm", command=search_requests).pack(side=tk.LEFT, padx=5)
+        entry_search.bind('<KeyRelease>', lambda event: request_pager.search_as_you_type(entry_search.get()))
 
         form_frame = tk.Frame(content_frame, bg="#f0f0f0")
         form_frame.pack(pady=10)
@@ -1583,6 +2392,15 @@ def open_main_app():
         tk.Button(button_frame, text="Thêm yêu cầu", bg="#8BC34A", fg="white", command=add_request).grid(row=0, column=0, padx=10)
         tk.Button(button_frame, text="Sửa yêu cầu", bg="#FFA500", fg="white", command=update_request).grid(row=0, column=1, padx=10)
         tk.Button(button_frame, text="Xóa yêu cầu", bg="#FF6347", fg="white", command=delete_request).grid(row=0, column=2, padx=10)
+        tk.Button(button_frame, text="Xuất dữ liệu", bg="#607D8B", fg="white", command=lambda: export_table(request_pager)).grid(row=0, column=3, padx=10)
+        bulk_fields = {
+            "Status": ("Trạng thái", ("Pending", "In Progress", "Completed")),
+            "UrgencyLevel": ("Mức độ khẩn cấp", ("Low", "Medium", "High")),
+            "AssignedStaffID": ("Mã nhân viên được giao", None),
+            "CompletionDate": ("Ngày hoàn thành", None),
+            "Notes": ("Ghi chú", None),
+        }
+        tk.Button(button_frame, text="Sửa hàng loạt", bg="#9C27B0", fg="white", command=lambda: bulk_edit_dialog(request_pager, bulk_fields)).grid(row=0, column=4, padx=10)
 
         # Từ điển ánh xạ các tiêu đề cột từ tiếng Anh sang tiếng Việt
         column_mapping = {
@@ -1597,36 +2415,29 @@ def open_main_app():
             "Notes": "Ghi chú"
         }
 
-        request_tree = ttk.Treeview(content_frame, columns=list(column_mapping.keys()), show="headings")
-        request_tree.pack(fill=tk.BOTH, expand=True)
+        tree_frame = tk.Frame(content_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        request_tree = ttk.Treeview(tree_frame, columns=list(column_mapping.keys()), show="headings")
+        request_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        request_pager = PagedTable(request_tree, 'MaintenanceRequests')
 
         for col in request_tree["columns"]:
             request_tree.heading(col, text=column_mapping[col])
             request_tree.column(col, anchor="w", width=100, stretch=tk.YES)
 
         load_requests()
+        return request_pager.refresh_if_stale
 
     
-    # Hàm hiển thị trang kho đồ
-    def show_inventory():
-        on_button_click(btn_inventory)
-        clear_frame(content_frame)
-
+    # Hàm dựng trang kho đồ (chỉ chạy ở lần đầu mở trang)
+    def build_inventory(content_frame):
         def load_inventory():
-            for row in inventory_tree.get_children():
-                inventory_tree.delete(row)
-            cursor.execute('SELECT * FROM Inventory')
-            for item in cursor.fetchall():
-                inventory_tree.insert('', tk.END, values=item)
+            inventory_pager.reset()
 
         def search_inventory():
             search_term = entry_search.get()
-            for row in inventory_tree.get_children():
-                inventory_tree.delete(row)
-            cursor.execute('''SELECT * FROM Inventory WHERE ItemName LIKE ? OR Quantity LIKE ? OR Location LIKE ? OR Status LIKE ?''', 
-                        ('%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%'))
-            for item in cursor.fetchall():
-                inventory_tree.insert('', tk.END, values=item)
+            inventory_pager.search(search_term)
 
         def add_item():
             item_name = entry_item_name.get()
@@ -1636,16 +2447,8 @@ def open_main_app():
             notes = entry_notes.get()
 
             if item_name and quantity:
-                try:
-                    cursor.execute('''INSERT INTO Inventory (
-                        ItemName, Quantity, Location, Status, Notes
-                    ) VALUES (?, ?, ?, ?, ?)''',
-                        (item_name, quantity, location, status, notes))
-                    conn.commit()
-                    load_inventory()
-                    messagebox.showinfo("Thành công", "Thêm vật phẩm thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {'ItemName': item_name, 'Quantity': quantity, 'Location': location, 'Status': status, 'Notes': notes}
+                inventory_pager.add_row(values, "Thêm vật phẩm thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -1663,16 +2466,8 @@ def open_main_app():
             notes = entry_notes.get()
 
             if item_name and quantity:
-                try:
-                    cursor.execute('''UPDATE Inventory SET
-                        ItemName = ?, Quantity = ?, Location = ?, Status = ?, Notes = ?
-                        WHERE ItemID = ?''',
-                        (item_name, quantity, location, status, notes, item_id))
-                    conn.commit()
-                    load_inventory()
-                    messagebox.showinfo("Thành công", "Cập nhật vật phẩm thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {'ItemName': item_name, 'Quantity': quantity, 'Location': location, 'Status': status, 'Notes': notes}
+                inventory_pager.update_row(item_id, values, "Cập nhật vật phẩm thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -1685,13 +2480,7 @@ def open_main_app():
             item_id = inventory_tree.item(selected_item)['values'][0]
             confirm = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa vật phẩm này?")
             if confirm:
-                try:
-                    cursor.execute('DELETE FROM Inventory WHERE ItemID = ?', (item_id,))
-                    conn.commit()
-                    load_inventory()
-                    messagebox.showinfo("Thành công", "Xóa vật phẩm thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                inventory_pager.delete_row(item_id, "Xóa vật phẩm thành công!")
 
         tk.Label(content_frame, text="Quản lý vật phẩm", font=("Helvetica", 16), bg="#f0f0f0").pack(pady=10)
 
@@ -1702,6 +2491,7 @@ def open_main_app():
         entry_search = tk.Entry(search_frame)
         entry_search.pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Tìm kiếm", command=search_inventory).pack(side=tk.LEFT, padx=5)
+        entry_search.bind('<KeyRelease>', lambda event: inventory_pager.search_as_you_type(entry_search.get()))
 
         form_frame = tk.Frame(content_frame, bg="#f0f0f0")
         form_frame.pack(pady=10)
@@ -1736,6 +2526,13 @@ def open_main_app():
         tk.Button(button_frame, text="Thêm vật phẩm", bg="#8BC34A", fg="white", command=add_item).grid(row=0, column=0, padx=10)
         tk.Button(button_frame, text="Sửa vật phẩm", bg="#FFA500", fg="white", command=update_item).grid(row=0, column=1, padx=10)
         tk.Button(button_frame, text="Xóa vật phẩm", bg="#FF6347", fg="white", command=delete_item).grid(row=0, column=2, padx=10)
+        tk.Button(button_frame, text="Xuất dữ liệu", bg="#607D8B", fg="white", command=lambda: export_table(inventory_pager)).grid(row=0, column=3, padx=10)
+        bulk_fields = {
+            "Status": ("Trạng thái", ("Available", "In Use", "Damaged", "Lost")),
+            "Location": ("Vị trí", None),
+            "Notes": ("Ghi chú", None),
+        }
+        tk.Button(button_frame, text="Sửa hàng loạt", bg="#9C27B0", fg="white", command=lambda: bulk_edit_dialog(inventory_pager, bulk_fields)).grid(row=0, column=4, padx=10)
 
         # Từ điển ánh xạ các tiêu đề cột từ tiếng Anh sang tiếng Việt
         column_mapping = {
@@ -1747,38 +2544,29 @@ def open_main_app():
             "Notes": "Ghi chú"
         }
 
-        inventory_tree = ttk.Treeview(content_frame, columns=list(column_mapping.keys()), show="headings")
-        inventory_tree.pack(fill=tk.BOTH, expand=True)
+        tree_frame = tk.Frame(content_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        inventory_tree = ttk.Treeview(tree_frame, columns=list(column_mapping.keys()), show="headings")
+        inventory_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        inventory_pager = PagedTable(inventory_tree, 'Inventory')
 
         for col in inventory_tree["columns"]:
             inventory_tree.heading(col, text=column_mapping[col])
             inventory_tree.column(col, anchor="w", width=100, stretch=tk.YES)
 
         load_inventory()
+        return inventory_pager.refresh_if_stale
 
     
-    # Hàm hiển thị trang khiếu nại
-    def show_complaints():
-        on_button_click(btn_complaints)
-        clear_frame(content_frame)
-
+    # Hàm dựng trang khiếu nại (chỉ chạy ở lần đầu mở trang)
+    def build_complaints(content_frame):
         def load_complaints():
-            for row in complaint_tree.get_children():
-                complaint_tree.delete(row)
-            cursor.execute('SELECT * FROM Complaints')
-            for complaint in cursor.fetchall():
-                complaint_tree.insert('', tk.END, values=complaint)
+            complaint_pager.reset()
 
         def search_complaints():
             search_term = entry_search.get()
-            for row in complaint_tree.get_children():
-                complaint_tree.delete(row)
-            cursor.execute('''SELECT * FROM Complaints WHERE StudentID LIKE ? OR Subject LIKE ? OR Description LIKE ? OR Status LIKE ? 
-                            OR ComplaintDate LIKE ? OR ResolutionDate LIKE ? OR Notes LIKE ?''', 
-                        ('%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', 
-                            '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%'))
-            for complaint in cursor.fetchall():
-                complaint_tree.insert('', tk.END, values=complaint)
+            complaint_pager.search(search_term)
 
         def add_complaint():
             student_id = entry_student_id.get()
@@ -1794,16 +2582,11 @@ def open_main_app():
                 return
 
             if student_id and subject and description:
-                try:
-                    cursor.execute('''INSERT INTO Complaints (
-                        StudentID, Subject, Description, Status, ComplaintDate, ResolutionDate, Notes
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                        (student_id, subject, description, status, complaint_date, resolution_date, notes))
-                    conn.commit()
-                    load_complaints()
-                    messagebox.showinfo("Thành công", "Thêm khiếu nại thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'StudentID': student_id, 'Subject': subject, 'Description': description, 'Status': status,
+                    'ComplaintDate': complaint_date, 'ResolutionDate': resolution_date, 'Notes': notes,
+                }
+                complaint_pager.add_row(values, "Thêm khiếu nại thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -1827,16 +2610,11 @@ def open_main_app():
                 return
 
             if student_id and subject and description:
-                try:
-                    cursor.execute('''UPDATE Complaints SET
-                        StudentID = ?, Subject = ?, Description = ?, Status = ?, ComplaintDate = ?, ResolutionDate = ?, Notes = ?
-                        WHERE ComplaintID = ?''',
-                        (student_id, subject, description, status, complaint_date, resolution_date, notes, complaint_id))
-                    conn.commit()
-                    load_complaints()
-                    messagebox.showinfo("Thành công", "Cập nhật khiếu nại thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'StudentID': student_id, 'Subject': subject, 'Description': description, 'Status': status,
+                    'ComplaintDate': complaint_date, 'ResolutionDate': resolution_date, 'Notes': notes,
+                }
+                complaint_pager.update_row(complaint_id, values, "Cập nhật khiếu nại thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -1849,13 +2627,7 @@ def open_main_app():
             complaint_id = complaint_tree.item(selected_item)['values'][0]
             confirm = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa khiếu nại này?")
             if confirm:
-                try:
-                    cursor.execute('DELETE FROM Complaints WHERE ComplaintID = ?', (complaint_id,))
-                    conn.commit()
-                    load_complaints()
-                    messagebox.showinfo("Thành công", "Xóa khiếu nại thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                complaint_pager.delete_row(complaint_id, "Xóa khiếu nại thành công!")
 
         tk.Label(content_frame, text="Quản lý khiếu nại", font=("Helvetica", 16), bg="#f0f0f0").pack(pady=10)
 
@@ -1866,6 +2638,7 @@ def open_main_app():
         entry_search = tk.Entry(search_frame)
         entry_search.pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Tìm kiếm", command=search_complaints).pack(side=tk.LEFT, padx=5)
+        entry_search.bind('<KeyRelease>', lambda event: complaint_pager.search_as_you_type(entry_search.get()))
 
         form_frame = tk.Frame(content_frame, bg="#f0f0f0")
         form_frame.pack(pady=10)
@@ -1916,6 +2689,13 @@ def open_main_app():
         tk.Button(button_frame, text="Thêm khiếu nại", bg="#8BC34A", fg="white", command=add_complaint).grid(row=0, column=0, padx=10)
         tk.Button(button_frame, text="Sửa khiếu nại", bg="#FFA500", fg="white", command=update_complaint).grid(row=0, column=1, padx=10)
         tk.Button(button_frame, text="Xóa khiếu nại", bg="#FF6347", fg="white", command=delete_complaint).grid(row=0, column=2, padx=10)
+        tk.Button(button_frame, text="Xuất dữ liệu", bg="#607D8B", fg="white", command=lambda: export_table(complaint_pager)).grid(row=0, column=3, padx=10)
+        bulk_fields = {
+            "Status": ("Trạng thái", ("Pending", "Resolved", "Dismissed")),
+            "ResolutionDate": ("Ngày giải quyết", None),
+            "Notes": ("Ghi chú", None),
+        }
+        tk.Button(button_frame, text="Sửa hàng loạt", bg="#9C27B0", fg="white", command=lambda: bulk_edit_dialog(complaint_pager, bulk_fields)).grid(row=0, column=4, padx=10)
 
         # Từ điển ánh xạ các tiêu đề cột từ tiếng Anh sang tiếng Việt
         column_mapping = {
@@ -1929,37 +2709,28 @@ def open_main_app():
             "Notes": "Ghi chú"
         }
 
-        complaint_tree = ttk.Treeview(content_frame, columns=list(column_mapping.keys()), show="headings")
-        complaint_tree.pack(fill=tk.BOTH, expand=True)
+        tree_frame = tk.Frame(content_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        complaint_tree = ttk.Treeview(tree_frame, columns=list(column_mapping.keys()), show="headings")
+        complaint_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        complaint_pager = PagedTable(complaint_tree, 'Complaints')
 
         for col in complaint_tree["columns"]:
             complaint_tree.heading(col, text=column_mapping[col])
             complaint_tree.column(col, anchor="w", width=100, stretch=tk.YES)
 
         load_complaints()
+        return complaint_pager.refresh_if_stale
 
-    # Hàm hiển thị trang phạt và khoản phí
-    def show_fines_and_penalties():
-        on_button_click(btn_fines_and_penalties)
-        clear_frame(content_frame)
-
+    # Hàm dựng trang phạt và khoản phí (chỉ chạy ở lần đầu mở trang)
+    def build_fines_and_penalties(content_frame):
         def load_fines():
-            for row in fine_tree.get_children():
-                fine_tree.delete(row)
-            cursor.execute('SELECT * FROM FinesAndPenalties')
-            for fine in cursor.fetchall():
-                fine_tree.insert('', tk.END, values=fine)
+            fine_pager.reset()
 
         def search_fines():
             search_term = entry_search.get()
-            for row in fine_tree.get_children():
-                fine_tree.delete(row)
-            cursor.execute('''SELECT * FROM FinesAndPenalties WHERE StudentID LIKE ? OR ViolationType LIKE ? OR Description LIKE ? OR FineAmount LIKE ? 
-                            OR FineDate LIKE ? OR Status LIKE ? OR Notes LIKE ?''', 
-                        ('%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', 
-                            '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%'))
-            for fine in cursor.fetchall():
-                fine_tree.insert('', tk.END, values=fine)
+            fine_pager.search(search_term)
 
         def add_fine():
             student_id = entry_student_id.get()
@@ -1975,16 +2746,11 @@ def open_main_app():
                 return
 
             if student_id and violation_type and description and fine_amount:
-                try:
-                    cursor.execute('''INSERT INTO FinesAndPenalties (
-                        StudentID, ViolationType, Description, FineAmount, FineDate, Status, Notes
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                        (student_id, violation_type, description, fine_amount, fine_date, status, notes))
-                    conn.commit()
-                    load_fines()
-                    messagebox.showinfo("Thành công", "Thêm phạt thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'StudentID': student_id, 'ViolationType': violation_type, 'Description': description,
+                    'FineAmount': fine_amount, 'FineDate': fine_date, 'Status': status, 'Notes': notes,
+                }
+                fine_pager.add_row(values, "Thêm phạt thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -2008,16 +2774,11 @@ def open_main_app():
                 return
 
             if student_id and violation_type and description and fine_amount:
-                try:
-                    cursor.execute('''UPDATE FinesAndPenalties SET
-                        StudentID = ?, ViolationType = ?, Description = ?, FineAmount = ?, FineDate = ?, Status = ?, Notes = ?
-                        WHERE FineID = ?''',
-                        (student_id, violation_type, description, fine_amount, fine_date, status, notes, fine_id))
-                    conn.commit()
-                    load_fines()
-                    messagebox.showinfo("Thành công", "Cập nhật phạt thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {
+                    'StudentID': student_id, 'ViolationType': violation_type, 'Description': description,
+                    'FineAmount': fine_amount, 'FineDate': fine_date, 'Status': status, 'Notes': notes,
+                }
+                fine_pager.update_row(fine_id, values, "Cập nhật phạt thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -2030,13 +2791,7 @@ def open_main_app():
             fine_id = fine_tree.item(selected_item)['values'][0]
             confirm = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa phạt này?")
             if confirm:
-                try:
-                    cursor.execute('DELETE FROM FinesAndPenalties WHERE FineID = ?', (fine_id,))
-                    conn.commit()
-                    load_fines()
-                    messagebox.showinfo("Thành công", "Xóa phạt thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                fine_pager.delete_row(fine_id, "Xóa phạt thành công!")
 
         tk.Label(content_frame, text="Quản lý phạt", font=("Helvetica", 16), bg="#f0f0f0").pack(pady=10)
 
@@ -2047,6 +2802,7 @@ def open_main_app():
         entry_search = tk.Entry(search_frame)
         entry_search.pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Tìm kiếm", command=search_fines).pack(side=tk.LEFT, padx=5)
+        entry_search.bind('<KeyRelease>', lambda event: fine_pager.search_as_you_type(entry_search.get()))
 
         form_frame = tk.Frame(content_frame, bg="#f0f0f0")
         form_frame.pack(pady=10)
@@ -2094,6 +2850,12 @@ def open_main_app():
         tk.Button(button_frame, text="Thêm phạt", bg="#8BC34A", fg="white", command=add_fine).grid(row=0, column=0, padx=10)
         tk.Button(button_frame, text="Sửa phạt", bg="#FFA500", fg="white", command=update_fine).grid(row=0, column=1, padx=10)
         tk.Button(button_frame, text="Xóa phạt", bg="#FF6347", fg="white", command=delete_fine).grid(row=0, column=2, padx=10)
+        tk.Button(button_frame, text="Xuất dữ liệu", bg="#607D8B", fg="white", command=lambda: export_table(fine_pager)).grid(row=0, column=3, padx=10)
+        bulk_fields = {
+            "Status": ("Trạng thái", ("Unpaid", "Paid")),
+            "Notes": ("Ghi chú", None),
+        }
+        tk.Button(button_frame, text="Sửa hàng loạt", bg="#9C27B0", fg="white", command=lambda: bulk_edit_dialog(fine_pager, bulk_fields)).grid(row=0, column=4, padx=10)
 
         # Từ điển ánh xạ các tiêu đề cột từ tiếng Anh sang tiếng Việt
         column_mapping = {
@@ -2107,36 +2869,29 @@ def open_main_app():
             "Notes": "Ghi chú"
         }
 
-        fine_tree = ttk.Treeview(content_frame, columns=list(column_mapping.keys()), show="headings")
-        fine_tree.pack(fill=tk.BOTH, expand=True)
+        tree_frame = tk.Frame(content_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        fine_tree = ttk.Treeview(tree_frame, columns=list(column_mapping.keys()), show="headings")
+        fine_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        fine_pager = PagedTable(fine_tree, 'FinesAndPenalties')
 
         for col in fine_tree["columns"]:
             fine_tree.heading(col, text=column_mapping[col])
             fine_tree.column(col, anchor="w", width=100, stretch=tk.YES)
 
         load_fines()
+        return fine_pager.refresh_if_stale
 
     
-    # Hàm hiển thị trang phạt sinh viên
-    def show_student_fines():
-        on_button_click(btn_student_fines)
-        clear_frame(content_frame)
-
+    # Hàm dựng trang phạt sinh viên (chỉ chạy ở lần đầu mở trang)
+    def build_student_fines(content_frame):
         def load_student_fines():
-            for row in student_fine_tree.get_children():
-                student_fine_tree.delete(row)
-            cursor.execute('SELECT * FROM StudentFines')
-            for student_fine in cursor.fetchall():
-                student_fine_tree.insert('', tk.END, values=student_fine)
+            student_fine_pager.reset()
 
         def search_student_fines():
             search_term = entry_search.get()
-            for row in student_fine_tree.get_children():
-                student_fine_tree.delete(row)
-            cursor.execute('''SELECT * FROM StudentFines WHERE StudentID LIKE ? OR FineID LIKE ? OR IssuedDate LIKE ? OR Status LIKE ? OR Notes LIKE ?''', 
-                        ('%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%', '%' + search_term + '%'))
-            for student_fine in cursor.fetchall():
-                student_fine_tree.insert('', tk.END, values=student_fine)
+            student_fine_pager.search(search_term)
 
         def add_student_fine():
             student_id = entry_student_id.get()
@@ -2150,16 +2905,8 @@ def open_main_app():
                 return
 
             if student_id and fine_id:
-                try:
-                    cursor.execute('''INSERT INTO StudentFines (
-                        StudentID, FineID, IssuedDate, Status, Notes
-                    ) VALUES (?, ?, ?, ?, ?)''',
-                        (student_id, fine_id, issued_date, status, notes))
-                    conn.commit()
-                    load_student_fines()
-                    messagebox.showinfo("Thành công", "Thêm phạt sinh viên thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {'StudentID': student_id, 'FineID': fine_id, 'IssuedDate': issued_date, 'Status': status, 'Notes': notes}
+                student_fine_pager.add_row(values, "Thêm phạt sinh viên thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -2180,16 +2927,8 @@ def open_main_app():
                 return
 
             if student_id and fine_id:
-                try:
-                    cursor.execute('''UPDATE StudentFines SET
-                        IssuedDate = ?, Status = ?, Notes = ?
-                        WHERE StudentID = ? AND FineID = ?''',
-                        (issued_date, status, notes, student_id, fine_id))
-                    conn.commit()
-                    load_student_fines()
-                    messagebox.showinfo("Thành công", "Cập nhật phạt sinh viên thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                values = {'IssuedDate': issued_date, 'Status': status, 'Notes': notes}
+                student_fine_pager.update_row((student_id, fine_id), values, "Cập nhật phạt sinh viên thành công!")
             else:
                 messagebox.showerror("Lỗi", "Vui lòng nhập các thông tin bắt buộc.")
 
@@ -2203,13 +2942,7 @@ def open_main_app():
             fine_id = student_fine_tree.item(selected_item)['values'][1]
             confirm = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa phạt sinh viên này?")
             if confirm:
-                try:
-                    cursor.execute('DELETE FROM StudentFines WHERE StudentID = ? AND FineID = ?', (student_id, fine_id))
-                    conn.commit()
-                    load_student_fines()
-                    messagebox.showinfo("Thành công", "Xóa phạt sinh viên thành công!")
-                except Exception as e:
-                    messagebox.showerror("Lỗi", f"Có lỗi xảy ra: {e}")
+                student_fine_pager.delete_row((student_id, fine_id), "Xóa phạt sinh viên thành công!")
 
         tk.Label(content_frame, text="Quản lý phạt sinh viên", font=("Helvetica", 16), bg="#f0f0f0").pack(pady=10)
 
@@ -2220,6 +2953,7 @@ def open_main_app():
         entry_search = tk.Entry(search_frame)
         entry_search.pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Tìm kiếm", command=search_student_fines).pack(side=tk.LEFT, padx=5)
+        entry_search.bind('<KeyRelease>', lambda event: student_fine_pager.search_as_you_type(entry_search.get()))
 
         form_frame = tk.Frame(content_frame, bg="#f0f0f0")
         form_frame.pack(pady=10)
@@ -2254,6 +2988,12 @@ def open_main_app():
         tk.Button(button_frame, text="Thêm phạt sinh viên", bg="#8BC34A", fg="white", command=add_student_fine).grid(row=0, column=0, padx=10)
         tk.Button(button_frame, text="Sửa phạt sinh viên", bg="#FFA500", fg="white", command=update_student_fine).grid(row=0, column=1, padx=10)
         tk.Button(button_frame, text="Xóa phạt sinh viên", bg="#FF6347", fg="white", command=delete_student_fine).grid(row=0, column=2, padx=10)
+        tk.Button(button_frame, text="Xuất dữ liệu", bg="#607D8B", fg="white", command=lambda: export_table(student_fine_pager)).grid(row=0, column=3, padx=10)
+        bulk_fields = {
+            "Status": ("Trạng thái", ("Unpaid", "Paid", "Waived")),
+            "Notes": ("Ghi chú", None),
+        }
+        tk.Button(button_frame, text="Sửa hàng loạt", bg="#9C27B0", fg="white", command=lambda: bulk_edit_dialog(student_fine_pager, bulk_fields)).grid(row=0, column=4, padx=10)
 
         # Từ điển ánh xạ các tiêu đề cột từ tiếng Anh sang tiếng Việt
         column_mapping = {
@@ -2264,31 +3004,82 @@ def open_main_app():
             "Notes": "Ghi chú"
         }
 
-        student_fine_tree = ttk.Treeview(content_frame, columns=list(column_mapping.keys()), show="headings")
-        student_fine_tree.pack(fill=tk.BOTH, expand=True)
+        tree_frame = tk.Frame(content_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        student_fine_tree = ttk.Treeview(tree_frame, columns=list(column_mapping.keys()), show="headings")
+        student_fine_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        student_fine_pager = PagedTable(student_fine_tree, 'StudentFines')
 
         for col in student_fine_tree["columns"]:
             student_fine_tree.heading(col, text=column_mapping[col])
             student_fine_tree.column(col, anchor="w", width=100, stretch=tk.YES)
 
         load_student_fines()
+        return student_fine_pager.refresh_if_stale
 
     
-    # Hàm xoá nội dung trong frame
-    def clear_frame(frame):
-        for widget in frame.winfo_children():
-            widget.destroy()
+    # Các nút trên navbar chuyển sang màn hình tương ứng (dựng ở lần mở đầu tiên, sau đó dùng lại)
+    def show_dashboard():
+        on_button_click(btn_dashboard)
+        views.show(build_dashboard)
+
+    def show_students():
+        on_button_click(btn_students)
+        views.show(build_students)
+
+    def show_contracts():
+        on_button_click(btn_contracts)
+        views.show(build_contracts)
+
+    def show_staff():
+        on_button_click(btn_staff)
+        views.show(build_staff)
+
+    def show_room():
+        on_button_click(btn_room)
+        views.show(build_room)
+
+    def show_room_allocation_history():
+        on_button_click(btn_room_allocation_history)
+        views.show(build_room_allocation_history)
+
+    def show_payments():
+        on_button_click(btn_payments)
+        views.show(build_payments)
+
+    def show_maintenance_request():
+        on_button_click(btn_maintenance_request)
+        views.show(build_maintenance_request)
+
+    def show_inventory():
+        on_button_click(btn_inventory)
+        views.show(build_inventory)
+
+    def show_complaints():
+        on_button_click(btn_complaints)
+        views.show(build_complaints)
+
+    def show_fines_and_penalties():
+        on_button_click(btn_fines_and_penalties)
+        views.show(build_fines_and_penalties)
+
+    def show_student_fines():
+        on_button_click(btn_student_fines)
+        views.show(build_student_fines)
 
     # Giao diện chính
     root = tk.Tk()
     root.title("Quản lý ký túc xá")
-    root.geometry("1000x600")
+    root.geometry("1000x680")
 
     # Tạo thanh navbar bên trái
     navbar = tk.Frame(root, bg="#2c3e50", width=200, height=600)
     navbar.pack(side=tk.LEFT, fill=tk.Y)
 
     # Tạo các nút trên thanh navbar
+    btn_dashboard = tk.Button(navbar, text="Tổng quan", command=show_dashboard, width=20, pady=10, bg="#34495e", fg="white")
+    btn_dashboard.pack(pady=5)
     btn_students = tk.Button(navbar, text="Sinh viên", command=show_students, width=20, pady=10, bg="#34495e", fg="white")
     btn_students.pack(pady=5)
     btn_contracts = tk.Button(navbar, text="Hợp đồng", command=show_contracts, width=20, pady=10, bg="#34495e", fg="white")
@@ -2312,98 +3103,250 @@ def open_main_app():
     btn_student_fines = tk.Button(navbar, text="Vi phạm sinh viên", command=show_student_fines, width=20, pady=10, bg="#34495e", fg="white")
     btn_student_fines.pack(pady=5)
 
+    if remote_server is None:
+        tk.Button(navbar, text="Sao lưu", command=backup_dialog, width=20, pady=10, bg="#34495e", fg="white").pack(pady=5)
+
+    # Nhãn báo đang chạy truy vấn nền
+    busy_label = tk.Label(navbar, text="", bg="#2c3e50", fg="#f1c40f")
+    busy_label.pack(side=tk.BOTTOM, pady=10)
+
+    def show_busy(busy):
+        busy_label.config(text="Đang tải..." if busy else "")
+        root.config(cursor="watch" if busy else "")
+
+    executor.attach(root, show_busy)
+    watch_external_writes(root)
+    schedule_backups(root)
+
     # Tạo frame nội dung
     content_frame = tk.Frame(root, bg="#ecf0f1", width=800, height=600)
     content_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+    views = ViewManager(content_frame)
+    show_dashboard()
 
     root.mainloop()
 
 
-# Function to handle login
-def handle_login():
-    username = entry_username.get()
-    password = entry_password.get()
-    
-    # Show the progress bar
-    progress_bar.pack(pady=10)
-    login_window.update_idletasks()
-    
-    # Start a simulation of the loading process with after()
-    progress_bar['value'] = 0  # Reset progress bar to 0
-    simulate_loading(0, username, password)
-
-# Function to simulate the loading process (non-blocking)
-def simulate_loading(i, username, password):
-    if i < 100:
-        progress_bar['value'] = i
-        login_window.after(8, simulate_loading, i + 1, username, password)  # Update progress every 20ms
+# In thời gian của từng bước khởi động (theo startup_marks). Thời gian Python tự khởi động trước khi
+# chạy doan.py không được tính; xem thêm python -X importtime doan.py để biết chi tiết từng module.
+def print_startup_profile():
+    started = startup_marks[0][1]
+    previous = started
+    for label, moment in startup_marks[1:]:
+        print(f"{label:36} {(moment - previous) * 1000:>8.1f} ms {(moment - started) * 1000:>10.1f} ms")
+        previous = moment
+    if __spec__ is None:
+        print("doan.py chạy dạng script nên được biên dịch lại ở mỗi lần chạy; "
+              "chạy bằng python -m doan để dùng bytecode đã lưu trong __pycache__")
+
+def main():
+    global executor, remote_server
+
+    restore_message = None
+    conn = None
+    if get_db_config()['server']:
+        # Làm việc với máy chủ dùng chung: mọi truy vấn đi qua máy chủ, không mở file database
+        remote_server = RemoteServer(get_db_config()['server'])
+        executor = QueryExecutor(remote_server.connect)
     else:
-        # Hide the progress bar after the loading is complete
-        progress_bar.pack_forget()
-        messagebox.showinfo("Login Info", "Login successfully")
-        open_main_app()
-
-
-def open_register_window():
-    register_window = tk.Toplevel(login_window)
-    register_window.title("Đăng ký")
-    register_window.geometry("400x250")
-    register_window.configure(bg="#e0e0e0")
-
-    tk.Label(register_window, text="Đăng ký", font=("Helvetica", 18, "bold"), bg="#e0e0e0").pack(pady=15)
+        # Thay database bằng bản sao lưu đã chọn khôi phục ở lần chạy trước (nếu có), trước khi mở kết nối
+        try:
+            previous = apply_pending_restore()
+            if previous:
+                restore_message = ("Thành công", f"Đã khôi phục database từ bản sao lưu. Database cũ được giữ ở {previous}.")
+        except Exception as e:
+            restore_message = ("Lỗi", f"Không thể khôi phục database: {e}. Sẽ thử lại ở lần khởi động sau.")
+
+        # Kết nối của luồng giao diện; bảo đảm database đã có đủ bảng và migration
+        conn = open_database()
+        startup_marks.append(("Mở database", time.perf_counter()))
+
+        # In kế hoạch thực thi của các truy vấn có sẵn rồi thoát: python doan.py --explain-queries
+        if '--explain-queries' in sys.argv:
+            print_query_plans(conn)
+            return
+
+        executor = QueryExecutor(get_connection)
+    startup_marks.append(("Tạo luồng truy vấn nền", time.perf_counter()))
+
+    # Đăng nhập: băm và kiểm tra mật khẩu trên một luồng riêng, đồng thời các luồng đọc tải trước
+    # số liệu của trang tổng quan vào bộ đệm. Thanh tiến trình tăng theo từng việc đã xong;
+    # ứng dụng chính được mở khi mật khẩu đúng và việc tải trước đã xong. Máy chủ chỉ trả lời sau khi
+    # đăng nhập, nên khi làm việc với máy chủ thì tải trước sau khi mật khẩu đã được xác nhận.
+    def handle_login():
+        username = entry_username.get()
+        password = entry_password.get()
+        if not username or not password:
+            messagebox.showerror("Lỗi", "Vui lòng nhập đầy đủ thông tin.")
+            return
+
+        state = {'authenticated': False, 'prefetching': len(DASHBOARD_SECTIONS)}
+
+        def authenticated(valid):
+            if not valid:
+                stop()
+                messagebox.showerror("Lỗi", "Sai tên đăng nhập hoặc mật khẩu.")
+                return
+            state['authenticated'] = True
+            set_audit_user(username)
+            if remote_server is not None:
+                prefetch()
+            advance()
+
+        def prefetched(_):
+            state['prefetching'] -= 1
+            advance()
+
+        def advance():
+            progress_bar['value'] = state['authenticated'] + len(DASHBOARD_SECTIONS) - state['prefetching']
+            if state['authenticated'] and not state['prefetching']:
+                progress_bar.pack_forget()
+                login_window.after(0, open_main_app, login_window)
+
+        def prefetch():
+            today = date.today()
+            for name in DASHBOARD_SECTIONS:
+                # Lỗi khi tải trước thì bỏ qua: trang tổng quan sẽ tải lại và báo lỗi khi mở
+                load_dashboard_section(name, today, prefetched, prefetched)
+
+        def failed(e):
+            stop()
+            messagebox.showerror("Lỗi", f"Không thể đăng nhập: {e}")
+
+        def stop():
+            progress_bar.pack_forget()
+            login_button.config(state=tk.NORMAL)
+
+        login_button.config(state=tk.DISABLED)
+        progress_bar['maximum'] = len(DASHBOARD_SECTIONS) + 1
+        progress_bar['value'] = 0
+        progress_bar.pack(pady=10)
+        executor.run_in_thread(lambda db: auth.authenticate(db, username, password), authenticated, failed)
+        if remote_server is None:
+            prefetch()
+
+    def open_register_window():
+        register_window = tk.Toplevel(login_window)
+        register_window.title("Đăng ký")
+        register_window.geometry("400x250")
+        register_window.configure(bg="#e0e0e0")
+
+        tk.Label(register_window, text="Đăng ký", font=("Helvetica", 18, "bold"), bg="#e0e0e0").pack(pady=15)
+
+        frame = tk.Frame(register_window, bg="#e0e0e0")
+        frame.pack(pady=10)
+
+        tk.Label(frame, text="Tên đăng nhập:", font=("Helvetica", 12), bg="#e0e0e0").grid(row=0, column=0, pady=10, padx=10)
+        entry_reg_username = tk.Entry(frame, font=("Helvetica", 12), width=20)
+        entry_reg_username.grid(row=0, column=1, pady=10, padx=10)
+
+        tk.Label(frame, text="Mật khẩu:", font=("Helvetica", 12), bg="#e0e0e0").grid(row=1, column=0, pady=10, padx=10)
+        entry_reg_password = tk.Entry(frame, font=("Helvetica", 12), width=20, show="*")
+        entry_reg_password.grid(row=1, column=1, pady=10, padx=10)
+
+        tk.Label(frame, text="Xác nhận mật khẩu:", font=("Helvetica", 12), bg="#e0e0e0").grid(row=2, column=0, pady=10, padx=10)
+        entry_confirm_password = tk.Entry(frame, font=("Helvetica", 12), width=20, show="*")
+        entry_confirm_password.grid(row=2, column=1, pady=10, padx=10)
+
+        # Tạo tài khoản trên một luồng riêng (băm mật khẩu tốn thời gian)
+        def register_user():
+            username = entry_reg_username.get().strip()
+            password = entry_reg_password.get()
+            if not username or not password:
+                messagebox.showerror("Lỗi", "Vui lòng nhập đầy đủ thông tin.")
+                return
+            if password != entry_confirm_password.get():
+                messagebox.showerror("Lỗi", "Mật khẩu xác nhận không khớp.")
+                return
 
-    frame = tk.Frame(register_window, bg="#e0e0e0")
+            def create(db):
+                with db:
+                    return auth.create_user(db, username, password)
+
+            def registered(created):
+                if not created:
+                    register_button.config(state=tk.NORMAL)
+                    messagebox.showerror("Lỗi", "Tên đăng nhập đã tồn tại.")
+                    return
+                register_window.destroy()
+                entry_username.delete(0, tk.END)
+                entry_username.insert(0, username)
+                entry_password.delete(0, tk.END)
+                messagebox.showinfo("Thành công", "Đăng ký thành công!")
+
+            def failed(e):
+                register_button.config(state=tk.NORMAL)
+                messagebox.showerror("Lỗi", f"Không thể đăng ký: {e}")
+
+            register_button.config(state=tk.DISABLED)
+            executor.run_in_thread(create, registered, failed)
+
+        register_button = tk.Button(register_window, text="Đăng ký", font=("Helvetica", 12), bg="#8BC34A", fg="white", command=register_user)
+        register_button.pack(pady=20)
+
+    # Tạo cửa sổ đăng nhập
+    login_window = tk.Tk()
+    startup_marks.append(("Khởi tạo Tk", time.perf_counter()))
+    login_window.title("Đăng nhập")
+    login_window.geometry("400x310")
+    login_window.configure(bg="#f0f0f0")
+
+    # Tiêu đề
+    tk.Label(login_window, text="Đăng nhập", font=("Helvetica", 16, "bold"), bg="#f0f0f0").pack(pady=15)
+
+    # Nhãn và ô nhập liệu
+    frame = tk.Frame(login_window, bg="#f0f0f0")
     frame.pack(pady=10)
 
-    tk.Label(frame, text="Tên đăng nhập:", font=("Helvetica", 12), bg="#e0e0e0").grid(row=0, column=0, pady=10, padx=10)
-    entry_reg_username = tk.Entry(frame, font=("Helvetica", 12), width=20)
-    entry_reg_username.grid(row=0, column=1, pady=10, padx=10)
-
-    tk.Label(frame, text="Mật khẩu:", font=("Helvetica", 12), bg="#e0e0e0").grid(row=1, column=0, pady=10, padx=10)
-    entry_reg_password = tk.Entry(frame, font=("Helvetica", 12), width=20, show="*")
-    entry_reg_password.grid(row=1, column=1, pady=10, padx=10)
-
-    tk.Label(frame, text="Xác nhận mật khẩu:", font=("Helvetica", 12), bg="#e0e0e0").grid(row=2, column=0, pady=10, padx=10)
-    entry_confirm_password = tk.Entry(frame, font=("Helvetica", 12), width=20, show="*")
-    entry_confirm_password.grid(row=2, column=1, pady=10, padx=10)
+    # Tên đăng nhập
+    tk.Label(frame, text="Tên đăng nhập:", font=("Helvetica", 10), bg="#f0f0f0").grid(row=0, column=0, pady=10, padx=10)
+    entry_username = tk.Entry(frame, font=("Helvetica", 10), width=20)
+    entry_username.grid(row=0, column=1, pady=10, padx=10)
+    entry_username.insert(0, "anhnguyen") 
 
-    tk.Button(register_window, text="Đăng ký", font=("Helvetica", 12), bg="#8BC34A", fg="white", command=lambda: messagebox.showinfo("Register Info", "Registration Successful")).pack(pady=20)
+    tk.Label(frame, text="Mật khẩu:", font=("Helvetica", 10), bg="#f0f0f0").grid(row=1, column=0, pady=10, padx=10)
+    entry_password = tk.Entry(frame, font=("Helvetica", 10), width=20, show="*")
+    entry_password.grid(row=1, column=1, pady=10, padx=10)
+    entry_password.insert(0, "123456") 
 
-# Tạo cửa sổ đăng nhập
-login_window = tk.Tk()
-login_window.title("Đăng nhập")
-login_window.geometry("400x310")
-login_window.configure(bg="#f0f0f0")
+    button_frame = tk.Frame(login_window, bg="#f0f0f0")
+    button_frame.pack(pady=10)
 
-# Tiêu đề
-tk.Label(login_window, text="Đăng nhập", font=("Helvetica", 16, "bold"), bg="#f0f0f0").pack(pady=15)
+    login_button = tk.Button(button_frame, text="Đăng nhập", font=("Helvetica", 10), bg="#8BC34A", fg="white", width=10, height=1, command=handle_login)
+    login_button.grid(row=0, column=0, padx=10)
+    tk.Button(button_frame, text="Đăng ký", font=("Helvetica", 10), bg="#03A9F4", fg="white", width=10, height=1, command=open_register_window).grid(row=0, column=1, padx=10)
 
-# Nhãn và ô nhập liệu
-frame = tk.Frame(login_window, bg="#f0f0f0")
-frame.pack(pady=10)
+    progress_bar = ttk.Progressbar(login_window, orient="horizontal", length=300, mode="determinate")
 
-# Tên đăng nhập
-tk.Label(frame, text="Tên đăng nhập:", font=("Helvetica", 10), bg="#f0f0f0").grid(row=0, column=0, pady=10, padx=10)
-entry_username = tk.Entry(frame, font=("Helvetica", 10), width=20)
-entry_username.grid(row=0, column=1, pady=10, padx=10)
-entry_username.insert(0, "anhnguyen") 
+    tk.Label(login_window, text="Don't have an account?", font=("Helvetica", 10), fg="#03A9F4", bg="#f0f0f0").pack(pady=5)
+    tk.Label(login_window, text="Forgot your password ?", font=("Helvetica", 10), fg="#03A9F4", bg="#f0f0f0").pack(pady=5)
 
-tk.Label(frame, text="Mật khẩu:", font=("Helvetica", 10), bg="#f0f0f0").grid(row=1, column=0, pady=10, padx=10)
-entry_password = tk.Entry(frame, font=("Helvetica", 10), width=20, show="*")
-entry_password.grid(row=1, column=1, pady=10, padx=10)
-entry_password.insert(0, "123456") 
+    if restore_message and restore_message[0] == "Lỗi":
+        messagebox.showerror(*restore_message)
+    elif restore_message:
+        messagebox.showinfo(*restore_message)
 
-button_frame = tk.Frame(login_window, bg="#f0f0f0")
-button_frame.pack(pady=10)
+    # Nhận kết quả đăng nhập và tải trước; ứng dụng chính gắn lại vào cửa sổ của nó khi mở
+    executor.attach(login_window)
+    startup_marks.append(("Dựng cửa sổ đăng nhập", time.perf_counter()))
 
-tk.Button(button_frame, text="Đăng nhập", font=("Helvetica", 10), bg="#8BC34A", fg="white", width=10, height=1, command=handle_login).grid(row=0, column=0, padx=10)
-tk.Button(button_frame, text="Đăng ký", font=("Helvetica", 10), bg="#03A9F4", fg="white", width=10, height=1, command=open_register_window).grid(row=0, column=1, padx=10)
+    # Đo thời gian tới khi cửa sổ đăng nhập được vẽ xong rồi thoát: python doan.py --profile-startup
+    if '--profile-startup' in sys.argv:
+        login_window.update()
+        startup_marks.append(("Hiện cửa sổ đăng nhập", time.perf_counter()))
+        print_startup_profile()
+        login_window.destroy()
+        if conn is not None:
+            conn.close()
+        return
 
-progress_bar = ttk.Progressbar(login_window, orient="horizontal", length=300, mode="determinate")
+    login_window.mainloop()
 
-tk.Label(login_window, text="Don't have an account?", font=("Helvetica", 10), fg="#03A9F4", bg="#f0f0f0").pack(pady=5)
-tk.Label(login_window, text="Forgot your password ?", font=("Helvetica", 10), fg="#03A9F4", bg="#f0f0f0").pack(pady=5)
+    # Cập nhật thống kê của bộ tối ưu truy vấn nếu dữ liệu đã thay đổi nhiều
+    if conn is not None:
+        conn.execute('PRAGMA optimize')
+        conn.close()
 
-login_window.mainloop()
 
-conn.close()
+if __name__ == "__main__":
+    main()
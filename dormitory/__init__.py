@@ -0,0 +1,9 @@
+# Tầng truy cập dữ liệu của ứng dụng quản lý ký túc xá.
+# Không phụ thuộc Tkinter và không mở kết nối khi import, nên dùng được trong script,
+# cron hay benchmark:
+#
+#     from dormitory import open_database, repositories
+#     db = open_database()
+#     students = repositories['Students'].search(db, 'nguyen')
+from dormitory.db import connect, get_connection, open_database, load_db_config
+from dormitory.repository import TableRepository, repositories
@@ -0,0 +1,103 @@
+import argparse
+from datetime import date, timedelta
+
+from dormitory.db import load_db_config, namedtuple_factory, open_database
+from dormitory.remote import poll_remote_changes, remote_operation
+from dormitory.schema import AUDIT_COLUMNS
+
+# Số dòng nhật ký trả về mặc định của mỗi lần tra cứu
+HISTORY_LIMIT = 500
+
+# Chuyển các dòng đang chờ trong AuditQueue sang AuditLog theo một lô; trả về tên các bảng có thay đổi.
+# Gọi trong một transaction (ví dụ trên luồng ghi của QueryExecutor). Chỉ chuyển các dòng có tới lúc
+# đọc max(QueueID), nên dòng do kết nối khác thêm vào trong lúc chuyển sẽ được chuyển ở lần sau.
+def flush_audit_log(db):
+    last_id = db.execute('SELECT MAX(QueueID) FROM AuditQueue').fetchone()[0]
+    if last_id is None:
+        return []
+    tables = [row[0] for row in db.execute('SELECT DISTINCT TableName FROM AuditQueue WHERE QueueID <= ?', (last_id,))]
+    db.execute(f'''INSERT INTO AuditLog ({AUDIT_COLUMNS})
+        SELECT {AUDIT_COLUMNS} FROM AuditQueue WHERE QueueID <= ? ORDER BY QueueID''', (last_id,))
+    db.execute('DELETE FROM AuditQueue WHERE QueueID <= ?', (last_id,))
+    return tables
+
+# Phát hiện kết nối khác ghi vào database: chuyển nhật ký đang chờ rồi trả về (các bảng vừa chuyển,
+# PRAGMA data_version). data_version chỉ đổi khi một kết nối khác commit; gọi trên cùng một kết nối
+# ghi để so sánh giữa các lần. Với máy chủ thì hỏi máy chủ các thay đổi của máy khách khác.
+@remote_operation('external_writes', write=True, client=poll_remote_changes)
+def external_writes(db):
+    return flush_audit_log(db), db.execute('PRAGMA data_version').fetchone()[0]
+
+# Các dòng nhật ký thỏa condition trong khoảng ngày [start, end] (cả hai đầu; None là không giới hạn),
+# mới nhất trước. Gồm cả các dòng còn trong hàng đợi (chưa có ChangeID); hàng đợi luôn nhỏ vì được
+# chuyển sang AuditLog định kỳ nên đọc cả hàng đợi vẫn rẻ.
+def audit_history(db, condition, params, start=None, end=None, limit=HISTORY_LIMIT):
+    conditions = [condition]
+    params = list(params)
+    if start is not None:
+        conditions.append('ChangedAt >= ?')
+        params.append(start.isoformat())
+    if end is not None:
+        conditions.append('ChangedAt < ?')
+        params.append((end + timedelta(days=1)).isoformat())
+    where = ' AND '.join(conditions)
+    cursor = db.cursor()
+    cursor.row_factory = namedtuple_factory
+    return cursor.execute(f'''SELECT ChangeID, {AUDIT_COLUMNS} FROM (
+            SELECT 0 AS Queued, ChangeID AS Position, ChangeID, {AUDIT_COLUMNS} FROM AuditLog WHERE {where}
+            UNION ALL
+            SELECT 1, QueueID, NULL, {AUDIT_COLUMNS} FROM AuditQueue WHERE {where})
+        ORDER BY ChangedAt DESC, Queued DESC, Position DESC LIMIT ?''', params + params + [limit]).fetchall()
+
+# Lịch sử thay đổi của một dòng; key là giá trị khóa chính (tuple với StudentFines)
+@remote_operation('row_history')
+def row_history(db, table, key, start=None, end=None, limit=HISTORY_LIMIT):
+    row_key = ','.join(map(str, key)) if isinstance(key, (tuple, list)) else str(key)
+    return audit_history(db, 'TableName = ? AND RowKey = ?', (table, row_key), start, end, limit)
+
+# Mọi thay đổi liên quan tới một sinh viên: thông tin sinh viên, hợp đồng, thanh toán, phân phòng, phạt...
+@remote_operation('student_history')
+def student_history(db, student_id, start=None, end=None, limit=HISTORY_LIMIT):
+    return audit_history(db, 'StudentID = ?', (student_id,), start, end, limit)
+
+# Mọi thay đổi liên quan tới một phòng: thông tin phòng và lịch sử phân phòng
+@remote_operation('room_history')
+def room_history(db, room_id, start=None, end=None, limit=HISTORY_LIMIT):
+    return audit_history(db, 'RoomID = ?', (room_id,), start, end, limit)
+
+# Các thay đổi đã chuyển sang AuditLog sau con trỏ change_id, theo thứ tự; dùng cho đồng bộ:
+# lưu ChangeID của dòng cuối cùng đã xử lý rồi gọi lại với giá trị đó
+@remote_operation('changes_since')
+def changes_since(db, change_id=0, limit=HISTORY_LIMIT):
+    cursor = db.cursor()
+    cursor.row_factory = namedtuple_factory
+    return cursor.execute(f'SELECT ChangeID, {AUDIT_COLUMNS} FROM AuditLog WHERE ChangeID > ? ORDER BY ChangeID LIMIT ?',
+                          (change_id, limit)).fetchall()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Xem hoặc chuyển nhật ký thay đổi")
+    parser.add_argument('--flush', action='store_true', help="chuyển các thay đổi đang chờ sang AuditLog")
+    parser.add_argument('--student', type=int, help="mã sinh viên cần xem lịch sử")
+    parser.add_argument('--room', type=int, help="mã phòng cần xem lịch sử")
+    parser.add_argument('--from', dest='start', type=date.fromisoformat, help="từ ngày (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end', type=date.fromisoformat, help="đến ngày (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+    db = open_database(load_db_config())
+    try:
+        if args.flush:
+            with db:
+                tables = flush_audit_log(db)
+            print(f"Đã chuyển thay đổi của các bảng: {', '.join(tables)}" if tables else "Không có thay đổi đang chờ")
+        history = []
+        if args.student is not None:
+            history += student_history(db, args.student, args.start, args.end)
+        if args.room is not None:
+            history += room_history(db, args.room, args.start, args.end)
+        for change in history:
+            print(change.ChangedAt, change.ChangedBy or '-', change.Operation, change.TableName, change.RowKey,
+                  change.Changes)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import hashlib
+import hmac
+import os
+import sqlite3
+
+from dormitory.remote import remote_login, remote_operation
+
+# Tham số scrypt (khoảng 50-100 ms và 16 MB bộ nhớ mỗi lần băm); dùng PBKDF2-SHA256 nếu Python
+# được build với OpenSSL không có scrypt
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600000
+SALT_BYTES = 16
+
+# Băm mật khẩu với salt ngẫu nhiên. Kết quả tự mô tả thuật toán và tham số:
+# scrypt$n$r$p$salt$hash hoặc pbkdf2_sha256$số vòng$salt$hash (salt và hash dạng hex)
+def hash_password(password):
+    salt = os.urandom(SALT_BYTES)
+    if hasattr(hashlib, 'scrypt'):
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P)
+        return f'scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}'
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, PBKDF2_ITERATIONS)
+    return f'pbkdf2_sha256${PBKDF2_ITERATIONS}${salt.hex()}${digest.hex()}'
+
+# Kiểm tra mật khẩu với giá trị đã lưu; trả về (đúng mật khẩu, cần băm lại).
+# Cần băm lại khi giá trị đã lưu là mật khẩu dạng rõ (tài khoản tạo trước khi có băm)
+# hoặc được băm bằng thuật toán/tham số cũ hơn hiện tại.
+def verify_password(password, stored):
+    parts = stored.split('$')
+    if parts[0] == 'scrypt' and len(parts) == 6:
+        n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+        digest = hashlib.scrypt(password.encode(), salt=bytes.fromhex(parts[4]), n=n, r=r, p=p)
+        outdated = (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    elif parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+        iterations = int(parts[1])
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(parts[2]), iterations)
+        outdated = hasattr(hashlib, 'scrypt') or iterations != PBKDF2_ITERATIONS
+    else:
+        return hmac.compare_digest(password.encode(), stored.encode()), True
+    return hmac.compare_digest(digest.hex(), parts[-1]), outdated
+
+# Tạo tài khoản mới; trả về False nếu tên đăng nhập đã tồn tại.
+# Băm mật khẩu tốn thời gian, nên gọi trên luồng nền.
+def create_user(db, username, password):
+    try:
+        db.execute('INSERT INTO Users (Username, Password) VALUES (?, ?)', (username, hash_password(password)))
+        return True
+    except sqlite3.IntegrityError:
+        return False
+
+# Tìm tài khoản và kiểm tra mật khẩu, chỉ đọc database; trả về (đúng mật khẩu, UserID, giá trị đã lưu,
+# cần băm lại). Tên đăng nhập không tồn tại vẫn băm một lần để thời gian trả lời không lộ tài khoản nào có thật.
+def check_password(db, username, password):
+    row = db.execute('SELECT UserID, Password FROM Users WHERE Username = ?', (username,)).fetchone()
+    if row is None:
+        hash_password(password)
+        return False, None, None, False
+    user_id, stored = row
+    valid, outdated = verify_password(password, stored)
+    return valid, user_id, stored, outdated
+
+# Thay giá trị băm đã lưu của tài khoản user_id bằng hashed (không commit).
+# Chỉ ghi khi mật khẩu chưa bị đổi kể từ lúc đọc stored.
+def rehash_password(db, user_id, stored, hashed):
+    db.execute('UPDATE Users SET Password = ? WHERE UserID = ? AND Password = ?', (hashed, user_id, stored))
+
+# Kiểm tra tên đăng nhập và mật khẩu (tốn thời gian như create_user, nên gọi trên luồng nền).
+# Đăng nhập đúng với mật khẩu lưu dạng rõ hoặc băm cũ thì băm lại và ghi ngay (commit).
+@remote_operation('authenticate', client=remote_login)
+def authenticate(db, username, password):
+    valid, user_id, stored, outdated = check_password(db, username, password)
+    if valid and outdated:
+        with db:
+            rehash_password(db, user_id, stored, hash_password(password))
+    return valid
@@ -0,0 +1,212 @@
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+from datetime import datetime
+
+from dormitory.db import connect, get_db_config, load_db_config
+
+# Số trang sao chép mỗi bước và thời gian nghỉ (giây) giữa hai bước: mỗi bước chỉ giữ khóa đọc
+# trong chốc lát nên luồng giao diện và các kết nối ghi không bị chặn trong lúc sao lưu
+BACKUP_PAGES = 1024
+BACKUP_SLEEP = 0.005
+
+# Tên file sao lưu: dormitory-YYYYMMDD-HHMMSS.db trong thư mục backup_dir
+BACKUP_PREFIX = 'dormitory-'
+BACKUP_SUFFIX = '.db'
+TIMESTAMP_FORMAT = '%Y%m%d-%H%M%S'
+
+# File chờ khôi phục đặt cạnh database (dormitory.db.restore); được thay vào lúc khởi động
+RESTORE_SUFFIX = '.restore'
+
+def backup_name(moment):
+    return f'{BACKUP_PREFIX}{moment.strftime(TIMESTAMP_FORMAT)}{BACKUP_SUFFIX}'
+
+# Các bản sao lưu trong thư mục directory: danh sách (đường dẫn, thời điểm sao lưu), mới nhất trước
+def list_backups(directory):
+    if not os.path.isdir(directory):
+        return []
+    backups = []
+    for name in os.listdir(directory):
+        if not (name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX)):
+            continue
+        try:
+            moment = datetime.strptime(name[len(BACKUP_PREFIX):-len(BACKUP_SUFFIX)], TIMESTAMP_FORMAT)
+        except ValueError:
+            continue
+        backups.append((os.path.join(directory, name), moment))
+    backups.sort(key=lambda backup: backup[1], reverse=True)
+    return backups
+
+# Bản sao lưu mới nhất không muộn hơn moment (khôi phục về một thời điểm), hoặc None
+def backup_at(directory, moment):
+    for path, taken in list_backups(directory):
+        if taken <= moment:
+            return path
+    return None
+
+# Các dòng của PRAGMA integrity_check báo dữ liệu vi phạm ràng buộc CHECK/NOT NULL. Đây là lỗi của dữ liệu
+# (đã có sẵn trong database gốc), không phải file bị hỏng, nên chỉ được báo dưới dạng cảnh báo.
+CONSTRAINT_MESSAGES = ('CHECK constraint failed', 'NULL value in')
+
+# Kết quả PRAGMA integrity_check của kết nối db: (lỗi cấu trúc như trang, b-tree, chỉ mục hỏng;
+# cảnh báo dữ liệu vi phạm ràng buộc). Cả hai rỗng nếu database nguyên vẹn.
+def integrity_problems(db):
+    messages = [row[0] for row in db.execute('PRAGMA integrity_check')]
+    if messages == ['ok']:
+        return [], []
+    warnings = [message for message in messages if message.startswith(CONSTRAINT_MESSAGES)]
+    return [message for message in messages if message not in warnings], warnings
+
+# Kiểm tra toàn vẹn một file database (ví dụ một bản sao lưu); trả về (lỗi, cảnh báo) như integrity_problems
+def check_backup(path):
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Không tìm thấy file {path}")
+    db = sqlite3.connect(path)
+    try:
+        return integrity_problems(db)
+    finally:
+        db.close()
+
+# Sao lưu database của kết nối db vào thư mục directory bằng API backup của SQLite, mỗi bước pages
+# trang; on_progress(số trang đã chép, tổng số trang) được gọi sau mỗi bước. Kết nối db giữ một
+# transaction đọc suốt quá trình nên bản sao là ảnh chụp nhất quán tại lúc bắt đầu (với WAL, các kết
+# nối khác vẫn ghi bình thường và việc sao chép không phải làm lại từ đầu). Bản sao được chuyển sang
+# journal_mode DELETE (một file duy nhất), kiểm tra toàn vẹn rồi mới đổi tên từ .part sang tên chính
+# thức, nên thư mục sao lưu không bao giờ chứa bản dở dang. Chỉ lỗi cấu trúc làm hỏng bản sao; dữ liệu
+# vi phạm ràng buộc (có sẵn trong database gốc) không chặn việc sao lưu. Trả về (đường dẫn bản sao, cảnh báo).
+def backup_database(db, directory, pages=BACKUP_PAGES, on_progress=None, now=None):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, backup_name(now or datetime.now()))
+    partial = path + '.part'
+    progress = None
+    if on_progress:
+        progress = lambda status, remaining, total: on_progress(total - remaining, total)
+
+    target = sqlite3.connect(partial)
+    try:
+        db.execute('BEGIN')
+        try:
+            db.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            db.backup(target, pages=pages, progress=progress, sleep=BACKUP_SLEEP)
+        finally:
+            db.rollback()
+        target.execute('PRAGMA journal_mode = DELETE')
+        problems, warnings = integrity_problems(target)
+    finally:
+        target.close()
+    if problems:
+        os.remove(partial)
+        raise sqlite3.DatabaseError(f"Bản sao lưu bị lỗi: {'; '.join(problems[:5])}")
+    os.replace(partial, path)
+    return path, warnings
+
+# Xóa các bản sao lưu cũ, chỉ giữ keep bản mới nhất; trả về đường dẫn các bản đã xóa
+def rotate_backups(directory, keep):
+    removed = [path for path, _ in list_backups(directory)[keep:]]
+    for path in removed:
+        os.remove(path)
+    return removed
+
+# Đã tới lúc sao lưu tự động chưa: chưa có bản nào, hoặc bản mới nhất cũ hơn interval phút
+def backup_due(directory, interval, now=None):
+    backups = list_backups(directory)
+    if not backups:
+        return True
+    return ((now or datetime.now()) - backups[0][1]).total_seconds() >= interval * 60
+
+# Sao lưu theo cấu hình rồi xoay vòng các bản cũ; trả về (đường dẫn bản mới, các bản đã xóa, cảnh báo)
+def run_backup(db, config=None, on_progress=None):
+    config = config or get_db_config()
+    path, warnings = backup_database(db, config['backup_dir'], on_progress=on_progress)
+    return path, rotate_backups(config['backup_dir'], config['backup_keep']), warnings
+
+# Chuẩn bị khôi phục database từ bản sao lưu backup_path: kiểm tra toàn vẹn rồi chép thành file chờ
+# khôi phục cạnh database. File database đang mở không bị động tới; việc thay file diễn ra ở lần khởi
+# động sau (apply_pending_restore), khi chưa có kết nối nào.
+def schedule_restore(backup_path, config=None):
+    config = config or get_db_config()
+    problems, _ = check_backup(backup_path)
+    if problems:
+        raise sqlite3.DatabaseError(f"Bản sao lưu bị lỗi, không thể khôi phục: {'; '.join(problems[:5])}")
+    staging = config['path'] + RESTORE_SUFFIX
+    shutil.copyfile(backup_path, staging + '.part')
+    os.replace(staging + '.part', staging)
+    return staging
+
+# Thay database bằng file chờ khôi phục (nếu có); gọi lúc khởi động, trước khi mở kết nối.
+# Database hiện tại được gộp WAL vào file chính rồi giữ lại trong thư mục sao lưu dưới tên
+# before-restore-<thời điểm>.db. Nếu bị ngắt giữa chừng thì lần khởi động sau làm tiếp.
+# Trả về đường dẫn bản database cũ đã giữ lại (None nếu không có gì để khôi phục).
+def apply_pending_restore(config=None):
+    config = config or get_db_config()
+    path = config['path']
+    staging = path + RESTORE_SUFFIX
+    if not os.path.exists(staging):
+        return None
+
+    previous = None
+    if os.path.exists(path):
+        db = sqlite3.connect(path, timeout=config['busy_timeout'] / 1000)
+        try:
+            # Chỉ chuyển được khỏi WAL khi không còn kết nối nào khác tới database
+            mode = db.execute('PRAGMA journal_mode = DELETE').fetchone()[0]
+        finally:
+            db.close()
+        if mode.upper() != 'DELETE':
+            raise sqlite3.OperationalError("Database đang được tiến trình khác sử dụng, chưa thể khôi phục")
+        os.makedirs(config['backup_dir'], exist_ok=True)
+        previous = os.path.join(config['backup_dir'], f"before-restore-{datetime.now().strftime(TIMESTAMP_FORMAT)}.db")
+        shutil.move(path, previous)
+    # WAL cũ (nếu còn) thuộc về database cũ, không được áp vào file khôi phục
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.replace(staging, path)
+    return previous
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sao lưu, kiểm tra và khôi phục database (mặc định: sao lưu rồi xoay vòng)")
+    parser.add_argument('--list', action='store_true', help="liệt kê các bản sao lưu")
+    parser.add_argument('--check', metavar='FILE', help="kiểm tra toàn vẹn một bản sao lưu")
+    parser.add_argument('--restore', metavar='FILE|YYYY-MM-DDTHH:MM',
+                        help="khôi phục từ một file, hoặc từ bản mới nhất không muộn hơn thời điểm")
+    args = parser.parse_args(argv)
+    config = load_db_config()
+
+    if args.list:
+        for path, moment in list_backups(config['backup_dir']):
+            print(moment.strftime('%d-%m-%Y %H:%M:%S'), f"{os.path.getsize(path) / 1048576:8.1f} MB", path)
+    elif args.check:
+        problems, warnings = check_backup(args.check)
+        print("Bản sao lưu nguyên vẹn" if not problems else '\n'.join(problems))
+        for warning in warnings:
+            print(f"Cảnh báo: {warning}")
+        if problems:
+            sys.exit(1)
+    elif args.restore:
+        source = args.restore
+        if not os.path.isfile(source):
+            source = backup_at(config['backup_dir'], datetime.fromisoformat(source))
+            if source is None:
+                parser.error(f"không có bản sao lưu nào trước {args.restore}")
+        schedule_restore(source, config)
+        try:
+            previous = apply_pending_restore(config)
+            print(f"Đã khôi phục từ {source}" + (f"; database cũ được giữ ở {previous}" if previous else ""))
+        except sqlite3.OperationalError as e:
+            print(f"{e}. Bản khôi phục sẽ được áp dụng ở lần khởi động sau.")
+    else:
+        db = connect(config)
+        try:
+            path, removed, warnings = run_backup(db, config,
+                                                 on_progress=lambda done, total: print(f"\r{done}/{total} trang", end=''))
+            print(f"\nĐã sao lưu vào {path}" + (f", xóa {len(removed)} bản cũ" if removed else ""))
+            for warning in warnings:
+                print(f"Cảnh báo: {warning}")
+        finally:
+            db.close()
+
+if __name__ == '__main__':
+    main()
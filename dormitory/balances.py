@@ -0,0 +1,73 @@
+import argparse
+import sys
+
+from dormitory.db import load_db_config, namedtuple_factory, open_database
+from dormitory.remote import remote_operation
+from dormitory.schema import balance_select, refresh_balances
+
+# Số sinh viên trả về mặc định của students_owing
+OWING_LIMIT = 200
+
+BALANCE_COLUMNS = 'StudentID, MonthlyRent, PendingCharges, PaidTotal, UnpaidFines, Balance'
+
+# Dòng công nợ kèm họ tên sinh viên
+OWING_QUERY = '''SELECT b.StudentID, s.FirstName, s.LastName, b.MonthlyRent, b.PendingCharges, b.PaidTotal,
+        b.UnpaidFines, b.Balance
+    FROM StudentBalances b JOIN Students s ON s.StudentID = b.StudentID'''
+
+# Công nợ của một sinh viên (đọc một dòng theo khóa chính), hoặc None nếu không có sinh viên
+@remote_operation('get_balance')
+def get_balance(db, student_id):
+    cursor = db.cursor()
+    cursor.row_factory = namedtuple_factory
+    return cursor.execute(f'{OWING_QUERY} WHERE b.StudentID = ?', (student_id,)).fetchone()
+
+# Các sinh viên nợ lớn hơn minimum, nợ nhiều nhất trước (quét ngược chỉ mục Balance)
+@remote_operation('students_owing')
+def students_owing(db, minimum=0, limit=OWING_LIMIT):
+    cursor = db.cursor()
+    cursor.row_factory = namedtuple_factory
+    return cursor.execute(f'{OWING_QUERY} WHERE b.Balance > ? ORDER BY b.Balance DESC, b.StudentID LIMIT ?',
+                          (minimum, limit)).fetchall()
+
+# Tính lại toàn bộ bảng công nợ từ dữ liệu nguồn; trả về số sinh viên
+def rebuild_balances(db):
+    with db:
+        db.execute('DELETE FROM StudentBalances')
+        db.execute(refresh_balances('true'))
+    return db.execute('SELECT COUNT(*) FROM StudentBalances').fetchone()[0]
+
+# Mã các sinh viên có dòng công nợ khác với giá trị tính lại từ dữ liệu nguồn
+# (kể cả sinh viên thiếu dòng hoặc dòng thừa)
+def verify_balances(db):
+    expected = balance_select('true')
+    return [row[0] for row in db.execute(f'''
+        SELECT StudentID FROM (SELECT {BALANCE_COLUMNS} FROM StudentBalances EXCEPT {expected})
+        UNION
+        SELECT StudentID FROM ({expected} EXCEPT SELECT {BALANCE_COLUMNS} FROM StudentBalances)
+        ORDER BY StudentID''')]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kiểm tra hoặc tính lại bảng công nợ của sinh viên")
+    parser.add_argument('--rebuild', action='store_true', help="tính lại toàn bộ bảng công nợ từ dữ liệu nguồn")
+    parser.add_argument('--verify', action='store_true', help="so sánh bảng công nợ với dữ liệu nguồn")
+    args = parser.parse_args(argv)
+    if not args.rebuild and not args.verify:
+        parser.error("cần chọn --rebuild hoặc --verify")
+    db = open_database(load_db_config())
+    try:
+        if args.verify:
+            mismatched = verify_balances(db)
+            if mismatched:
+                print(f"{len(mismatched)} sinh viên có công nợ sai: {', '.join(map(str, mismatched[:20]))}")
+            else:
+                print("Bảng công nợ khớp với dữ liệu nguồn")
+        if args.rebuild:
+            print(f"Đã tính lại công nợ của {rebuild_balances(db)} sinh viên")
+        elif args.verify and mismatched:
+            sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
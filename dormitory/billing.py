@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from dormitory.validators import month_range
+
+# Số hợp đồng (theo khoảng ContractID) được lập hóa đơn trong mỗi transaction
+BILLING_CHUNK_SIZE = 5000
+
+# Phương thức thanh toán mặc định của hóa đơn được lập tự động (cột bắt buộc của Payments)
+BILLING_PAYMENT_METHOD = 'Bank Transfer'
+
+# Lập hóa đơn khoản purpose (mã code trong số hóa đơn) cho các hợp đồng đang hiệu lực có ContractID trong
+# (:first, :last]. Số ngày tính tiền là phần giao của [StartDate, EndDate) với tháng; tháng đủ ngày thì
+# tính nguyên amount, thiếu ngày thì tính theo tỉ lệ số ngày. Số hóa đơn BILL-YYYYMM-<code>-<ContractID>
+# là duy nhất nên chạy lại không tạo thêm hóa đơn trùng (ON CONFLICT DO NOTHING).
+def charge_query(purpose, code, amount):
+    return f'''INSERT INTO Payments (StudentID, ContractID, Amount, PaymentDate, Purpose, PaymentMethod, PaymentStatus,
+                                     ReceiptNumber)
+        SELECT StudentID, ContractID,
+               CASE WHEN Days >= :month_days THEN {amount} ELSE ROUND({amount} * Days / :month_days, 2) END,
+               :month_start, '{purpose}', :method, 'Pending', 'BILL-' || :month_code || '-{code}-' || ContractID
+        FROM (SELECT StudentID, ContractID, MonthlyRent,
+                     julianday(MIN(EndDate, :next_month)) - julianday(MAX(StartDate, :month_start)) AS Days
+              FROM Contracts
+              WHERE ContractID > :first AND ContractID <= :last AND ContractStatus = 'Active'
+                AND StudentID IS NOT NULL AND StartDate < :next_month AND EndDate > :month_start)
+        WHERE Days > 0
+        ON CONFLICT (ReceiptNumber) DO NOTHING'''
+
+RENT_QUERY = charge_query('Rent', 'R', 'MonthlyRent')
+UTILITIES_QUERY = charge_query('Utilities', 'U', ':utilities')
+
+# Lập hóa đơn tiền phòng (và tiền điện nước nếu có utilities_amount, theo tỉ lệ ngày như tiền phòng)
+# của tháng chứa ngày day cho mọi hợp đồng Active. Mỗi nhóm chunk_size hợp đồng là một lệnh
+# INSERT ... SELECT trong một transaction riêng, cùng với việc ghi tiến độ vào BillingRuns; nếu bị
+# ngắt giữa chừng thì lần chạy sau của cùng tháng tiếp tục từ nhóm chưa xong. Chạy lại tháng đã xong
+# thì quét lại từ đầu và chỉ lập hóa đơn cho hợp đồng chưa có (ví dụ hợp đồng mới kích hoạt).
+# Hàm tự commit sau mỗi nhóm nên cần một kết nối riêng, không nằm trong transaction khác.
+# on_progress(ContractID đã xử lý tới, ContractID lớn nhất) được gọi sau mỗi nhóm.
+# Trả về (số hóa đơn tiền phòng, số hóa đơn điện nước) được tạo trong lần chạy này.
+def run_billing(db, day, utilities_amount=None, payment_method=BILLING_PAYMENT_METHOD,
+                chunk_size=BILLING_CHUNK_SIZE, on_progress=None):
+    month_start, month_end = month_range(day)
+    next_month = month_end + timedelta(days=1)
+    billing_month = month_start.strftime('%Y-%m')
+    params = {
+        'month_start': month_start.isoformat(),
+        'next_month': next_month.isoformat(),
+        'month_days': (next_month - month_start).days,
+        'month_code': month_start.strftime('%Y%m'),
+        'method': payment_method,
+        'utilities': utilities_amount,
+    }
+
+    with db:
+        db.execute('''INSERT INTO BillingRuns (BillingMonth) VALUES (?)
+            ON CONFLICT (BillingMonth) DO UPDATE SET Status = 'Running', LastContractID = 0, FinishedAt = NULL
+            WHERE Status = 'Completed' ''', (billing_month,))
+    last_id = db.execute('SELECT LastContractID FROM BillingRuns WHERE BillingMonth = ?', (billing_month,)).fetchone()[0]
+    max_id = db.execute('SELECT COALESCE(MAX(ContractID), 0) FROM Contracts').fetchone()[0]
+
+    rent_charges = utility_charges = 0
+    while last_id < max_id:
+        upper = min(last_id + chunk_size, max_id)
+        chunk = dict(params, first=last_id, last=upper)
+        with db:
+            rent = db.execute(RENT_QUERY, chunk).rowcount
+            utilities = db.execute(UTILITIES_QUERY, chunk).rowcount if utilities_amount else 0
+            db.execute('''UPDATE BillingRuns SET LastContractID = ?, RentCharges = RentCharges + ?,
+                UtilityCharges = UtilityCharges + ? WHERE BillingMonth = ?''', (upper, rent, utilities, billing_month))
+        rent_charges += rent
+        utility_charges += utilities
+        last_id = upper
+        if on_progress:
+            on_progress(last_id, max_id)
+
+    with db:
+        db.execute("UPDATE BillingRuns SET Status = 'Completed', FinishedAt = CURRENT_TIMESTAMP WHERE BillingMonth = ?",
+                   (billing_month,))
+    return rent_charges, utility_charges
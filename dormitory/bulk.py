@@ -0,0 +1,51 @@
+import sqlite3
+
+from dormitory.remote import remote_operation
+from dormitory.repository import repositories
+
+# Chạy một thao tác hàng loạt trong transaction của người gọi (ví dụ luồng ghi của QueryExecutor).
+# Cả lô được ghi bằng write_all(keys) (một lệnh executemany) trong một savepoint; nếu có dòng vi phạm
+# ràng buộc thì lô được hoàn tác về savepoint rồi ghi lại từng dòng bằng write_one(key), mỗi dòng một
+# savepoint, để chỉ bỏ các dòng lỗi. Trả về (khóa các dòng đã ghi, danh sách (khóa, lỗi)).
+def run_batch(db, keys, write_all, write_one):
+    # SAVEPOINT ngoài transaction sẽ tự mở transaction và RELEASE sẽ commit luôn, nên mở trước
+    if not db.in_transaction:
+        db.execute('BEGIN')
+    db.execute('SAVEPOINT bulk_batch')
+    try:
+        write_all(keys)
+        db.execute('RELEASE bulk_batch')
+        return list(keys), []
+    except sqlite3.IntegrityError:
+        db.execute('ROLLBACK TO bulk_batch')
+        db.execute('RELEASE bulk_batch')
+
+    written = []
+    failures = []
+    for key in keys:
+        db.execute('SAVEPOINT bulk_row')
+        try:
+            write_one(key)
+            db.execute('RELEASE bulk_row')
+            written.append(key)
+        except sqlite3.IntegrityError as e:
+            db.execute('ROLLBACK TO bulk_row')
+            db.execute('RELEASE bulk_row')
+            failures.append((key, str(e)))
+    return written, failures
+
+# Gán cùng các giá trị values cho mọi dòng có khóa trong keys; trả về (các dòng sau khi sửa, đọc lại
+# trong cùng transaction, danh sách (khóa, lỗi) của các dòng không sửa được)
+@remote_operation('bulk_update', write=True)
+def bulk_update(db, table, keys, values):
+    repository = repositories[table]
+    written, failures = run_batch(db, keys, lambda keys: repository.update_many(db, keys, values),
+                                  lambda key: repository.update(db, key, values))
+    return repository.get_many(db, written), failures
+
+# Xóa các dòng có khóa trong keys; trả về (khóa các dòng đã xóa, danh sách (khóa, lỗi) của các dòng
+# không xóa được, ví dụ còn dòng khác tham chiếu tới)
+@remote_operation('bulk_delete', write=True)
+def bulk_delete(db, table, keys):
+    repository = repositories[table]
+    return run_batch(db, keys, lambda keys: repository.delete_many(db, keys), lambda key: repository.delete(db, key))
@@ -0,0 +1,85 @@
+import sys
+from collections import OrderedDict
+
+from dormitory.schema import TABLE_COLUMNS, CHILD_TABLES, TRIGGER_TABLES
+
+# Dung lượng tối đa (ước lượng, tính bằng byte) của các kết quả được giữ trong bộ đệm
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Các bảng có thể đổi khi ghi vào table: chính bảng đó, các bảng con bị xóa dây chuyền
+# hoặc đặt NULL theo khóa ngoại và các bảng được trigger cập nhật (tính bắc cầu)
+def affected_tables(table):
+    tables = [table]
+    for parent in tables:
+        children = [child for child, _ in CHILD_TABLES.get(parent, ())] + list(TRIGGER_TABLES.get(parent, ()))
+        for child in children:
+            if child not in tables:
+                tables.append(child)
+    return tables
+
+# Ước lượng bộ nhớ của một danh sách dòng (mỗi dòng là tuple/namedtuple)
+def estimate_size(rows):
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size
+
+# Bộ đệm kết quả truy vấn, khóa theo (bảng, truy vấn). Mỗi bảng có một số thế hệ, tăng mỗi khi
+# bảng bị ghi; kết quả chỉ được dùng lại khi thế hệ của bảng không đổi kể từ lúc gửi truy vấn.
+# Khi vượt quá max_bytes thì bỏ các kết quả lâu không dùng nhất (LRU).
+# Chỉ dùng trên luồng giao diện (không cần khóa).
+class QueryCache:
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.generations = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, table):
+        return self.generations.get(table, 0)
+
+    # Kết quả đã lưu của truy vấn key trên bảng table, hoặc None nếu chưa có hoặc đã cũ
+    def get(self, table, key):
+        entry = self.entries.get((table, key))
+        if entry is None or entry[0] != self.generation(table):
+            self.misses += 1
+            return None
+        self.entries.move_to_end((table, key))
+        self.hits += 1
+        return entry[1]
+
+    # Lưu kết quả rows của truy vấn được gửi khi bảng ở thế hệ generation;
+    # bỏ qua nếu bảng đã bị ghi trong lúc truy vấn chạy
+    def put(self, table, key, generation, rows):
+        if generation != self.generation(table):
+            return
+        size = estimate_size(rows)
+        if size > self.max_bytes:
+            return
+        self.discard((table, key))
+        self.entries[(table, key)] = (generation, rows, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            self.discard(next(iter(self.entries)))
+
+    def discard(self, entry_key):
+        entry = self.entries.pop(entry_key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+    # Gọi sau khi ghi (đã commit) vào table: các kết quả của table và bảng con trở thành cũ
+    def invalidate(self, table):
+        tables = affected_tables(table)
+        for name in tables:
+            self.generations[name] = self.generation(name) + 1
+        for entry_key in [entry_key for entry_key in self.entries if entry_key[0] in tables]:
+            self.discard(entry_key)
+
+    # Có tiến trình khác ghi vào database (không biết bảng nào): bỏ toàn bộ bộ đệm
+    def invalidate_all(self):
+        for table in set(TABLE_COLUMNS).union(self.generations, *TRIGGER_TABLES.values()):
+            self.generations[table] = self.generation(table) + 1
+        self.entries.clear()
+        self.size = 0
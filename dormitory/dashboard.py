@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from dormitory.db import namedtuple_factory
+from dormitory.remote import remote_operation
+from dormitory.validators import month_range
+
+# Số ngày tới được tính là "sắp hết hạn" (như bộ lọc trên màn hình hợp đồng)
+EXPIRING_DAYS = 30
+
+# Tỉ lệ lấp đầy theo tòa nhà; Rooms nhỏ nên đọc cả bảng một lượt
+def building_occupancy(db):
+    return db.execute('''SELECT BuildingName, COUNT(*) AS Rooms, SUM(Capacity) AS Beds,
+            SUM(CurrentOccupants) AS Occupants, SUM(Status = 'Under Maintenance') AS UnderMaintenance
+        FROM Rooms GROUP BY BuildingName ORDER BY BuildingName''').fetchall()
+
+# Yêu cầu bảo trì chưa xong theo mức độ khẩn cấp (chỉ đọc chỉ mục idx_requests_status)
+def open_maintenance(db):
+    return db.execute('''SELECT UrgencyLevel, SUM(Status = 'Pending') AS Pending, SUM(Status = 'In Progress') AS InProgress
+        FROM MaintenanceRequests WHERE Status IN ('Pending', 'In Progress')
+        GROUP BY UrgencyLevel ORDER BY UrgencyLevel''').fetchall()
+
+# Tổng tiền phạt chưa nộp, tiền chưa thanh toán và số sinh viên đang nợ, lấy từ bảng công nợ
+# (một dòng mỗi sinh viên) thay vì cộng lại các bảng thanh toán và phạt
+def outstanding_totals(db):
+    return db.execute('''SELECT COALESCE(SUM(UnpaidFines), 0) AS UnpaidFines,
+            COALESCE(SUM(PendingCharges), 0) AS PendingCharges, COALESCE(SUM(Balance > 0), 0) AS Debtors
+        FROM StudentBalances''').fetchall()
+
+# Doanh thu (đã thanh toán) và số khoản chờ thanh toán trong tháng hiện tại (quét theo chỉ mục PaymentDate)
+def monthly_revenue(db, today):
+    start, end = month_range(today)
+    return db.execute('''SELECT COALESCE(SUM(CASE WHEN PaymentStatus = 'Completed' THEN Amount + COALESCE(LateFee, 0) END), 0)
+            AS Revenue, COALESCE(SUM(PaymentStatus = 'Completed'), 0) AS Completed,
+            COALESCE(SUM(PaymentStatus = 'Pending'), 0) AS Pending
+        FROM Payments WHERE PaymentDate BETWEEN ? AND ?''', (start.isoformat(), end.isoformat())).fetchall()
+
+# Hợp đồng đang hiệu lực hết hạn trong EXPIRING_DAYS ngày tới (quét theo chỉ mục EndDate)
+def expiring_contracts(db, today):
+    return db.execute('''SELECT COUNT(*) AS Contracts, COALESCE(SUM(MonthlyRent), 0) AS MonthlyRent
+        FROM Contracts WHERE ContractStatus = 'Active' AND EndDate BETWEEN ? AND ?''',
+                      (today.isoformat(), (today + timedelta(days=EXPIRING_DAYS)).isoformat())).fetchall()
+
+# Các mục của trang tổng quan: tên -> (bảng nguồn, hàm tính, có phụ thuộc ngày không). Mỗi mục chỉ đọc
+# một bảng nên được lưu trong bộ đệm theo thế hệ của bảng đó và chỉ tính lại khi bảng đó bị ghi.
+# Mục phụ thuộc ngày nhận ngày today của máy khách (không dùng ngày của máy chủ database).
+DASHBOARD_SECTIONS = {
+    'occupancy': ('Rooms', building_occupancy, False),
+    'maintenance': ('MaintenanceRequests', open_maintenance, False),
+    'outstanding': ('StudentBalances', outstanding_totals, False),
+    'revenue': ('Payments', monthly_revenue, True),
+    'expiring': ('Contracts', expiring_contracts, True),
+}
+
+# Tính một mục của trang tổng quan (vào ngày today nếu mục phụ thuộc ngày); trả về danh sách namedtuple
+@remote_operation('dashboard_section')
+def dashboard_section(db, name, today=None):
+    _, section, dated = DASHBOARD_SECTIONS[name]
+    cursor = db.cursor()
+    cursor.row_factory = namedtuple_factory
+    return section(cursor, today) if dated else section(cursor)
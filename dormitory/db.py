@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import threading
+import configparser
+from collections import namedtuple
+from functools import lru_cache
+
+from dormitory.schema import create_schema
+
+# Cấu hình kết nối SQLite mặc định. Có thể ghi đè trong mục [database] của file dormitory.ini
+# (hoặc file do biến môi trường DORMITORY_CONFIG chỉ định), hoặc bằng biến môi trường
+# DORMITORY_<TÊN KHÓA>, ví dụ DORMITORY_PATH, DORMITORY_CACHE_SIZE.
+# - journal_mode WAL: người đọc không bị chặn khi đang ghi
+# - synchronous NORMAL: an toàn với WAL mà ít fsync hơn FULL
+# - cache_size âm: kích thước bộ đệm trang tính bằng KiB (mặc định 64 MB)
+# - mmap_size: số byte của file database được ánh xạ vào bộ nhớ (mặc định 256 MB)
+# - busy_timeout: số mili giây chờ khi database đang bị khóa bởi kết nối khác
+# - backup_dir, backup_keep, backup_interval: thư mục chứa bản sao lưu, số bản giữ lại và số phút
+#   giữa hai lần sao lưu tự động khi ứng dụng đang chạy (0 là tắt), xem dormitory.backup
+# - server: địa chỉ máy chủ dormitory.server (ví dụ http://192.168.1.10:8765) để doan.py làm việc
+#   qua máy chủ thay vì mở file database; để trống là dùng file database
+DEFAULT_DB_CONFIG = {
+    'path': 'dormitory.db',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': '-65536',
+    'mmap_size': '268435456',
+    'temp_store': 'MEMORY',
+    'busy_timeout': '5000',
+    'foreign_keys': 'ON',
+    'backup_dir': 'backups',
+    'backup_keep': '14',
+    'backup_interval': '360',
+    'server': '',
+}
+
+# Các giá trị hợp lệ cho những PRAGMA nhận từ khóa
+PRAGMA_CHOICES = {
+    'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'synchronous': {'OFF', 'NORMAL', 'FULL', 'EXTRA'},
+    'temp_store': {'DEFAULT', 'FILE', 'MEMORY'},
+    'foreign_keys': {'ON', 'OFF'},
+}
+
+# Hàm đọc cấu hình kết nối: mặc định -> file cấu hình -> biến môi trường
+def load_db_config(path=None):
+    config = dict(DEFAULT_DB_CONFIG)
+    parser = configparser.ConfigParser()
+    parser.read(path or os.environ.get('DORMITORY_CONFIG', 'dormitory.ini'), encoding='utf-8')
+    if parser.has_section('database'):
+        for key, value in parser.items('database'):
+            if key in config:
+                config[key] = value
+    for key in config:
+        value = os.environ.get('DORMITORY_' + key.upper())
+        if value is not None:
+            config[key] = value
+
+    # Kiểm tra giá trị vì chúng được ghép thẳng vào câu lệnh PRAGMA
+    for key, choices in PRAGMA_CHOICES.items():
+        config[key] = config[key].strip().upper()
+        if config[key] not in choices:
+            raise ValueError(f"Giá trị {key} không hợp lệ: {config[key]}")
+    for key in ('cache_size', 'mmap_size', 'busy_timeout', 'backup_keep', 'backup_interval'):
+        config[key] = int(config[key])
+    return config
+
+# Cấu hình được đọc một lần, ở lần kết nối đầu tiên
+db_config = None
+
+def get_db_config():
+    global db_config
+    if db_config is None:
+        db_config = load_db_config()
+    return db_config
+
+# Người dùng được ghi vào cột ChangedBy của nhật ký thay đổi (hàm SQL audit_user() mà các
+# trigger nhật ký gọi); None với script, cron... chưa đặt người dùng
+audit_username = None
+
+# Đặt người dùng cho mọi thao tác ghi sau đó của tiến trình, ví dụ sau khi đăng nhập
+def set_audit_user(username):
+    global audit_username
+    audit_username = username
+
+# Hàm mở một kết nối mới đã được tinh chỉnh theo cấu hình. Mọi kết nối ghi vào database phải được
+# mở qua hàm này (hoặc tự đăng ký hàm audit_user) vì các trigger nhật ký thay đổi gọi hàm đó.
+# check_same_thread=False cho kết nối dùng chung giữa các luồng (mỗi lúc một luồng, như trong
+# nhóm kết nối đọc của dormitory.server).
+def connect(config=None, check_same_thread=True):
+    config = config or get_db_config()
+    db = sqlite3.connect(config['path'], timeout=config['busy_timeout'] / 1000, check_same_thread=check_same_thread)
+    db.execute(f"PRAGMA busy_timeout = {config['busy_timeout']}")
+    db.execute(f"PRAGMA journal_mode = {config['journal_mode']}")
+    db.execute(f"PRAGMA synchronous = {config['synchronous']}")
+    db.execute(f"PRAGMA cache_size = {config['cache_size']}")
+    db.execute(f"PRAGMA mmap_size = {config['mmap_size']}")
+    db.execute(f"PRAGMA temp_store = {config['temp_store']}")
+    db.execute(f"PRAGMA foreign_keys = {config['foreign_keys']}")
+    db.create_function('audit_user', 0, lambda: audit_username)
+    return db
+
+# Mỗi luồng dùng một kết nối riêng (đối tượng kết nối sqlite3 không nên dùng chung giữa các luồng)
+thread_connections = threading.local()
+
+# Hàm lấy kết nối của luồng hiện tại, mở mới nếu luồng chưa có
+def get_connection():
+    db = getattr(thread_connections, 'db', None)
+    if db is None:
+        db = thread_connections.db = connect()
+    return db
+
+# Hàm mở kết nối và bảo đảm database đã có đủ bảng, chỉ mục và migration
+def open_database(config=None):
+    db = connect(config)
+    create_schema(db)
+    return db
+
+# Kiểu namedtuple cho mỗi bộ cột kết quả (tạo một lần rồi dùng lại)
+@lru_cache(maxsize=None)
+def row_type(fields):
+    return namedtuple('Row', fields, rename=True)
+
+# row_factory trả về mỗi dòng dạng namedtuple, truy cập được cả theo tên cột lẫn theo vị trí
+def namedtuple_factory(cursor, row):
+    fields = tuple(column[0] for column in cursor.description)
+    return row_type(fields)(*row)
@@ -0,0 +1,149 @@
+import queue
+import threading
+
+# Số luồng đọc chạy truy vấn song song
+READER_THREADS = 2
+# Chu kỳ (ms) luồng giao diện kiểm tra kết quả từ các luồng nền
+POLL_INTERVAL = 30
+
+# Bộ thực thi truy vấn trên luồng nền để cửa sổ không bị treo khi truy vấn chậm
+# hoặc database đang bị khóa. Mỗi luồng có kết nối riêng: nhiều luồng đọc và
+# đúng một luồng ghi. Kết quả được đưa về luồng giao diện qua root.after
+# (root là bất kỳ đối tượng nào có after(), module này không phụ thuộc Tkinter).
+class QueryExecutor:
+    def __init__(self, connect, readers=READER_THREADS):
+        self.connect = connect
+        self.read_jobs = queue.Queue()
+        self.write_jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.callbacks = queue.Queue()
+        self.lock = threading.Lock()
+        self.generations = {}
+        self.running = {}
+        self.pending = 0
+        self.busy = False
+        self.root = None
+        self.on_busy = None
+
+        for _ in range(readers):
+            threading.Thread(target=self.worker, args=(self.read_jobs, False), daemon=True).start()
+        threading.Thread(target=self.worker, args=(self.write_jobs, True), daemon=True).start()
+
+    # Gắn vào cửa sổ Tk để nhận kết quả; on_busy(True/False) dùng để hiện trạng thái đang tải
+    def attach(self, root, on_busy=None):
+        self.root = root
+        self.on_busy = on_busy
+        self.busy = False
+        root.after(POLL_INTERVAL, self.poll)
+
+    # Chạy fn(conn) trên luồng đọc. Yêu cầu mới cùng key sẽ thay thế yêu cầu cũ:
+    # yêu cầu cũ đang chạy bị ngắt bằng conn.interrupt() và kết quả của nó bị bỏ qua.
+    def submit(self, fn, on_done=None, on_error=None, key=None):
+        self.enqueue(self.read_jobs, fn, on_done, on_error, key)
+
+    # Chạy fn(conn) trên luồng ghi trong một transaction (commit khi xong, rollback khi lỗi).
+    # quiet: việc chạy định kỳ, không tính là đang bận (không hiện trạng thái đang tải)
+    def submit_write(self, fn, on_done=None, on_error=None, quiet=False):
+        self.enqueue(self.write_jobs, fn, on_done, on_error, None, not quiet)
+
+    # Chạy fn(conn) trên một luồng riêng với kết nối riêng, dành cho việc dài (xuất dữ liệu...)
+    # để không chiếm luồng đọc của các màn hình. quiet: như submit_write (ví dụ sao lưu tự động)
+    def run_in_thread(self, fn, on_done=None, on_error=None, quiet=False):
+        if not quiet:
+            with self.lock:
+                self.pending += 1
+        threading.Thread(target=self.run_job, args=(fn, on_done, on_error, not quiet), daemon=True).start()
+
+    def run_job(self, fn, on_done, on_error, counted=True):
+        db = self.connect()
+        try:
+            outcome = (on_done, fn(db))
+        except Exception as e:
+            outcome = (on_error, e)
+        finally:
+            db.close()
+        self.results.put((None, 0, counted) + outcome)
+
+    # Gọi callback(*args) trên luồng giao diện; dùng được từ bất kỳ luồng nào (ví dụ báo tiến độ)
+    def post(self, callback, *args):
+        self.callbacks.put((callback, args))
+
+    def enqueue(self, jobs, fn, on_done, on_error, key, counted=True):
+        with self.lock:
+            generation = self.supersede(key) if key is not None else 1
+            if counted:
+                self.pending += 1
+        jobs.put((key, generation, counted, fn, on_done, on_error))
+
+    # Hủy yêu cầu đang chờ hoặc đang chạy của key (ví dụ khi người dùng vừa gõ thêm):
+    # truy vấn đang chạy bị ngắt và kết quả của nó bị bỏ qua
+    def cancel(self, key):
+        with self.lock:
+            self.supersede(key)
+
+    # Tăng thế hệ của key và ngắt truy vấn đang chạy của key; gọi khi đang giữ self.lock
+    def supersede(self, key):
+        generation = self.generations.get(key, 0) + 1
+        self.generations[key] = generation
+        running_conn = self.running.get(key)
+        if running_conn is not None:
+            running_conn.interrupt()
+        return generation
+
+    def is_current(self, key, generation):
+        return key is None or self.generations.get(key) == generation
+
+    def worker(self, jobs, is_writer):
+        db = self.connect()
+        while True:
+            key, generation, counted, fn, on_done, on_error = jobs.get()
+            with self.lock:
+                current = self.is_current(key, generation)
+                if current and key is not None:
+                    self.running[key] = db
+            if not current:
+                self.results.put((key, generation, counted, None, None))
+                continue
+
+            try:
+                if is_writer:
+                    with db:
+                        result = fn(db)
+                else:
+                    result = fn(db)
+                outcome = (on_done, result)
+            except Exception as e:
+                outcome = (on_error, e)
+            finally:
+                with self.lock:
+                    if key is not None and self.running.get(key) is db:
+                        del self.running[key]
+            self.results.put((key, generation, counted) + outcome)
+
+    # Chạy trên luồng giao diện: gọi callback của các truy vấn đã xong và còn hiệu lực
+    def poll(self):
+        try:
+            while True:
+                try:
+                    callback, args = self.callbacks.get_nowait()
+                except queue.Empty:
+                    break
+                callback(*args)
+            while True:
+                try:
+                    key, generation, counted, callback, value = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                with self.lock:
+                    if counted:
+                        self.pending -= 1
+                    current = self.is_current(key, generation)
+                if callback is not None and current:
+                    callback(value)
+        finally:
+            busy = self.pending > 0
+            if busy != self.busy:
+                self.busy = busy
+                if self.on_busy:
+                    self.on_busy(busy)
+            self.root.after(POLL_INTERVAL, self.poll)
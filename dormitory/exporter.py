@@ -0,0 +1,85 @@
+import csv
+import json
+
+# Số dòng đọc từ cursor mỗi lần (fetchmany); bộ nhớ dùng khi xuất chỉ phụ thuộc vào số này
+EXPORT_CHUNK_SIZE = 2000
+
+# Các định dạng xuất, chọn theo phần mở rộng của file
+EXPORT_FORMATS = ('.csv', '.jsonl', '.xlsx')
+
+class CsvWriter:
+    def __init__(self, path, names):
+        self.file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(names)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+# Mỗi dòng là một object JSON trên một dòng riêng
+class JsonLinesWriter:
+    def __init__(self, path, names):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.names = names
+
+    def write_rows(self, rows):
+        self.file.writelines(json.dumps(dict(zip(self.names, row)), ensure_ascii=False, default=str) + '\n'
+                             for row in rows)
+
+    def close(self):
+        self.file.close()
+
+# Workbook ở chế độ write_only của openpyxl ghi dần ra file tạm, không giữ cả bảng trong bộ nhớ
+class XlsxWriter:
+    def __init__(self, path, names):
+        try:
+            import openpyxl
+        except ImportError:
+            raise ImportError("Cần cài đặt thư viện openpyxl để xuất file Excel (pip install openpyxl)")
+        self.path = path
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet()
+        self.sheet.append(names)
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+def open_writer(path, names):
+    extension = path[path.rfind('.'):].lower()
+    if extension == '.jsonl':
+        return JsonLinesWriter(path, names)
+    if extension == '.xlsx':
+        return XlsxWriter(path, names)
+    if extension == '.csv':
+        return CsvWriter(path, names)
+    raise ValueError(f"Định dạng không được hỗ trợ: {extension} (chỉ hỗ trợ {', '.join(EXPORT_FORMATS)})")
+
+# Xuất kết quả của query ra file path (CSV, JSON Lines hoặc XLSX theo phần mở rộng).
+# Cursor được đọc theo từng nhóm chunk_size dòng và ghi ngay ra file, nên bộ nhớ không tăng
+# theo số dòng. on_progress(số dòng đã ghi, tổng số dòng) được gọi sau mỗi nhóm.
+# Trả về số dòng đã ghi.
+def export_query(db, query, params, path, on_progress=None, chunk_size=EXPORT_CHUNK_SIZE):
+    total = db.execute(f'SELECT COUNT(*) FROM ({query})', params).fetchone()[0] if on_progress else None
+    cursor = db.execute(query, params)
+    names = [column[0] for column in cursor.description]
+    writer = open_writer(path, names)
+    written = 0
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            writer.write_rows(rows)
+            written += len(rows)
+            if on_progress:
+                on_progress(written, total)
+    finally:
+        writer.close()
+    return written
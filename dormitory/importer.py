@@ -0,0 +1,184 @@
+import csv
+import sqlite3
+from datetime import date, datetime
+
+from dormitory.repository import repositories
+from dormitory.schema import insert_with_batched_index
+from dormitory.validators import is_valid_email, is_valid_phone, is_valid_date, parse_date
+
+# Số dòng được kiểm tra và ghi trong mỗi transaction
+IMPORT_CHUNK_SIZE = 5000
+# Số giá trị tối đa trong một mệnh đề IN khi kiểm tra trùng với database
+LOOKUP_BATCH_SIZE = 500
+
+# Các cột sinh viên có thể có trong file nhập (dòng đầu tiên là tên cột, không phân biệt hoa thường)
+STUDENT_IMPORT_COLUMNS = ('FirstName', 'LastName', 'DateOfBirth', 'Gender', 'ContactNumber', 'Email', 'Address',
+                          'Nationality', 'ProgramOfStudy', 'ProfilePicture', 'EmergencyContactName',
+                          'EmergencyContactNumber', 'AdmissionDate', 'RoomID', 'RoomAllocationDate')
+STUDENT_REQUIRED_COLUMNS = ('FirstName', 'LastName', 'DateOfBirth', 'Email')
+GENDERS = ('Male', 'Female', 'Other')
+
+# Chuyển giá trị đọc từ file về chuỗi (ô Excel có thể là số hoặc ngày)
+def cell_text(value):
+    if isinstance(value, str):
+        return value.strip()
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%d-%m-%Y')
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+# Ghép tên cột trong file với cột của bảng; báo lỗi nếu thiếu cột bắt buộc
+def map_header(header, columns, required):
+    known = {column.lower(): column for column in columns}
+    mapping = [known.get(cell_text(name).replace(' ', '').lower()) for name in header]
+    missing = [column for column in required if column not in mapping]
+    if missing:
+        raise ValueError(f"File thiếu cột bắt buộc: {', '.join(missing)}")
+    return mapping
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.reader(f)
+
+def read_xlsx(path):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError("Cần cài đặt thư viện openpyxl để nhập file Excel (pip install openpyxl)")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+# Đọc file từng dòng một (không nạp cả file vào bộ nhớ); trả về (số dòng trong file, dict cột -> giá trị)
+def read_rows(path, columns, required):
+    reader = read_xlsx(path) if path.lower().endswith(('.xlsx', '.xlsm')) else read_csv(path)
+    mapping = None
+    for line_number, cells in enumerate(reader, start=1):
+        if mapping is None:
+            mapping = map_header(cells, columns, required)
+            continue
+        row = {column: cell_text(cell) for column, cell in zip(mapping, cells) if column}
+        if any(row.values()):
+            yield line_number, row
+
+# Kiểm tra một dòng sinh viên theo cùng quy tắc với form nhập; trả về danh sách lỗi
+def validate_student(row):
+    errors = []
+    for column in STUDENT_REQUIRED_COLUMNS:
+        if not row.get(column):
+            errors.append(f"Thiếu {column}")
+    if row.get('Email') and not is_valid_email(row['Email']):
+        errors.append("Email không hợp lệ")
+    for column in ('ContactNumber', 'EmergencyContactNumber'):
+        if row.get(column) and not is_valid_phone(row[column]):
+            errors.append(f"{column}: số điện thoại không hợp lệ")
+    for column in ('DateOfBirth', 'AdmissionDate', 'RoomAllocationDate'):
+        if row.get(column) and not is_valid_date(row[column]):
+            errors.append(f"{column}: ngày không hợp lệ (DD-MM-YYYY)")
+    if row.get('Gender') and row['Gender'] not in GENDERS:
+        errors.append("Giới tính phải là Male, Female hoặc Other")
+    if row.get('RoomID') and not row['RoomID'].isdigit():
+        errors.append("RoomID phải là số")
+    if not errors and row.get('AdmissionDate') and row.get('RoomAllocationDate'):
+        if parse_date(row['RoomAllocationDate']) < parse_date(row['AdmissionDate']):
+            errors.append("Ngày phân phòng phải sau ngày nhập học")
+    return errors
+
+# Các giá trị trong values đã có trong cột column của bảng (tra theo chỉ mục, từng nhóm nhỏ)
+def existing_values(db, table, column, values):
+    values = list(values)
+    found = set()
+    for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+        batch = values[start:start + LOOKUP_BATCH_SIZE]
+        marks = ', '.join('?' * len(batch))
+        query = f'SELECT {column} FROM {table} WHERE {column} IN ({marks})'
+        found.update(str(row[0]) for row in db.execute(query, batch))
+    return found
+
+# Kiểm tra và ghi một nhóm dòng trong một transaction; trả về số dòng đã thêm
+def import_student_chunk(db, chunk, seen_emails, rejects):
+    valid = []
+    for line_number, row in chunk:
+        errors = validate_student(row)
+        if errors:
+            rejects.append((line_number, row, '; '.join(errors)))
+        elif row['Email'] in seen_emails:
+            rejects.append((line_number, row, "Email bị trùng trong file"))
+        else:
+            seen_emails.add(row['Email'])
+            valid.append((line_number, row))
+
+    taken_emails = existing_values(db, 'Students', 'Email', {row['Email'] for _, row in valid})
+    room_ids = {row['RoomID'] for _, row in valid if row.get('RoomID')}
+    known_rooms = existing_values(db, 'Rooms', 'RoomID', room_ids) if room_ids else set()
+    rows = []
+    for line_number, row in valid:
+        if row['Email'] in taken_emails:
+            rejects.append((line_number, row, "Email đã tồn tại"))
+        elif row.get('RoomID') and row['RoomID'] not in known_rooms:
+            rejects.append((line_number, row, "Phòng không tồn tại"))
+        else:
+            rows.append((line_number, row))
+
+    # Chỉ mục tìm kiếm được cập nhật một lần cho cả nhóm thay vì qua trigger cho từng dòng
+    repository = repositories['Students']
+    try:
+        with db:
+            insert_with_batched_index(db, 'Students', lambda: repository.insert_many(db, [row for _, row in rows]))
+        return len(rows)
+    except sqlite3.IntegrityError:
+        pass
+
+    # Có dòng vi phạm ràng buộc mà bước kiểm tra chưa phát hiện: ghi lại từng dòng để chỉ loại dòng lỗi
+    inserted = 0
+    with db:
+        if not db.in_transaction:
+            db.execute('BEGIN')
+        for line_number, row in rows:
+            try:
+                db.execute('SAVEPOINT import_row')
+                repository.insert(db, row)
+                db.execute('RELEASE import_row')
+                inserted += 1
+            except sqlite3.IntegrityError as e:
+                db.execute('ROLLBACK TO import_row')
+                db.execute('RELEASE import_row')
+                rejects.append((line_number, row, str(e)))
+    return inserted
+
+# Nhập sinh viên từ file CSV hoặc XLSX. Các dòng được đọc dần, kiểm tra và ghi theo nhóm
+# chunk_size dòng, mỗi nhóm một transaction với executemany. on_progress(số dòng đã xử lý)
+# được gọi sau mỗi nhóm. Trả về (số dòng đã thêm, danh sách (số dòng, dữ liệu, lý do) bị loại).
+def import_students(db, path, chunk_size=IMPORT_CHUNK_SIZE, on_progress=None):
+    inserted = 0
+    processed = 0
+    rejects = []
+    seen_emails = set()
+    chunk = []
+    for item in read_rows(path, STUDENT_IMPORT_COLUMNS, STUDENT_REQUIRED_COLUMNS):
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            inserted += import_student_chunk(db, chunk, seen_emails, rejects)
+            processed += len(chunk)
+            chunk = []
+            if on_progress:
+                on_progress(processed)
+    if chunk:
+        inserted += import_student_chunk(db, chunk, seen_emails, rejects)
+        processed += len(chunk)
+        if on_progress:
+            on_progress(processed)
+    return inserted, rejects
+
+# Ghi báo cáo các dòng bị loại ra file CSV (mở được bằng Excel)
+def write_reject_report(path, rejects, columns=STUDENT_IMPORT_COLUMNS):
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(('Line', 'Reason') + tuple(columns))
+        for line_number, row, reason in rejects:
+            writer.writerow((line_number, reason) + tuple(row.get(column, '') for column in columns))
@@ -0,0 +1,103 @@
+import re
+import unicodedata
+
+from dormitory.schema import KEY_COLUMNS, ROWID_COLUMNS, CHILD_TABLES
+
+# Số dòng mặc định của mỗi trang dữ liệu
+PAGE_SIZE = 100
+
+# Chuyển chuỗi người dùng nhập thành truy vấn FTS5: mỗi từ là một tiền tố, các từ nối bằng AND
+def fts_query(search_term):
+    words = search_term.replace('"', ' ').replace('đ', 'd').replace('Đ', 'D').split()
+    return ' '.join(f'"{word}"*' for word in words)
+
+# Các từ (token) của văn bản theo cách bộ tách từ unicode61 remove_diacritics của FTS5 tách:
+# bỏ dấu, chữ thường, tách ở mọi ký tự không phải chữ hoặc số
+def search_tokens(text):
+    text = str(text).replace('đ', 'd').replace('Đ', 'D')
+    text = ''.join(c for c in unicodedata.normalize('NFD', text) if not unicodedata.combining(c))
+    return re.findall(r'[^\W_]+', text.lower())
+
+# Các từ của chuỗi tìm kiếm như fts_query hiểu (mỗi từ là một tiền tố). Trả về None nếu có từ
+# bị tách thành nhiều token (FTS5 xem là một cụm từ, không lọc lại được ở phía ứng dụng).
+def search_words(search_term):
+    words = []
+    for word in search_term.replace('"', ' ').split():
+        tokens = search_tokens(word)
+        if len(tokens) != 1:
+            return None
+        words.append(tokens[0])
+    return words
+
+# Nguồn dữ liệu cho kết quả tìm kiếm: các dòng khớp kèm điểm xếp hạng (bm25) của FTS5
+def search_source(table):
+    fts = f'{table}_fts'
+    rowid = ROWID_COLUMNS[table]
+    return (f'(SELECT {table}.*, {fts}.rank AS SearchRank FROM {fts} '
+            f'JOIN {table} ON {table}.{rowid} = {fts}.rowid WHERE {fts} MATCH ?)')
+
+# Câu truy vấn các dòng của source theo thứ tự order_columns, lọc theo where; after_key thì chỉ lấy
+# các dòng sau khóa cuối đã tải (keyset pagination). columns chọn cột trả về (mặc định tất cả).
+def build_select_query(source, order_columns, where=None, after_key=False, columns='*'):
+    conditions = []
+    if where:
+        conditions.append(f'({where})')
+    if after_key:
+        keys = ', '.join(order_columns)
+        marks = ', '.join('?' * len(order_columns))
+        conditions.append(f'({keys}) > ({marks})')
+
+    query = f'SELECT {columns} FROM {source}'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += f' ORDER BY {", ".join(order_columns)}'
+    return query
+
+# Câu truy vấn một trang dữ liệu: như build_select_query, giới hạn bằng LIMIT ?
+def build_page_query(source, order_columns, where=None, after_key=False):
+    return build_select_query(source, order_columns, where, after_key) + ' LIMIT ?'
+
+# Các truy vấn có sẵn của ứng dụng kèm tham số mẫu, dùng để kiểm tra kế hoạch thực thi.
+# Trang đầu đọc theo thứ tự khóa chính và dừng sau LIMIT dòng nên được phép quét bảng.
+BOUNDED_SCAN_QUERIES = {f'{table}: trang đầu' for table in KEY_COLUMNS}
+
+def builtin_queries():
+    queries = {}
+    for table, keys in KEY_COLUMNS.items():
+        sample_key = (1,) * len(keys)
+        queries[f'{table}: trang đầu'] = (build_page_query(table, keys), (PAGE_SIZE,))
+        queries[f'{table}: trang tiếp'] = (build_page_query(table, keys, after_key=True), sample_key + (PAGE_SIZE,))
+        order = ('SearchRank',) + keys
+        queries[f'{table}: tìm kiếm'] = (build_page_query(search_source(table), order, after_key=True),
+                                         ('"a"*', 0.0) + sample_key + (PAGE_SIZE,))
+        where = ' AND '.join(f'{key} = ?' for key in keys)
+        queries[f'{table}: xóa'] = (f'DELETE FROM {table} WHERE {where}', sample_key)
+        for child, column in CHILD_TABLES.get(table, ()):
+            queries[f'{table}: xóa dây chuyền {child}.{column}'] = (f'SELECT 1 FROM {child} WHERE {column} = ?', (1,))
+
+    queries['Payments: lọc theo tháng'] = (
+        build_page_query('Payments', ('PaymentDate', 'PaymentID'), 'PaymentDate BETWEEN ? AND ?', after_key=True),
+        ('2024-01-01', '2024-01-31', '2024-01-01', 1, PAGE_SIZE))
+    queries['Contracts: hết hạn trong 30 ngày'] = (
+        build_page_query('Contracts', ('EndDate', 'ContractID'), 'EndDate BETWEEN ? AND ?', after_key=True),
+        ('2024-01-01', '2024-01-31', '2024-01-01', 1, PAGE_SIZE))
+    return queries
+
+# Chạy EXPLAIN QUERY PLAN cho mọi truy vấn có sẵn; trả về danh sách (tên, các bước, có quét toàn bảng không)
+def explain_queries(db):
+    report = []
+    for name, (query, params) in builtin_queries().items():
+        steps = [row[3] for row in db.execute('EXPLAIN QUERY PLAN ' + query, params)]
+        full_scan = name not in BOUNDED_SCAN_QUERIES and any(
+            step.startswith('SCAN') and 'VIRTUAL TABLE' not in step for step in steps)
+        report.append((name, steps, full_scan))
+    return report
+
+def print_query_plans(db):
+    report = explain_queries(db)
+    for name, steps, full_scan in report:
+        print(('[SCAN] ' if full_scan else '[OK]   ') + name)
+        for step in steps:
+            print('         ' + step)
+    scans = sum(1 for _, _, full_scan in report if full_scan)
+    print(f'{len(report)} truy vấn, {scans} truy vấn quét toàn bảng')
@@ -0,0 +1,183 @@
+import functools
+import http.client
+import json
+import socket
+from datetime import date
+from urllib.parse import urlencode, urlsplit
+
+from dormitory.db import row_type
+
+# Thời gian (giây) chờ máy chủ trả lời một yêu cầu
+REQUEST_TIMEOUT = 30
+
+# Các thao tác gọi được qua máy chủ (dormitory.server): tên -> (hàm, có ghi không, là phương thức
+# của TableRepository không). Hàm được đánh dấu bằng remote_operation/remote_method.
+OPERATIONS = {}
+
+# Lỗi do máy chủ trả về (thông báo lỗi gốc của thao tác) hoặc lỗi kết nối tới máy chủ
+class RemoteError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+# Đánh dấu hàm fn(db, ...) là thao tác gọi được qua máy chủ. Khi db là RemoteConnection (giao diện
+# chạy với máy chủ), lời gọi được gửi sang máy chủ và máy chủ chạy chính hàm này trên database của nó;
+# với kết nối sqlite3 thì chạy như bình thường. client(db, *args) thay cho việc gửi nguyên lời gọi
+# (ví dụ đăng nhập); khi đó thao tác không được gọi trực tiếp qua /api/call.
+def remote_operation(name, write=False, client=None):
+    def decorate(fn):
+        if client is None:
+            OPERATIONS[name] = (fn, write, False)
+
+        @functools.wraps(fn)
+        def wrapper(db, *args, **kwargs):
+            if isinstance(db, RemoteConnection):
+                if client is not None:
+                    return client(db, *args, **kwargs)
+                return db.call(name, *args, **kwargs)
+            return fn(db, *args, **kwargs)
+        return wrapper
+    return decorate
+
+# Như remote_operation cho phương thức method(self, db, ...) của TableRepository; tên bảng được gửi
+# kèm làm tham số đầu tiên
+def remote_method(name, write=False):
+    def decorate(method):
+        OPERATIONS[name] = (method, write, True)
+
+        @functools.wraps(method)
+        def wrapper(self, db, *args, **kwargs):
+            if isinstance(db, RemoteConnection):
+                return db.call(name, self.table, *args, **kwargs)
+            return method(self, db, *args, **kwargs)
+        return wrapper
+    return decorate
+
+# Mã hóa tham số và kết quả sang JSON: ngày thành {"$date": "YYYY-MM-DD"}, dòng namedtuple thành
+# {"$row": [các cột], "values": [...]}, danh sách dòng cùng bộ cột thành {"$rows": [các cột], "values": [[...]]}
+def encode(value):
+    if isinstance(value, date):
+        return {'$date': value.isoformat()}
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        return {'$row': list(value._fields), 'values': [encode(item) for item in value]}
+    if isinstance(value, (list, tuple)):
+        if value and all(hasattr(item, '_fields') and item._fields == value[0]._fields for item in value):
+            return {'$rows': list(value[0]._fields), 'values': [[encode(item) for item in row] for row in value]}
+        return [encode(item) for item in value]
+    if isinstance(value, dict):
+        return {key: encode(item) for key, item in value.items()}
+    return value
+
+def decode(value):
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if isinstance(value, dict):
+        if '$date' in value:
+            return date.fromisoformat(value['$date'])
+        if '$row' in value:
+            return row_type(tuple(value['$row']))(*[decode(item) for item in value['values']])
+        if '$rows' in value:
+            row_class = row_type(tuple(value['$rows']))
+            return [row_class(*[decode(item) for item in row]) for row in value['values']]
+        return {key: decode(item) for key, item in value.items()}
+    return value
+
+# Máy chủ mà giao diện làm việc cùng: địa chỉ và phiên đăng nhập, dùng chung cho mọi RemoteConnection
+class RemoteServer:
+    def __init__(self, url):
+        parts = urlsplit(url if '://' in url else 'http://' + url)
+        if parts.scheme != 'http' or not parts.hostname:
+            raise ValueError(f"Địa chỉ máy chủ không hợp lệ: {url}")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.token = None
+
+    def connect(self):
+        return RemoteConnection(self)
+
+# Kết nối tới máy chủ, dùng thay cho kết nối sqlite3 trong QueryExecutor (mỗi luồng một kết nối
+# HTTP giữ mở). Các chức năng chỉ chạy SQL trực tiếp (xuất/nhập file, lập hóa đơn, xếp phòng
+# hàng loạt, sao lưu) báo lỗi rõ ràng thay vì chạy.
+class RemoteConnection:
+    def __init__(self, server):
+        self.server = server
+        self.http = http.client.HTTPConnection(server.host, server.port, timeout=REQUEST_TIMEOUT)
+        # Phiên bản dữ liệu đã biết của máy chủ và số lần thấy máy khách khác ghi (xem poll_remote_changes)
+        self.version = None
+        self.foreign_changes = 0
+        self.interrupted = False
+
+    def request(self, method, path, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if self.server.token:
+            headers['Authorization'] = f'Bearer {self.server.token}'
+        if self.interrupted:
+            # Socket đã bị ngắt (có thể sau khi yêu cầu trước đã xong): mở kết nối mới
+            self.interrupted = False
+            self.http.close()
+        try:
+            self.http.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = self.http.getresponse()
+            payload = json.loads(response.read() or b'null')
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            self.http.close()
+            raise RemoteError(f"Không kết nối được máy chủ {self.server.host}:{self.server.port}: {e}") from e
+        if response.status >= 400:
+            message = payload.get('error') if isinstance(payload, dict) else None
+            raise RemoteError(message or f"HTTP {response.status}", response.status)
+        return payload
+
+    # Gọi thao tác name trên máy chủ; trả về kết quả đã giải mã
+    def call(self, name, *args, **kwargs):
+        payload = self.request('POST', f'/api/call/{name}', {'args': encode(args), 'kwargs': encode(kwargs)})
+        return decode(payload['result'])
+
+    # Luồng ghi của QueryExecutor mở transaction bằng `with db:`; với máy chủ mỗi thao tác là một
+    # transaction riêng trên luồng ghi của máy chủ
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    # Ngắt yêu cầu đang chờ (QueryExecutor gọi khi yêu cầu bị thay thế): đóng socket để luồng
+    # đang chờ trả lời thoát ra; truy vấn trên máy chủ vẫn chạy hết nhưng kết quả bị bỏ qua
+    def interrupt(self):
+        self.interrupted = True
+        sock = self.http.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self):
+        self.http.close()
+
+    def execute(self, *args, **kwargs):
+        raise RemoteError("Chức năng này chỉ dùng được khi làm việc trực tiếp với file database")
+
+    cursor = executemany = execute
+
+# Đăng nhập vào máy chủ; phiên đăng nhập được dùng cho mọi kết nối tới máy chủ đó
+def remote_login(db, username, password):
+    db.server.token = None
+    try:
+        db.server.token = db.request('POST', '/api/login', {'username': username, 'password': password})['token']
+    except RemoteError as e:
+        if e.status == 401:
+            return False
+        raise
+    return True
+
+# Thay đổi do máy khách khác (hoặc tiến trình khác trên máy chủ) ghi từ lần hỏi trước: trả về
+# (các bảng cần bỏ khỏi bộ đệm, phiên bản) giống external_writes với database cục bộ. Phiên bản chỉ
+# đổi khi có thay đổi không phải của chính máy khách này; danh sách bảng rỗng kèm phiên bản mới nghĩa
+# là không biết bảng nào đã đổi (bỏ cả bộ đệm).
+def poll_remote_changes(db):
+    first = db.version is None
+    changes = db.request('GET', '/api/changes' + ('' if first else '?' + urlencode({'since': db.version})))
+    db.version = changes['version']
+    if not first and changes['tables'] != []:
+        db.foreign_changes += 1
+    return changes['tables'] or [], db.foreign_changes
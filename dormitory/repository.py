@@ -0,0 +1,202 @@
+from dormitory.db import namedtuple_factory
+from dormitory.queries import (PAGE_SIZE, fts_query, search_source, search_tokens, search_words, build_select_query,
+                               build_page_query)
+from dormitory.remote import remote_method
+from dormitory.schema import (TABLE_COLUMNS, KEY_COLUMNS, GENERATED_KEY_TABLES, DATE_COLUMNS, SEARCH_COLUMNS,
+                              OPTIONAL_REFERENCE_COLUMNS)
+from dormitory.validators import is_valid_date, to_db_date
+
+# Số khóa tối đa trong một câu lệnh đọc nhiều dòng theo khóa (get_many)
+KEY_BATCH_SIZE = 500
+
+# Truy cập dữ liệu của một bảng: đọc theo trang, tìm kiếm, thêm/sửa/xóa và thêm hàng loạt.
+# Mọi phương thức nhận kết nối db làm tham số đầu tiên, nên dùng được với kết nối của
+# luồng nào cũng được (luồng nền của giao diện, script, cron...). Các phương thức ghi
+# không tự commit: người gọi quyết định phạm vi transaction (ví dụ `with db:`).
+# Các dòng đọc ra là namedtuple, truy cập được theo tên cột (row.StudentID) hoặc theo vị trí.
+class TableRepository:
+    def __init__(self, table):
+        self.table = table
+        self.columns = TABLE_COLUMNS[table]
+        self.key_columns = KEY_COLUMNS[table]
+        self.date_columns = DATE_COLUMNS.get(table, ())
+        self.optional_references = OPTIONAL_REFERENCE_COLUMNS.get(table, ())
+        self.search_columns = SEARCH_COLUMNS.get(table, ())
+        self.generated_key = table in GENERATED_KEY_TABLES
+
+    def execute(self, db, query, params=()):
+        cursor = db.cursor()
+        cursor.row_factory = namedtuple_factory
+        return cursor.execute(query, params)
+
+    # Khóa chính dạng tuple; chấp nhận một giá trị đơn với bảng có khóa một cột
+    def key_tuple(self, key):
+        if not isinstance(key, (tuple, list)):
+            key = (key,)
+        if len(key) != len(self.key_columns):
+            raise ValueError(f"Khóa của bảng {self.table} phải gồm {', '.join(self.key_columns)}")
+        return tuple(key)
+
+    def key_condition(self):
+        return ' AND '.join(f'{column} = ?' for column in self.key_columns)
+
+    # Kiểm tra tên cột và chuẩn hóa giá trị trước khi ghi: ngày DD-MM-YYYY đổi sang YYYY-MM-DD,
+    # ô ngày hoặc khóa ngoại không bắt buộc bỏ trống thì lưu NULL
+    def normalize(self, values):
+        unknown = [column for column in values if column not in self.columns]
+        if unknown:
+            raise ValueError(f"Bảng {self.table} không có cột: {', '.join(unknown)}")
+        row = {}
+        for column, value in values.items():
+            if column in self.date_columns and isinstance(value, str):
+                value = to_db_date(value)
+            elif column in self.optional_references and value == '':
+                value = None
+            row[column] = value
+        return row
+
+    # Nguồn dữ liệu của một lần tìm kiếm: (nguồn, tham số của nguồn, điều kiện, tham số, thứ tự).
+    # Nhập một ngày (DD-MM-YYYY) thì lọc theo các cột ngày của bảng, còn lại tìm toàn văn (FTS5)
+    # và xếp theo độ liên quan; chuỗi rỗng thì lấy cả bảng.
+    def search_plan(self, search_term):
+        search_term = search_term.strip()
+        if self.is_date_search(search_term):
+            where = ' OR '.join(f'{column} = ?' for column in self.date_columns)
+            params = (to_db_date(search_term),) * len(self.date_columns)
+            return self.table, (), where, params, self.key_columns
+
+        match = fts_query(search_term)
+        if not match:
+            return self.table, (), None, (), self.key_columns
+        return search_source(self.table), (match,), None, (), ('SearchRank',) + tuple(self.key_columns)
+
+    def is_date_search(self, search_term):
+        return bool(self.date_columns) and is_valid_date(search_term.strip())
+
+    # new_term chỉ thu hẹp kết quả của old_term (mọi dòng khớp new_term đều khớp old_term), ví dụ
+    # gõ thêm chữ hoặc thêm từ; khi đó có thể lọc trên kết quả cũ bằng matches() thay vì truy vấn lại
+    def narrows(self, old_term, new_term):
+        if not self.can_match(old_term) or not self.can_match(new_term):
+            return False
+        old_words = search_words(old_term)
+        new_words = search_words(new_term)
+        if not new_words:
+            return False
+        return all(any(new.startswith(old) for new in new_words) for old in old_words)
+
+    # Có kiểm tra được một dòng có khớp search_term bằng matches() không
+    # (không áp dụng cho tìm theo ngày và cụm từ có dấu câu)
+    def can_match(self, search_term):
+        return not self.is_date_search(search_term) and search_words(search_term) is not None
+
+    # Dòng row có khớp chuỗi tìm kiếm không, theo cùng quy tắc với chỉ mục FTS5
+    # (mỗi từ là tiền tố của một từ nào đó trong các cột được đánh chỉ mục)
+    def matches(self, row, search_term):
+        tokens = []
+        for column in self.search_columns:
+            value = getattr(row, column)
+            if value is not None:
+                tokens.extend(search_tokens(value))
+        return all(any(token.startswith(word) for token in tokens) for word in search_words(search_term))
+
+    # Đọc một trang từ source (sau khóa after nếu có)
+    def fetch(self, db, source, source_params, where, params, order_columns, after, limit):
+        query = build_page_query(source, order_columns, where, after is not None)
+        params = list(source_params) + list(params)
+        if after is not None:
+            params.extend(after)
+        params.append(limit)
+        return self.execute(db, query, params).fetchall()
+
+    # Một trang dữ liệu theo thứ tự order_columns (mặc định là khóa chính), bắt đầu sau khóa after
+    @remote_method('page')
+    def page(self, db, where=None, params=(), order_columns=None, after=None, limit=PAGE_SIZE):
+        return self.fetch(db, self.table, (), where, params, order_columns or self.key_columns, after, limit)
+
+    # Thứ tự các dòng trả về bởi search(term), dùng để lấy khóa của trang tiếp theo
+    def search_order(self, search_term):
+        return self.search_plan(search_term)[4]
+
+    @remote_method('search')
+    def search(self, db, search_term, after=None, limit=PAGE_SIZE):
+        source, source_params, where, params, order_columns = self.search_plan(search_term)
+        return self.fetch(db, source, source_params, where, params, order_columns, after, limit)
+
+    # Câu truy vấn (không phân trang) lấy toàn bộ kết quả của page(where, params, order_columns)
+    # hoặc của search(search_term); chỉ gồm các cột của bảng. Dùng để xuất dữ liệu.
+    def select_query(self, where=None, params=(), order_columns=None, search_term=None):
+        source, source_params, order = self.table, (), order_columns or self.key_columns
+        if search_term is not None:
+            source, source_params, where, params, order = self.search_plan(search_term)
+        query = build_select_query(source, order, where, columns=', '.join(self.columns))
+        return query, tuple(source_params) + tuple(params)
+
+    @remote_method('get')
+    def get(self, db, key):
+        query = f'SELECT * FROM {self.table} WHERE {self.key_condition()}'
+        return self.execute(db, query, self.key_tuple(key)).fetchone()
+
+    # Đọc các dòng có khóa trong keys (dòng không còn tồn tại thì bỏ qua), theo từng nhóm
+    # KEY_BATCH_SIZE khóa để không vượt giới hạn số tham số của một câu lệnh
+    @remote_method('get_many')
+    def get_many(self, db, keys):
+        keys = [self.key_tuple(key) for key in keys]
+        columns = ', '.join(self.key_columns)
+        marks = '(' + ', '.join('?' * len(self.key_columns)) + ')'
+        rows = []
+        for start in range(0, len(keys), KEY_BATCH_SIZE):
+            batch = keys[start:start + KEY_BATCH_SIZE]
+            query = f'SELECT * FROM {self.table} WHERE ({columns}) IN (VALUES {", ".join([marks] * len(batch))})'
+            rows.extend(self.execute(db, query, [value for key in batch for value in key]).fetchall())
+        return rows
+
+    # Thêm một dòng; trả về khóa chính của dòng mới (rowid với bảng có khóa tự tăng)
+    @remote_method('insert', write=True)
+    def insert(self, db, values):
+        row = self.normalize(values)
+        columns = ', '.join(row)
+        marks = ', '.join('?' * len(row))
+        cursor = db.execute(f'INSERT INTO {self.table} ({columns}) VALUES ({marks})', tuple(row.values()))
+        if self.generated_key:
+            return cursor.lastrowid
+        return tuple(row.get(column) for column in self.key_columns)
+
+    # Thêm nhiều dòng cùng bộ cột bằng một lệnh executemany; trả về số dòng đã thêm
+    def insert_many(self, db, rows):
+        rows = [self.normalize(values) for values in rows]
+        if not rows:
+            return 0
+        columns = list(rows[0])
+        marks = ', '.join('?' * len(columns))
+        query = f'INSERT INTO {self.table} ({", ".join(columns)}) VALUES ({marks})'
+        cursor = db.executemany(query, [tuple(row.get(column) for column in columns) for row in rows])
+        return cursor.rowcount
+
+    # Sửa các cột trong values của dòng có khóa key; trả về số dòng bị ảnh hưởng
+    @remote_method('update', write=True)
+    def update(self, db, key, values):
+        row = self.normalize(values)
+        assignments = ', '.join(f'{column} = ?' for column in row)
+        query = f'UPDATE {self.table} SET {assignments} WHERE {self.key_condition()}'
+        return db.execute(query, tuple(row.values()) + self.key_tuple(key)).rowcount
+
+    # Sửa cùng các cột values của mọi dòng có khóa trong keys bằng một lệnh executemany;
+    # trả về số dòng bị ảnh hưởng
+    def update_many(self, db, keys, values):
+        row = self.normalize(values)
+        assignments = ', '.join(f'{column} = ?' for column in row)
+        query = f'UPDATE {self.table} SET {assignments} WHERE {self.key_condition()}'
+        return db.executemany(query, [tuple(row.values()) + self.key_tuple(key) for key in keys]).rowcount
+
+    @remote_method('delete', write=True)
+    def delete(self, db, key):
+        query = f'DELETE FROM {self.table} WHERE {self.key_condition()}'
+        return db.execute(query, self.key_tuple(key)).rowcount
+
+    # Xóa nhiều dòng theo danh sách khóa bằng một lệnh executemany
+    def delete_many(self, db, keys):
+        query = f'DELETE FROM {self.table} WHERE {self.key_condition()}'
+        return db.executemany(query, [self.key_tuple(key) for key in keys]).rowcount
+
+# Repository của từng bảng nghiệp vụ (bảng Users được truy cập qua dormitory.auth)
+repositories = {table: TableRepository(table) for table in KEY_COLUMNS}
@@ -0,0 +1,171 @@
+import heapq
+from collections import Counter, defaultdict, namedtuple
+from datetime import date
+
+from dormitory.db import namedtuple_factory
+from dormitory.remote import remote_operation
+
+# Số phòng trả về mặc định của find_free_beds
+FREE_BED_LIMIT = 20
+
+# Các phòng còn ít nhất beds giường trống, lọc theo tòa nhà và loại phòng nếu có.
+# Phòng còn ít giường trống được xếp trước để lấp đầy phòng đang ở dở trước khi mở phòng mới.
+# Điều kiện Status = 'Available' và biểu thức Capacity - CurrentOccupants khớp với chỉ mục
+# idx_rooms_free_beds, nên khi có tòa nhà và loại phòng truy vấn chỉ đọc đúng các phòng trả về.
+@remote_operation('find_free_beds')
+def find_free_beds(db, building=None, room_type=None, beds=1, limit=FREE_BED_LIMIT):
+    conditions = ["Status = 'Available'", 'Capacity - CurrentOccupants >= ?']
+    params = [beds]
+    if building:
+        conditions.append('BuildingName = ?')
+        params.append(building)
+    if room_type:
+        conditions.append('Type = ?')
+        params.append(room_type)
+    params.append(limit)
+    cursor = db.cursor()
+    cursor.row_factory = namedtuple_factory
+    return cursor.execute(f'''SELECT RoomID, RoomNumber, BuildingName, FloorNumber, Type, Capacity, CurrentOccupants,
+            Capacity - CurrentOccupants AS FreeBeds
+        FROM Rooms WHERE {' AND '.join(conditions)}
+        ORDER BY Capacity - CurrentOccupants, RoomID LIMIT ?''', params).fetchall()
+
+# Một dòng của kế hoạch xếp phòng hàng loạt
+Assignment = namedtuple('Assignment', ('StudentID', 'FirstName', 'LastName', 'Gender', 'ProgramOfStudy', 'RoomID',
+                                       'RoomNumber', 'BuildingName', 'AllocationDate'))
+
+# Ghi chú của các dòng lịch sử phân phòng do xếp phòng hàng loạt tạo ra
+BATCH_ALLOCATION_NOTE = 'Xếp phòng hàng loạt'
+
+# Giới tính của phòng đang có cả nam và nữ (không xếp thêm ai vào)
+MIXED = object()
+
+# Phòng còn giường trống trong lúc lập kế hoạch; gender và program là giới tính và ngành học
+# (ngành đông nhất) của người đang ở, None nếu phòng trống
+class RoomSlot:
+    def __init__(self, row, rank):
+        self.room_id = row.RoomID
+        self.room_number = row.RoomNumber
+        self.building = row.BuildingName
+        self.capacity = row.Capacity
+        self.free = row.Capacity - row.CurrentOccupants
+        self.rank = rank
+        self.gender = None
+        self.program = None
+
+# Các phòng còn giường trống (không bảo trì), kèm giới tính và ngành học của người đang ở
+def load_room_slots(db, ranks):
+    cursor = db.cursor()
+    cursor.row_factory = namedtuple_factory
+    rooms = {}
+    for row in cursor.execute('''SELECT RoomID, RoomNumber, BuildingName, Capacity, CurrentOccupants FROM Rooms
+            WHERE Status = 'Available' AND Capacity - CurrentOccupants >= 1'''):
+        rooms[row.RoomID] = RoomSlot(row, ranks.get(row.BuildingName, len(ranks)))
+
+    genders = defaultdict(set)
+    programs = defaultdict(Counter)
+    for room_id, gender, program in db.execute('''SELECT s.RoomID, s.Gender, s.ProgramOfStudy
+            FROM Students s JOIN Rooms r ON r.RoomID = s.RoomID
+            WHERE r.Status = 'Available' AND r.Capacity - r.CurrentOccupants >= 1'''):
+        genders[room_id].add(gender)
+        programs[room_id][program] += 1
+    for room_id, room_genders in genders.items():
+        room = rooms[room_id]
+        room.gender = room_genders.pop() if len(room_genders) == 1 else MIXED
+        room.program = programs[room_id].most_common(1)[0][0]
+    return list(rooms.values())
+
+# Lấy phòng còn giường đầu tiên trong heap (bỏ qua các mục đã hết giường)
+def pop_room(heap):
+    while heap:
+        room = heapq.heappop(heap)[2]
+        if room.free > 0:
+            return room
+    return None
+
+# Lấy một phòng trống ở tòa nhà được ưu tiên nhất còn phòng: phòng nhỏ nhất đủ chỗ cho needed
+# sinh viên cùng nhóm, nếu không có thì phòng lớn nhất (để nhóm ở cùng nhau nhiều nhất có thể)
+def pop_empty_room(empty_rooms, needed):
+    for rank in sorted(empty_rooms):
+        by_capacity = empty_rooms[rank]
+        capacities = sorted(capacity for capacity, rooms in by_capacity.items() if rooms)
+        if not capacities:
+            continue
+        fitting = [capacity for capacity in capacities if capacity >= needed]
+        return heapq.heappop(by_capacity[fitting[0] if fitting else capacities[-1]])[1]
+    return None
+
+# Lập kế hoạch xếp các sinh viên chưa có phòng vào các phòng còn giường (không ghi gì vào database).
+# Sinh viên được chia nhóm theo giới tính và ngành học, nhóm đông xếp trước, trong nhóm ai nhập học
+# trước xếp trước. Mỗi nhóm lần lượt lấp: phòng đang ở dở của cùng giới tính và ngành, phòng trống
+# (vừa với số người còn lại của nhóm), rồi phòng đang ở dở của cùng giới tính. Không xếp khác giới
+# tính vào cùng phòng. buildings là danh sách tòa nhà theo thứ tự ưu tiên (tòa không có trong danh
+# sách dùng sau cùng). Các phòng được lấy qua heap/bucket nên thời gian gần tuyến tính theo số
+# sinh viên và số phòng.
+# Ngày phân phòng là allocation_date (YYYY-MM-DD, mặc định hôm nay), hoặc ngày nhập học nếu muộn hơn.
+# Trả về (danh sách Assignment, danh sách mã sinh viên chưa xếp được).
+def plan_room_assignments(db, buildings=(), allocation_date=None):
+    allocation_date = allocation_date or date.today().isoformat()
+    ranks = {name: rank for rank, name in enumerate(buildings)}
+
+    partial_by_program = defaultdict(list)
+    partial_by_gender = defaultdict(list)
+    empty_rooms = defaultdict(lambda: defaultdict(list))
+
+    def push_partial(room):
+        entry = (room.rank, room.room_id, room)
+        heapq.heappush(partial_by_program[(room.gender, room.program)], entry)
+        heapq.heappush(partial_by_gender[room.gender], entry)
+
+    for room in load_room_slots(db, ranks):
+        if room.free == room.capacity:
+            heapq.heappush(empty_rooms[room.rank][room.capacity], (room.room_id, room))
+        elif room.gender is not MIXED:
+            push_partial(room)
+
+    cursor = db.cursor()
+    cursor.row_factory = namedtuple_factory
+    groups = defaultdict(list)
+    for student in cursor.execute('''SELECT StudentID, FirstName, LastName, Gender, ProgramOfStudy, AdmissionDate
+            FROM Students WHERE RoomID IS NULL ORDER BY AdmissionDate, StudentID'''):
+        groups[(student.Gender, student.ProgramOfStudy)].append(student)
+
+    assignments = []
+    unassigned = []
+    for key, students in sorted(groups.items(), key=lambda item: -len(item[1])):
+        gender = key[0]
+        placed = 0
+        while placed < len(students):
+            room = (pop_room(partial_by_program[key]) or pop_empty_room(empty_rooms, len(students) - placed)
+                    or pop_room(partial_by_gender[gender]))
+            if room is None:
+                unassigned.extend(student.StudentID for student in students[placed:])
+                break
+            if room.gender is None:
+                room.gender, room.program = key
+            for student in students[placed:placed + room.free]:
+                assignments.append(Assignment(
+                    student.StudentID, student.FirstName, student.LastName, student.Gender, student.ProgramOfStudy,
+                    room.room_id, room.room_number, room.building,
+                    max(allocation_date, student.AdmissionDate or allocation_date)))
+            taken = min(room.free, len(students) - placed)
+            placed += taken
+            room.free -= taken
+            if room.free:
+                push_partial(room)
+    return assignments, unassigned
+
+# Ghi kế hoạch xếp phòng: mỗi sinh viên một dòng RoomAllocationHistory chưa có ngày trả phòng, trigger
+# chuyển sinh viên vào phòng và cập nhật số người ở. Không tự commit: gọi trong một transaction để
+# hoặc ghi tất cả, hoặc không ghi gì (ví dụ khi phòng đã đầy do có người xếp phòng sau lúc lập kế hoạch).
+def apply_room_assignments(db, assignments):
+    db.executemany('INSERT INTO RoomAllocationHistory (StudentID, RoomID, AllocationDate, Notes) VALUES (?, ?, ?, ?)',
+                   [(a.StudentID, a.RoomID, a.AllocationDate, BATCH_ALLOCATION_NOTE) for a in assignments])
+    return len(assignments)
+
+# Lập kế hoạch rồi ghi ngay (dry_run=True thì chỉ lập kế hoạch); trả về như plan_room_assignments
+def assign_rooms(db, buildings=(), allocation_date=None, dry_run=False):
+    assignments, unassigned = plan_room_assignments(db, buildings, allocation_date)
+    if not dry_run:
+        apply_room_assignments(db, assignments)
+    return assignments, unassigned
@@ -0,0 +1,826 @@
+import sqlite3
+
+from dormitory.validators import parse_date
+
+# Câu lệnh tạo các bảng của database
+create_tables_query = """
+-- TABLE: Users
+CREATE TABLE IF NOT EXISTS Users (
+    UserID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Username TEXT UNIQUE NOT NULL,
+    Password TEXT NOT NULL,
+    CreatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- TABLE: Rooms
+CREATE TABLE IF NOT EXISTS Rooms (
+    RoomID INTEGER PRIMARY KEY AUTOINCREMENT,
+    RoomNumber TEXT UNIQUE NOT NULL,
+    Type TEXT CHECK (Type IN ('Single', 'Double', 'Shared')) NOT NULL,
+    Capacity INTEGER CHECK (Capacity > 0) NOT NULL,
+    CurrentOccupants INTEGER DEFAULT 0 CHECK (CurrentOccupants >= 0 AND CurrentOccupants <= Capacity),
+    Status TEXT CHECK (Status IN ('Available', 'Occupied', 'Under Maintenance')) DEFAULT 'Available',
+    FloorNumber INTEGER CHECK (FloorNumber > 0),
+    BuildingName TEXT NOT NULL,
+    Amenities TEXT,
+    Notes TEXT,
+    CONSTRAINT OccupantsCapacityCheck CHECK (CurrentOccupants <= Capacity)
+);
+
+-- TABLE: Contracts
+CREATE TABLE IF NOT EXISTS Contracts (
+    ContractID INTEGER PRIMARY KEY AUTOINCREMENT,
+    StudentID INTEGER,
+    StartDate DATE NOT NULL,
+    EndDate DATE NOT NULL,
+    ContractStatus TEXT CHECK (ContractStatus IN ('Active', 'Terminated', 'Completed', 'Pending')) DEFAULT 'Pending',
+    MonthlyRent DECIMAL(10, 2) NOT NULL,
+    SecurityDeposit DECIMAL(10, 2) NOT NULL,
+    TermsAndConditions TEXT,
+    SignedDate DATE DEFAULT CURRENT_DATE,
+    RenewalOption BOOLEAN DEFAULT FALSE,
+    Notes TEXT,
+    CreatedByStaffID INTEGER,
+    LastUpdatedByStaffID INTEGER,
+    CreatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    LastUpdatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE,
+    FOREIGN KEY (CreatedByStaffID) REFERENCES Staff(StaffID) ON DELETE SET NULL,
+    FOREIGN KEY (LastUpdatedByStaffID) REFERENCES Staff(StaffID) ON DELETE SET NULL,
+    CONSTRAINT EndDateCheck CHECK (EndDate > StartDate)
+);
+
+-- TABLE: Students
+CREATE TABLE IF NOT EXISTS Students (
+    StudentID INTEGER PRIMARY KEY AUTOINCREMENT,
+    FirstName TEXT NOT NULL,
+    LastName TEXT NOT NULL,
+    DateOfBirth DATE NOT NULL,
+    Gender TEXT CHECK (Gender IN ('Male', 'Female', 'Other')),
+    ContactNumber TEXT,
+    Email TEXT UNIQUE NOT NULL,
+    Address TEXT,
+    Nationality TEXT,
+    ProgramOfStudy TEXT,
+    ProfilePicture TEXT,
+    EmergencyContactName TEXT,
+    EmergencyContactNumber TEXT,
+    AdmissionDate DATE DEFAULT CURRENT_DATE,
+    RoomID INTEGER,
+    RoomAllocationDate DATE,
+    FOREIGN KEY (RoomID) REFERENCES Rooms(RoomID) ON DELETE SET NULL,
+    CONSTRAINT AllocationDateCheck CHECK (RoomAllocationDate >= AdmissionDate)
+);
+
+-- TABLE: RoomAllocationHistory
+CREATE TABLE IF NOT EXISTS RoomAllocationHistory (
+    AllocationID INTEGER PRIMARY KEY AUTOINCREMENT,
+    StudentID INTEGER,
+    RoomID INTEGER,
+    AllocationDate DATE NOT NULL,
+    ReleaseDate DATE,
+    Notes TEXT,
+    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE,
+    FOREIGN KEY (RoomID) REFERENCES Rooms(RoomID) ON DELETE CASCADE,
+    CONSTRAINT ReleaseDateCheck CHECK (ReleaseDate IS NULL OR ReleaseDate > AllocationDate)
+);
+
+-- TABLE: Payments
+CREATE TABLE IF NOT EXISTS Payments (
+    PaymentID INTEGER PRIMARY KEY AUTOINCREMENT,
+    StudentID INTEGER,
+    ContractID INTEGER,
+    Amount DECIMAL(10, 2) NOT NULL,
+    LateFee DECIMAL(10, 2) DEFAULT 0.00,
+    PaymentDate DATE DEFAULT CURRENT_DATE,
+    Purpose TEXT CHECK (Purpose IN ('Rent', 'Utilities', 'Deposit', 'Other')) NOT NULL,
+    PaymentMethod TEXT CHECK (PaymentMethod IN ('Cash', 'Card', 'Bank Transfer')) NOT NULL,
+    PaymentStatus TEXT CHECK (PaymentStatus IN ('Pending', 'Completed', 'Failed')) DEFAULT 'Pending',
+    ReceiptNumber TEXT UNIQUE,
+    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE,
+    FOREIGN KEY (ContractID) REFERENCES Contracts(ContractID) ON DELETE SET NULL
+);
+
+-- TABLE: MaintenanceRequests
+CREATE TABLE IF NOT EXISTS MaintenanceRequests (
+    RequestID INTEGER PRIMARY KEY AUTOINCREMENT,
+    StudentID INTEGER,
+    Description TEXT NOT NULL,
+    UrgencyLevel TEXT CHECK (UrgencyLevel IN ('Low', 'Medium', 'High')) DEFAULT 'Medium',
+    AssignedStaffID INTEGER,
+    Status TEXT CHECK (Status IN ('Pending', 'In Progress', 'Completed')) DEFAULT 'Pending',
+    RequestDate DATE DEFAULT CURRENT_DATE,
+    CompletionDate DATE,
+    Notes TEXT,
+    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE,
+    FOREIGN KEY (AssignedStaffID) REFERENCES Staff(StaffID) ON DELETE SET NULL,
+    CONSTRAINT CompletionDateCheck CHECK (CompletionDate IS NULL OR CompletionDate >= RequestDate)
+);
+
+-- TABLE: Inventory
+CREATE TABLE IF NOT EXISTS Inventory (
+    ItemID INTEGER PRIMARY KEY AUTOINCREMENT,
+    ItemName TEXT NOT NULL,
+    Quantity INTEGER CHECK (Quantity >= 0) NOT NULL,
+    Location TEXT,
+    Status TEXT CHECK (Status IN ('Available', 'In Use', 'Damaged', 'Lost')) DEFAULT 'Available',
+    Notes TEXT
+);
+
+-- TABLE: Staff
+CREATE TABLE IF NOT EXISTS Staff (
+    StaffID INTEGER PRIMARY KEY AUTOINCREMENT,
+    FirstName TEXT NOT NULL,
+    LastName TEXT NOT NULL,
+    Role TEXT CHECK (Role IN ('Admin', 'Maintenance', 'Cleaner', 'Security')) NOT NULL,
+    ContactNumber TEXT,
+    Email TEXT UNIQUE NOT NULL,
+    HireDate DATE DEFAULT CURRENT_DATE,
+    ShiftHours TEXT,
+    Salary DECIMAL(10, 2) DEFAULT 0.00,
+    Notes TEXT
+);
+
+-- TABLE: Complaints
+CREATE TABLE IF NOT EXISTS Complaints (
+    ComplaintID INTEGER PRIMARY KEY AUTOINCREMENT,
+    StudentID INTEGER,
+    Subject TEXT NOT NULL,
+    Description TEXT NOT NULL,
+    Status TEXT CHECK (Status IN ('Pending', 'Resolved', 'Dismissed')) DEFAULT 'Pending',
+    ComplaintDate DATE DEFAULT CURRENT_DATE,
+    ResolutionDate DATE,
+    Notes TEXT,
+    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE,
+    CONSTRAINT ResolutionDateCheck CHECK (ResolutionDate IS NULL OR ResolutionDate >= ComplaintDate)
+);
+
+-- TABLE: FinesAndPenalties
+CREATE TABLE IF NOT EXISTS FinesAndPenalties (
+    FineID INTEGER PRIMARY KEY AUTOINCREMENT,
+    StudentID INTEGER,
+    ViolationType TEXT CHECK (ViolationType IN ('Noise', 'Late Payment', 'Damage', 'Other')) NOT NULL,
+    Description TEXT NOT NULL,
+    FineAmount DECIMAL(10, 2) CHECK (FineAmount > 0) NOT NULL,
+    FineDate DATE DEFAULT CURRENT_DATE,
+    Status TEXT CHECK (Status IN ('Unpaid', 'Paid')) DEFAULT 'Unpaid',
+    Notes TEXT,
+    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE
+);
+
+-- TABLE: StudentFines
+CREATE TABLE IF NOT EXISTS StudentFines (
+    StudentID INTEGER,
+    FineID INTEGER,
+    IssuedDate DATE DEFAULT CURRENT_DATE,
+    Status TEXT CHECK (Status IN ('Unpaid', 'Paid', 'Waived')) DEFAULT 'Unpaid',
+    Notes TEXT,
+    PRIMARY KEY (StudentID, FineID),
+    FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE,
+    FOREIGN KEY (FineID) REFERENCES FinesAndPenalties(FineID) ON DELETE CASCADE
+);
+"""
+
+# Các cột của từng bảng theo thứ tự trong câu lệnh CREATE TABLE
+TABLE_COLUMNS = {
+    'Users': ('UserID', 'Username', 'Password', 'CreatedAt'),
+    'Rooms': ('RoomID', 'RoomNumber', 'Type', 'Capacity', 'CurrentOccupants', 'Status', 'FloorNumber',
+              'BuildingName', 'Amenities', 'Notes'),
+    'Contracts': ('ContractID', 'StudentID', 'StartDate', 'EndDate', 'ContractStatus', 'MonthlyRent',
+                  'SecurityDeposit', 'TermsAndConditions', 'SignedDate', 'RenewalOption', 'Notes',
+                  'CreatedByStaffID', 'LastUpdatedByStaffID', 'CreatedAt', 'LastUpdatedAt'),
+    'Students': ('StudentID', 'FirstName', 'LastName', 'DateOfBirth', 'Gender', 'ContactNumber', 'Email',
+                 'Address', 'Nationality', 'ProgramOfStudy', 'ProfilePicture', 'EmergencyContactName',
+                 'EmergencyContactNumber', 'AdmissionDate', 'RoomID', 'RoomAllocationDate'),
+    'RoomAllocationHistory': ('AllocationID', 'StudentID', 'RoomID', 'AllocationDate', 'ReleaseDate', 'Notes'),
+    'Payments': ('PaymentID', 'StudentID', 'ContractID', 'Amount', 'LateFee', 'PaymentDate', 'Purpose',
+                 'PaymentMethod', 'PaymentStatus', 'ReceiptNumber'),
+    'MaintenanceRequests': ('RequestID', 'StudentID', 'Description', 'UrgencyLevel', 'AssignedStaffID',
+                            'Status', 'RequestDate', 'CompletionDate', 'Notes'),
+    'Inventory': ('ItemID', 'ItemName', 'Quantity', 'Location', 'Status', 'Notes'),
+    'Staff': ('StaffID', 'FirstName', 'LastName', 'Role', 'ContactNumber', 'Email', 'HireDate', 'ShiftHours',
+              'Salary', 'Notes'),
+    'Complaints': ('ComplaintID', 'StudentID', 'Subject', 'Description', 'Status', 'ComplaintDate',
+                   'ResolutionDate', 'Notes'),
+    'FinesAndPenalties': ('FineID', 'StudentID', 'ViolationType', 'Description', 'FineAmount', 'FineDate',
+                          'Status', 'Notes'),
+    'StudentFines': ('StudentID', 'FineID', 'IssuedDate', 'Status', 'Notes'),
+}
+
+# Các cột được đưa vào chỉ mục tìm kiếm toàn văn (FTS5) của từng bảng.
+# Cột số như Amount, Capacity không được đánh chỉ mục; các cột mã (ID) được
+# đánh chỉ mục dạng chữ để vẫn tìm được theo mã sinh viên, mã phòng...
+SEARCH_COLUMNS = {
+    'Students': ('StudentID', 'FirstName', 'LastName', 'Email', 'ContactNumber', 'Address',
+                 'Nationality', 'ProgramOfStudy', 'EmergencyContactName', 'RoomID'),
+    'Contracts': ('ContractID', 'StudentID', 'ContractStatus', 'TermsAndConditions', 'Notes'),
+    'Staff': ('StaffID', 'FirstName', 'LastName', 'Role', 'Email', 'ContactNumber', 'Notes'),
+    'Rooms': ('RoomID', 'RoomNumber', 'Type', 'Status', 'BuildingName', 'Amenities', 'Notes'),
+    'RoomAllocationHistory': ('AllocationID', 'StudentID', 'RoomID', 'Notes'),
+    'Payments': ('PaymentID', 'StudentID', 'ContractID', 'Purpose', 'PaymentMethod', 'PaymentStatus', 'ReceiptNumber'),
+    'MaintenanceRequests': ('RequestID', 'StudentID', 'Description', 'UrgencyLevel', 'AssignedStaffID', 'Status', 'Notes'),
+    'Inventory': ('ItemID', 'ItemName', 'Location', 'Status', 'Notes'),
+    'Complaints': ('ComplaintID', 'StudentID', 'Subject', 'Description', 'Status', 'Notes'),
+    'FinesAndPenalties': ('FineID', 'StudentID', 'ViolationType', 'Description', 'Status', 'Notes'),
+    'StudentFines': ('StudentID', 'FineID', 'Status', 'Notes'),
+}
+
+# Khóa chính của từng bảng, dùng để phân trang và xác định dòng
+KEY_COLUMNS = {
+    'Students': ('StudentID',),
+    'Contracts': ('ContractID',),
+    'Staff': ('StaffID',),
+    'Rooms': ('RoomID',),
+    'RoomAllocationHistory': ('AllocationID',),
+    'Payments': ('PaymentID',),
+    'MaintenanceRequests': ('RequestID',),
+    'Inventory': ('ItemID',),
+    'Complaints': ('ComplaintID',),
+    'FinesAndPenalties': ('FineID',),
+    'StudentFines': ('StudentID', 'FineID'),
+}
+
+# Các bảng có khóa chính tự tăng (khóa do database sinh ra khi thêm dòng)
+GENERATED_KEY_TABLES = set(KEY_COLUMNS) - {'StudentFines'}
+
+# Cột rowid của từng bảng (StudentFines dùng khóa chính kép nên dùng rowid ẩn)
+ROWID_COLUMNS = {
+    'Students': 'StudentID',
+    'Contracts': 'ContractID',
+    'Staff': 'StaffID',
+    'Rooms': 'RoomID',
+    'RoomAllocationHistory': 'AllocationID',
+    'Payments': 'PaymentID',
+    'MaintenanceRequests': 'RequestID',
+    'Inventory': 'ItemID',
+    'Complaints': 'ComplaintID',
+    'FinesAndPenalties': 'FineID',
+    'StudentFines': 'rowid',
+}
+
+# Biểu thức SQL bỏ chữ đ/Đ (unicode61 remove_diacritics không tách dấu của hai chữ này)
+def fold_text(expression):
+    return f"replace(replace({expression}, 'đ', 'd'), 'Đ', 'D')"
+
+# Câu lệnh tạo trigger thêm dòng vào chỉ mục tìm kiếm của bảng table
+def search_insert_trigger(table):
+    fts = f'{table}_fts'
+    cols = ', '.join(SEARCH_COLUMNS[table])
+    new_values = ', '.join(fold_text(f'new.{column}') for column in SEARCH_COLUMNS[table])
+    return f'''CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.{ROWID_COLUMNS[table]}, {new_values});
+        END'''
+
+# Tạo bảng FTS5 và các trigger giữ cho chỉ mục luôn khớp với bảng gốc.
+# Bảng FTS không lưu nội dung (content=''), chỉ lưu chỉ mục của văn bản đã bỏ dấu.
+def create_search_index(db):
+    for table, columns in SEARCH_COLUMNS.items():
+        fts = f'{table}_fts'
+        rowid = ROWID_COLUMNS[table]
+        cols = ', '.join(columns)
+        new_values = ', '.join(fold_text(f'new.{column}') for column in columns)
+        old_values = ', '.join(fold_text(f'old.{column}') for column in columns)
+        exists = db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)).fetchone()
+
+        db.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )''')
+        db.execute(search_insert_trigger(table))
+        db.execute(f'''CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{rowid}, {old_values});
+        END''')
+        # Trigger sửa chạy TRƯỚC khi ghi dòng: bảng FTS không lưu nội dung nên lệnh 'delete' phải nhận đúng
+        # giá trị đã đánh chỉ mục. Nếu chạy sau, một trigger khác (ví dụ trạng thái phòng) có thể sửa lại
+        # chính dòng đó trước khi chỉ mục được cập nhật, làm chỉ mục hỏng.
+        db.execute(f'''CREATE TRIGGER IF NOT EXISTS {fts}_update BEFORE UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{rowid}, {old_values});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.{rowid}, {new_values});
+        END''')
+        # Bảng FTS mới tạo: đánh chỉ mục cho dữ liệu đã có sẵn
+        if not exists:
+            values = ', '.join(fold_text(column) for column in columns)
+            db.execute(f'INSERT INTO {fts}(rowid, {cols}) SELECT {rowid}, {values} FROM {table}')
+
+# Thêm hàng loạt vào bảng table (có khóa tự tăng) bằng insert(), đánh chỉ mục tìm kiếm một lần cho cả nhóm
+# thay vì qua trigger từng dòng: tạm bỏ trigger thêm dòng, chạy insert(), thêm các dòng mới (rowid lớn hơn
+# mọi dòng cũ) vào bảng FTS bằng một lệnh INSERT ... SELECT rồi tạo lại trigger. Gọi trong with db; tất cả
+# nằm trong cùng một transaction nên kết nối khác không bao giờ thấy bảng thiếu trigger, và nếu insert()
+# lỗi thì trigger được khôi phục khi rollback. Trả về kết quả của insert().
+def insert_with_batched_index(db, table, insert):
+    fts = f'{table}_fts'
+    rowid = ROWID_COLUMNS[table]
+    cols = ', '.join(SEARCH_COLUMNS[table])
+    values = ', '.join(fold_text(column) for column in SEARCH_COLUMNS[table])
+    # sqlite3 không tự mở transaction trước lệnh DDL
+    if not db.in_transaction:
+        db.execute('BEGIN')
+    last = db.execute(f'SELECT MAX({rowid}) FROM {table}').fetchone()[0] or 0
+    db.execute(f'DROP TRIGGER IF EXISTS {fts}_insert')
+    result = insert()
+    db.execute(f'INSERT INTO {fts}(rowid, {cols}) SELECT {rowid}, {values} FROM {table} WHERE {rowid} > ?', (last,))
+    db.execute(search_insert_trigger(table))
+    return result
+
+# Xóa các bảng FTS5 và trigger của chúng. Dùng khi nạp dữ liệu hàng loạt: nạp xong gọi
+# create_search_index để đánh chỉ mục một lần bằng INSERT ... SELECT, nhanh hơn nhiều so với
+# để trigger cập nhật chỉ mục cho từng dòng.
+def drop_search_index(db):
+    for table in SEARCH_COLUMNS:
+        fts = f'{table}_fts'
+        for trigger in ('insert', 'delete', 'update'):
+            db.execute(f'DROP TRIGGER IF EXISTS {fts}_{trigger}')
+        db.execute(f'DROP TABLE IF EXISTS {fts}')
+
+# Các cột ngày của từng bảng
+DATE_COLUMNS = {
+    'Students': ('DateOfBirth', 'AdmissionDate', 'RoomAllocationDate'),
+    'Contracts': ('StartDate', 'EndDate', 'SignedDate'),
+    'Staff': ('HireDate',),
+    'RoomAllocationHistory': ('AllocationDate', 'ReleaseDate'),
+    'Payments': ('PaymentDate',),
+    'MaintenanceRequests': ('RequestDate', 'CompletionDate'),
+    'Complaints': ('ComplaintDate', 'ResolutionDate'),
+    'FinesAndPenalties': ('FineDate',),
+    'StudentFines': ('IssuedDate',),
+}
+
+# Các cột ngày bắt buộc (NOT NULL), không được đổi chuỗi rỗng thành NULL
+REQUIRED_DATE_COLUMNS = {'DateOfBirth', 'StartDate', 'EndDate', 'AllocationDate'}
+
+ISO_DATE_GLOB = "'[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+
+# Các ràng buộc CHECK so sánh hai cột ngày: bảng -> (khóa chính, [(tên ràng buộc, điều kiện)]).
+# Với dữ liệu DD-MM-YYYY, các ràng buộc này so sánh chuỗi nên có thể đã chấp nhận những ngày sai thứ tự.
+DATE_ORDER_CHECKS = {
+    'Contracts': ('ContractID', (('EndDateCheck', 'EndDate > StartDate'),)),
+    'Students': ('StudentID', (('AllocationDateCheck', 'RoomAllocationDate >= AdmissionDate'),)),
+    'RoomAllocationHistory': ('AllocationID', (('ReleaseDateCheck', 'ReleaseDate IS NULL OR ReleaseDate > AllocationDate'),)),
+    'MaintenanceRequests': ('RequestID', (('CompletionDateCheck', 'CompletionDate IS NULL OR CompletionDate >= RequestDate'),)),
+    'Complaints': ('ComplaintID', (('ResolutionDateCheck', 'ResolutionDate IS NULL OR ResolutionDate >= ComplaintDate'),)),
+}
+
+# Mô tả các dòng có lỗi để người dùng tìm và sửa: nhãn, tên cột khóa và tối đa 10 giá trị khóa
+def describe_rows(label, key, keys):
+    more = f" và {len(keys) - 10} dòng khác" if len(keys) > 10 else ''
+    return f"{label}: {key} {', '.join(map(str, keys[:10]))}{more}"
+
+# Chuyển các ngày đang lưu dạng DD-MM-YYYY sang YYYY-MM-DD để so sánh và sắp xếp đúng,
+# đồng thời tạo chỉ mục cho các cột ngày hay được lọc theo khoảng
+def migrate_dates(db):
+    # Dữ liệu cũ được nhập khi các ràng buộc CHECK còn so sánh chuỗi DD-MM-YYYY,
+    # nên tạm bỏ qua CHECK trong lúc chuyển đổi
+    db.execute('PRAGMA ignore_check_constraints = ON')
+    try:
+        problems = []
+        for table, columns in DATE_COLUMNS.items():
+            for column in columns:
+                # Đọc từng giá trị bằng parse_date (như khi nhập) để nhận cả ngày, tháng có 1 chữ số
+                rows = db.execute(f"""SELECT rowid, {column} FROM {table}
+                    WHERE {column} IS NOT NULL AND {column} NOT GLOB {ISO_DATE_GLOB}""").fetchall()
+                updates = []
+                for rowid, value in rows:
+                    day = parse_date(str(value).strip())
+                    if day is not None:
+                        updates.append((day.isoformat(), rowid))
+                    elif column not in REQUIRED_DATE_COLUMNS:
+                        # Cột không bắt buộc chứa chuỗi rỗng hoặc giá trị không phải ngày thì để trống
+                        updates.append((None, rowid))
+                db.executemany(f'UPDATE {table} SET {column} = ? WHERE rowid = ?', updates)
+                remaining = [row[0] for row in db.execute(f"""SELECT rowid FROM {table}
+                    WHERE {column} IS NOT NULL AND {column} NOT GLOB {ISO_DATE_GLOB} ORDER BY rowid""")]
+                if remaining:
+                    problems.append(describe_rows(f'{table}.{column}', 'rowid', remaining))
+        # Sau khi chuyển sang ISO, kiểm tra lại các ràng buộc so sánh ngày (như CHECK sẽ làm khi ghi).
+        # Điều kiện NULL không vi phạm CHECK, nên chỉ lấy các dòng có điều kiện sai hẳn.
+        for table, (key, checks) in DATE_ORDER_CHECKS.items():
+            for name, condition in checks:
+                keys = [row[0] for row in db.execute(f'SELECT {key} FROM {table} WHERE NOT ({condition}) ORDER BY {key}')]
+                if keys:
+                    problems.append(describe_rows(f'{table}.{name}', key, keys))
+        # Không tăng user_version khi còn ngày chưa chuyển được hoặc vi phạm ràng buộc, tránh lọc,
+        # sắp xếp sai và sao lưu báo lỗi về sau
+        if problems:
+            raise sqlite3.DatabaseError(f"Có ngày không đọc được hoặc sai thứ tự, cần sửa tay trước khi nâng cấp: "
+                                        f"{'; '.join(problems)}")
+        db.execute('CREATE INDEX IF NOT EXISTS idx_payments_date ON Payments(PaymentDate)')
+        db.execute('CREATE INDEX IF NOT EXISTS idx_contracts_end_date ON Contracts(EndDate)')
+        db.execute('CREATE INDEX IF NOT EXISTS idx_allocations_date ON RoomAllocationHistory(AllocationDate)')
+    finally:
+        db.execute('PRAGMA ignore_check_constraints = OFF')
+
+# Chỉ mục cho các cột khóa ngoại và các cột hay dùng để lọc.
+# Các bảng con có chỉ mục trên cột khóa ngoại thì xóa dây chuyền (ON DELETE CASCADE/SET NULL)
+# không phải quét toàn bảng.
+def create_indexes(db):
+    db.execute('CREATE INDEX IF NOT EXISTS idx_students_room ON Students(RoomID)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_contracts_student ON Contracts(StudentID)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_contracts_status ON Contracts(ContractStatus)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_contracts_created_by ON Contracts(CreatedByStaffID)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_contracts_updated_by ON Contracts(LastUpdatedByStaffID)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_allocations_student ON RoomAllocationHistory(StudentID)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_allocations_room ON RoomAllocationHistory(RoomID)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_payments_student ON Payments(StudentID)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_payments_contract ON Payments(ContractID)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_requests_student ON MaintenanceRequests(StudentID)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_requests_staff ON MaintenanceRequests(AssignedStaffID)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_requests_status ON MaintenanceRequests(Status, UrgencyLevel)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_complaints_student ON Complaints(StudentID)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_fines_student ON FinesAndPenalties(StudentID)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_student_fines_fine ON StudentFines(FineID)')
+
+# Các cột khóa ngoại không bắt buộc. Dữ liệu cũ lưu chuỗi rỗng khi bỏ trống ô nhập,
+# sẽ vi phạm khóa ngoại khi PRAGMA foreign_keys được bật.
+OPTIONAL_REFERENCE_COLUMNS = {
+    'Students': ('RoomID',),
+    'Contracts': ('CreatedByStaffID', 'LastUpdatedByStaffID'),
+    'Payments': ('ContractID',),
+    'MaintenanceRequests': ('AssignedStaffID',),
+}
+
+# Đổi chuỗi rỗng trong các cột khóa ngoại không bắt buộc thành NULL
+def clear_empty_references(db):
+    for table, columns in OPTIONAL_REFERENCE_COLUMNS.items():
+        for column in columns:
+            db.execute(f"UPDATE {table} SET {column} = NULL WHERE {column} = ''")
+
+# Số người ở của phòng room_id: số sinh viên đang có RoomID là phòng đó. Dữ liệu cũ có thể có
+# phòng nhiều sinh viên hơn sức chứa; khi đó lấy bằng sức chứa để không vi phạm ràng buộc CHECK.
+def occupants_expression(room_id, capacity):
+    return f'MIN({capacity}, (SELECT COUNT(*) FROM Students WHERE Students.RoomID = {room_id}))'
+
+# Cập nhật số người ở (và qua trigger là trạng thái) của các phòng trong room_ids
+def recount_rooms(room_ids):
+    return (f"UPDATE Rooms SET CurrentOccupants = {occupants_expression('Rooms.RoomID', 'Rooms.Capacity')} "
+            f"WHERE RoomID IN ({room_ids});")
+
+# Trạng thái phòng suy ra từ số người ở; 'Under Maintenance' do người dùng đặt và được giữ nguyên
+ROOM_STATUS = "CASE WHEN CurrentOccupants >= Capacity THEN 'Occupied' ELSE 'Available' END"
+
+# Kiểm tra phòng còn nhận thêm sinh viên không, trước khi sinh viên được xếp vào phòng new.RoomID
+ROOM_CHECK = """
+    SELECT RAISE(ABORT, 'Phòng đang bảo trì') FROM Rooms
+        WHERE RoomID = new.RoomID AND Status = 'Under Maintenance';
+    SELECT RAISE(ABORT, 'Phòng đã đủ người') FROM Rooms
+        WHERE RoomID = new.RoomID AND CurrentOccupants >= Capacity;
+"""
+
+# Các trigger giữ Rooms.CurrentOccupants và Rooms.Status khớp với Students.RoomID trong cùng
+# transaction với thao tác ghi. Students.RoomID là phòng hiện tại của sinh viên; thêm một dòng
+# RoomAllocationHistory chưa có ngày trả phòng thì chuyển sinh viên vào phòng đó, điền ngày trả phòng
+# (hoặc xóa dòng) thì sinh viên rời phòng. CurrentOccupants chỉ đọc: chỉ được đặt đúng bằng số đếm.
+OCCUPANCY_TRIGGERS = {
+    'rooms_occupancy_insert': """BEFORE INSERT ON Rooms BEGIN
+        SELECT RAISE(ABORT, 'Số người hiện tại của phòng được tính tự động theo danh sách sinh viên')
+            WHERE new.CurrentOccupants IS NOT NULL AND new.CurrentOccupants != 0;
+        SELECT RAISE(ABORT, 'Phòng mới chưa có người ở nên không thể có trạng thái Occupied')
+            WHERE new.Status = 'Occupied';
+    END""",
+    'rooms_occupancy_readonly': f"""BEFORE UPDATE OF CurrentOccupants ON Rooms
+        WHEN new.CurrentOccupants IS NOT {occupants_expression('new.RoomID', 'new.Capacity')} BEGIN
+        SELECT RAISE(ABORT, 'Số người hiện tại của phòng được tính tự động theo danh sách sinh viên');
+    END""",
+    'rooms_capacity_update': f"""AFTER UPDATE OF Capacity ON Rooms WHEN new.Capacity IS NOT old.Capacity BEGIN
+        {recount_rooms('new.RoomID')}
+    END""",
+    'rooms_status_update': f"""AFTER UPDATE OF CurrentOccupants, Status ON Rooms BEGIN
+        UPDATE Rooms SET Status = {ROOM_STATUS}
+            WHERE RoomID = new.RoomID AND Status IS NOT 'Under Maintenance' AND Status IS NOT {ROOM_STATUS};
+    END""",
+    'students_room_check_insert': f"""BEFORE INSERT ON Students WHEN new.RoomID IS NOT NULL BEGIN
+        {ROOM_CHECK}
+    END""",
+    'students_room_check_update': f"""BEFORE UPDATE OF RoomID ON Students
+        WHEN new.RoomID IS NOT NULL AND new.RoomID IS NOT old.RoomID BEGIN
+        {ROOM_CHECK}
+    END""",
+    'students_occupancy_insert': f"""AFTER INSERT ON Students WHEN new.RoomID IS NOT NULL BEGIN
+        {recount_rooms('new.RoomID')}
+    END""",
+    'students_occupancy_update': f"""AFTER UPDATE OF RoomID ON Students WHEN new.RoomID IS NOT old.RoomID BEGIN
+        {recount_rooms('old.RoomID, new.RoomID')}
+    END""",
+    'students_occupancy_delete': f"""AFTER DELETE ON Students WHEN old.RoomID IS NOT NULL BEGIN
+        {recount_rooms('old.RoomID')}
+    END""",
+    'allocations_insert': """AFTER INSERT ON RoomAllocationHistory WHEN new.ReleaseDate IS NULL BEGIN
+        UPDATE Students SET RoomID = new.RoomID, RoomAllocationDate = new.AllocationDate
+            WHERE StudentID = new.StudentID;
+    END""",
+    'allocations_update': """AFTER UPDATE OF StudentID, RoomID, AllocationDate, ReleaseDate ON RoomAllocationHistory BEGIN
+        UPDATE Students SET RoomID = NULL, RoomAllocationDate = NULL
+            WHERE old.ReleaseDate IS NULL AND StudentID = old.StudentID AND RoomID = old.RoomID
+            AND (new.ReleaseDate IS NOT NULL OR new.StudentID IS NOT old.StudentID OR new.RoomID IS NOT old.RoomID);
+        UPDATE Students SET RoomID = new.RoomID, RoomAllocationDate = new.AllocationDate
+            WHERE new.ReleaseDate IS NULL AND StudentID = new.StudentID
+            AND (old.ReleaseDate IS NOT NULL OR new.StudentID IS NOT old.StudentID OR new.RoomID IS NOT old.RoomID
+                 OR new.AllocationDate IS NOT old.AllocationDate);
+    END""",
+    'allocations_delete': """AFTER DELETE ON RoomAllocationHistory WHEN old.ReleaseDate IS NULL BEGIN
+        UPDATE Students SET RoomID = NULL, RoomAllocationDate = NULL
+            WHERE StudentID = old.StudentID AND RoomID = old.RoomID;
+    END""",
+}
+
+# Tạo các trigger số người ở và chỉ mục tìm giường trống, rồi tính lại số người ở của mọi phòng.
+# Chỉ mục chỉ gồm các phòng còn nhận người (Status = 'Available'), theo tòa nhà, loại phòng và
+# số giường trống, nên dormitory.rooms.find_free_beds chỉ đọc đúng các phòng phù hợp.
+def create_occupancy_triggers(db):
+    for name, body in OCCUPANCY_TRIGGERS.items():
+        db.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_rooms_free_beds
+        ON Rooms(BuildingName, Type, Capacity - CurrentOccupants) WHERE Status = 'Available' ''')
+    db.execute(recount_rooms('SELECT RoomID FROM Rooms'))
+
+# Xóa các trigger số người ở. Dùng khi nạp dữ liệu hàng loạt (như drop_search_index):
+# nạp xong gọi create_occupancy_triggers để tính lại số người ở của mọi phòng một lần.
+def drop_occupancy_triggers(db):
+    for name in OCCUPANCY_TRIGGERS:
+        db.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+# Trigger số người ở sửa lại dòng Rooms đang được ghi (trạng thái phòng), nên trigger sửa của chỉ mục
+# tìm kiếm phải chạy trước (BEFORE UPDATE); database tạo trước phiên bản 5 có trigger AFTER UPDATE cũ
+def migrate_occupancy(db):
+    for table in SEARCH_COLUMNS:
+        db.execute(f'DROP TRIGGER IF EXISTS {table}_fts_update')
+    create_search_index(db)
+    create_occupancy_triggers(db)
+
+# Bảng ghi tiến độ các lần lập hóa đơn theo tháng (dormitory.billing): ContractID đã xử lý tới, số hóa
+# đơn đã tạo và trạng thái, để lần chạy bị ngắt có thể tiếp tục
+def create_billing_runs(db):
+    db.execute('''CREATE TABLE IF NOT EXISTS BillingRuns (
+        BillingMonth TEXT PRIMARY KEY,
+        LastContractID INTEGER NOT NULL DEFAULT 0,
+        RentCharges INTEGER NOT NULL DEFAULT 0,
+        UtilityCharges INTEGER NOT NULL DEFAULT 0,
+        Status TEXT CHECK (Status IN ('Running', 'Completed')) DEFAULT 'Running',
+        StartedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FinishedAt TIMESTAMP
+    )''')
+
+# Bảng tổng hợp công nợ của từng sinh viên, được trigger cập nhật khi ghi vào các bảng nguồn:
+# - MonthlyRent: tổng tiền thuê hằng tháng của các hợp đồng Active
+# - PendingCharges: tổng các khoản thanh toán đang chờ (Pending, gồm cả phí trễ hạn)
+# - PaidTotal: tổng các khoản đã thanh toán (Completed)
+# - UnpaidFines: tổng các khoản phạt chưa nộp. Khoản phạt đã gán cho sinh viên qua StudentFines thì tính
+#   theo trạng thái của từng dòng StudentFines (Unpaid); khoản phạt chưa gán cho ai thì tính cho sinh viên
+#   của khoản phạt theo trạng thái trong FinesAndPenalties
+# - Balance: số tiền còn nợ (PendingCharges + UnpaidFines), có chỉ mục để lọc sinh viên nợ trên một mức
+def create_student_balances(db):
+    db.execute('''CREATE TABLE IF NOT EXISTS StudentBalances (
+        StudentID INTEGER PRIMARY KEY,
+        MonthlyRent DECIMAL(10, 2) NOT NULL DEFAULT 0,
+        PendingCharges DECIMAL(10, 2) NOT NULL DEFAULT 0,
+        PaidTotal DECIMAL(10, 2) NOT NULL DEFAULT 0,
+        UnpaidFines DECIMAL(10, 2) NOT NULL DEFAULT 0,
+        Balance DECIMAL(10, 2) NOT NULL DEFAULT 0,
+        FOREIGN KEY (StudentID) REFERENCES Students(StudentID) ON DELETE CASCADE
+    )''')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_student_balances_balance ON StudentBalances(Balance)')
+    create_balance_triggers(db)
+
+# Câu lệnh tính công nợ của các sinh viên thỏa condition (điều kiện trên Students s)
+def balance_select(condition):
+    return f'''SELECT StudentID, MonthlyRent, PendingCharges, PaidTotal, UnpaidFines, PendingCharges + UnpaidFines
+        FROM (SELECT s.StudentID,
+            COALESCE((SELECT SUM(MonthlyRent) FROM Contracts c
+                      WHERE c.StudentID = s.StudentID AND c.ContractStatus = 'Active'), 0) AS MonthlyRent,
+            COALESCE((SELECT SUM(Amount + COALESCE(LateFee, 0)) FROM Payments p
+                      WHERE p.StudentID = s.StudentID AND p.PaymentStatus = 'Pending'), 0) AS PendingCharges,
+            COALESCE((SELECT SUM(Amount + COALESCE(LateFee, 0)) FROM Payments p
+                      WHERE p.StudentID = s.StudentID AND p.PaymentStatus = 'Completed'), 0) AS PaidTotal,
+            COALESCE((SELECT SUM(f.FineAmount) FROM StudentFines sf JOIN FinesAndPenalties f ON f.FineID = sf.FineID
+                      WHERE sf.StudentID = s.StudentID AND sf.Status = 'Unpaid'), 0)
+            + COALESCE((SELECT SUM(f.FineAmount) FROM FinesAndPenalties f
+                        WHERE f.StudentID = s.StudentID AND f.Status = 'Unpaid'
+                        AND NOT EXISTS (SELECT 1 FROM StudentFines sf WHERE sf.FineID = f.FineID)), 0) AS UnpaidFines
+        FROM Students s WHERE {condition})'''
+
+# Tính lại công nợ của các sinh viên thỏa condition (thêm dòng nếu chưa có)
+def refresh_balances(condition):
+    return f'''INSERT INTO StudentBalances (StudentID, MonthlyRent, PendingCharges, PaidTotal, UnpaidFines, Balance)
+        {balance_select(condition)} WHERE true
+        ON CONFLICT (StudentID) DO UPDATE SET MonthlyRent = excluded.MonthlyRent,
+            PendingCharges = excluded.PendingCharges, PaidTotal = excluded.PaidTotal,
+            UnpaidFines = excluded.UnpaidFines, Balance = excluded.Balance;'''
+
+# Sinh viên bị ảnh hưởng khi khoản phạt row (new/old) đổi: sinh viên của khoản phạt và các sinh viên
+# được gán khoản phạt đó qua StudentFines
+def fine_students(row):
+    return f'SELECT {row}.StudentID UNION SELECT StudentID FROM StudentFines WHERE FineID = {row}.FineID'
+
+# Các trigger giữ StudentBalances khớp với dữ liệu nguồn trong cùng transaction với thao tác ghi.
+# Mỗi lần ghi chỉ tính lại dòng của các sinh viên liên quan (qua chỉ mục StudentID của từng bảng).
+BALANCE_TRIGGERS = {
+    'students_balance_insert': f"""AFTER INSERT ON Students BEGIN
+        {refresh_balances('s.StudentID = new.StudentID')}
+    END""",
+}
+for table, columns in (('Payments', 'StudentID, Amount, LateFee, PaymentStatus'),
+                       ('Contracts', 'StudentID, MonthlyRent, ContractStatus')):
+    BALANCE_TRIGGERS.update({
+        f'{table.lower()}_balance_insert': f"""AFTER INSERT ON {table} BEGIN
+            {refresh_balances('s.StudentID = new.StudentID')}
+        END""",
+        f'{table.lower()}_balance_update': f"""AFTER UPDATE OF {columns} ON {table} BEGIN
+            {refresh_balances('s.StudentID IN (old.StudentID, new.StudentID)')}
+        END""",
+        f'{table.lower()}_balance_delete': f"""AFTER DELETE ON {table} BEGIN
+            {refresh_balances('s.StudentID = old.StudentID')}
+        END""",
+    })
+BALANCE_TRIGGERS.update({
+    'fines_balance_insert': f"""AFTER INSERT ON FinesAndPenalties BEGIN
+        {refresh_balances('s.StudentID = new.StudentID')}
+    END""",
+    'fines_balance_update': f"""AFTER UPDATE OF StudentID, FineAmount, Status ON FinesAndPenalties BEGIN
+        {refresh_balances(f"s.StudentID IN ({fine_students('old')} UNION {fine_students('new')})")}
+    END""",
+    'fines_balance_delete': f"""AFTER DELETE ON FinesAndPenalties BEGIN
+        {refresh_balances(f"s.StudentID IN ({fine_students('old')})")}
+    END""",
+    # Gán hoặc bỏ gán khoản phạt còn đổi công nợ của sinh viên gốc của khoản phạt (xem create_student_balances)
+    'student_fines_balance_insert': f"""AFTER INSERT ON StudentFines BEGIN
+        {refresh_balances('s.StudentID IN (new.StudentID, (SELECT StudentID FROM FinesAndPenalties WHERE FineID = new.FineID))')}
+    END""",
+    'student_fines_balance_update': f"""AFTER UPDATE OF StudentID, FineID, Status ON StudentFines BEGIN
+        {refresh_balances('s.StudentID IN (old.StudentID, new.StudentID, (SELECT StudentID FROM FinesAndPenalties WHERE FineID = old.FineID), (SELECT StudentID FROM FinesAndPenalties WHERE FineID = new.FineID))')}
+    END""",
+    'student_fines_balance_delete': f"""AFTER DELETE ON StudentFines BEGIN
+        {refresh_balances('s.StudentID IN (old.StudentID, (SELECT StudentID FROM FinesAndPenalties WHERE FineID = old.FineID))')}
+    END""",
+})
+
+# Tạo các trigger công nợ rồi tính lại công nợ của mọi sinh viên
+def create_balance_triggers(db):
+    for name, body in BALANCE_TRIGGERS.items():
+        db.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+    db.execute('DELETE FROM StudentBalances')
+    db.execute(refresh_balances('true'))
+
+# Xóa các trigger công nợ. Dùng khi nạp dữ liệu hàng loạt (như drop_search_index): nạp xong gọi
+# create_balance_triggers để tính lại công nợ của mọi sinh viên một lần.
+def drop_balance_triggers(db):
+    for name in BALANCE_TRIGGERS:
+        db.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+# Nhật ký thay đổi (audit/change data capture) của các bảng trong KEY_COLUMNS. Trigger chỉ ghi thêm
+# một dòng vào AuditQueue (không có chỉ mục phụ nên rẻ như ghi thêm vào cuối bảng); flush_audit_log
+# chuyển cả hàng đợi sang AuditLog theo lô, nên chi phí cập nhật các chỉ mục tra cứu được gộp lại.
+# - ChangeID tăng dần theo thứ tự thay đổi, dùng làm con trỏ cho đồng bộ xuống hệ thống khác
+# - RowKey: khóa chính của dòng (các cột khóa nối bằng dấu phẩy)
+# - ChangedBy: giá trị của hàm audit_user() mà dormitory.db.connect đăng ký cho mỗi kết nối
+# - StudentID, RoomID: sinh viên/phòng liên quan, để tra "những gì đã đổi của sinh viên/phòng này"
+# - Changes: JSON {"cột": [giá trị cũ, giá trị mới]} chỉ gồm các cột có giá trị khác nhau
+AUDIT_COLUMNS = 'ChangedAt, TableName, RowKey, Operation, ChangedBy, StudentID, RoomID, Changes'
+
+def create_audit_log(db):
+    db.execute('''CREATE TABLE IF NOT EXISTS AuditLog (
+        ChangeID INTEGER PRIMARY KEY,
+        ChangedAt TEXT NOT NULL,
+        TableName TEXT NOT NULL,
+        RowKey TEXT NOT NULL,
+        Operation TEXT NOT NULL CHECK (Operation IN ('INSERT', 'UPDATE', 'DELETE')),
+        ChangedBy TEXT,
+        StudentID INTEGER,
+        RoomID INTEGER,
+        Changes TEXT NOT NULL
+    )''')
+    db.execute('''CREATE TABLE IF NOT EXISTS AuditQueue (
+        QueueID INTEGER PRIMARY KEY,
+        ChangedAt TEXT NOT NULL,
+        TableName TEXT NOT NULL,
+        RowKey TEXT NOT NULL,
+        Operation TEXT NOT NULL,
+        ChangedBy TEXT,
+        StudentID INTEGER,
+        RoomID INTEGER,
+        Changes TEXT NOT NULL
+    )''')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_audit_row ON AuditLog(TableName, RowKey, ChangedAt)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_audit_time ON AuditLog(ChangedAt)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_audit_student ON AuditLog(StudentID, ChangedAt) WHERE StudentID IS NOT NULL')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_audit_room ON AuditLog(RoomID, ChangedAt) WHERE RoomID IS NOT NULL')
+    create_audit_triggers(db)
+
+# Cột do trigger khác tính ra, không ghi vào nhật ký (thay đổi của chúng được ghi ở bảng nguồn)
+AUDIT_DERIVED_COLUMNS = {'Rooms': ('CurrentOccupants',)}
+
+# Bảng có cột RoomID chỉ phòng mà dòng thuộc về (RoomID của Students chỉ là phòng đang ở)
+AUDIT_ROOM_TABLES = ('Rooms', 'RoomAllocationHistory')
+
+# Biểu thức JSON các cột khác nhau giữa dòng old và new (None nếu không có, như khi thêm/xóa dòng).
+# Ghép chuỗi thay vì json_group_object để không phải chạy truy vấn con ở mỗi lần ghi.
+def audit_changes(columns, old, new):
+    parts = []
+    for column in columns:
+        before = f'{old}.{column}' if old else 'NULL'
+        after = f'{new}.{column}' if new else 'NULL'
+        parts.append(f"""CASE WHEN {before} IS NOT {after} THEN '"{column}":' || json_array({before}, {after}) || ',' ELSE '' END""")
+    return "'{' || rtrim(" + ' || '.join(parts) + ", ',') || '}'"
+
+# Câu lệnh thêm một dòng nhật ký cho thao tác operation trên dòng row ('new' hoặc 'old') của table
+def audit_insert(table, operation, row, old, new):
+    columns = [column for column in TABLE_COLUMNS[table] if column not in AUDIT_DERIVED_COLUMNS.get(table, ())]
+    row_key = " || ',' || ".join(f'{row}.{column}' for column in KEY_COLUMNS[table])
+    student = f'{row}.StudentID' if 'StudentID' in columns else 'NULL'
+    room = f'{row}.RoomID' if table in AUDIT_ROOM_TABLES else 'NULL'
+    return f"""INSERT INTO AuditQueue ({AUDIT_COLUMNS})
+        VALUES (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'), '{table}', {row_key}, '{operation}', audit_user(),
+                {student}, {room}, {audit_changes(columns, old, new)});"""
+
+# Các trigger ghi nhật ký; sửa dòng mà không đổi giá trị nào (hoặc chỉ đổi cột dẫn xuất) thì không ghi
+AUDIT_TRIGGERS = {}
+for table in KEY_COLUMNS:
+    changed = ' OR '.join(f'old.{column} IS NOT new.{column}' for column in TABLE_COLUMNS[table]
+                          if column not in AUDIT_DERIVED_COLUMNS.get(table, ()))
+    AUDIT_TRIGGERS.update({
+        f'{table.lower()}_audit_insert': f"""AFTER INSERT ON {table} BEGIN
+            {audit_insert(table, 'INSERT', 'new', None, 'new')}
+        END""",
+        f'{table.lower()}_audit_update': f"""AFTER UPDATE ON {table} WHEN {changed} BEGIN
+            {audit_insert(table, 'UPDATE', 'new', 'old', 'new')}
+        END""",
+        f'{table.lower()}_audit_delete': f"""AFTER DELETE ON {table} BEGIN
+            {audit_insert(table, 'DELETE', 'old', 'old', None)}
+        END""",
+    })
+
+def create_audit_triggers(db):
+    for name, body in AUDIT_TRIGGERS.items():
+        db.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+
+# Xóa các trigger nhật ký (dùng khi nạp dữ liệu hàng loạt không cần ghi nhật ký)
+def drop_audit_triggers(db):
+    for name in AUDIT_TRIGGERS:
+        db.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+# Danh sách migration theo thứ tự phiên bản (lưu trong PRAGMA user_version).
+# Mỗi migration chạy trong một transaction cùng với việc tăng user_version.
+MIGRATIONS = [
+    (1, migrate_dates),
+    (2, create_search_index),
+    (3, create_indexes),
+    (4, clear_empty_references),
+    (5, migrate_occupancy),
+    (6, create_billing_runs),
+    (7, create_student_balances),
+    (8, create_audit_log),
+]
+
+# Chạy các migration chưa áp dụng; có migration mới thì cập nhật thống kê cho bộ tối ưu truy vấn
+def migrate(db):
+    version = db.execute('PRAGMA user_version').fetchone()[0]
+    applied = False
+    for target, migration in MIGRATIONS:
+        if target <= version:
+            continue
+        db.execute('BEGIN')
+        try:
+            migration(db)
+            db.execute(f'PRAGMA user_version = {target}')
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        applied = True
+    if applied:
+        db.execute('ANALYZE')
+        db.commit()
+
+# Bảng con và cột khóa ngoại trỏ tới từng bảng cha (dùng khi xóa dây chuyền)
+CHILD_TABLES = {
+    'Students': (('Contracts', 'StudentID'), ('RoomAllocationHistory', 'StudentID'), ('Payments', 'StudentID'),
+                 ('MaintenanceRequests', 'StudentID'), ('Complaints', 'StudentID'),
+                 ('FinesAndPenalties', 'StudentID'), ('StudentFines', 'StudentID')),
+    'Rooms': (('Students', 'RoomID'), ('RoomAllocationHistory', 'RoomID')),
+    'Contracts': (('Payments', 'ContractID'),),
+    'Staff': (('Contracts', 'CreatedByStaffID'), ('Contracts', 'LastUpdatedByStaffID'),
+              ('MaintenanceRequests', 'AssignedStaffID')),
+    'FinesAndPenalties': (('StudentFines', 'FineID'),),
+}
+
+# Bảng bị trigger ghi vào khi ghi vào từng bảng (ngoài xóa dây chuyền theo khóa ngoại):
+# xếp/chuyển sinh viên đổi số người ở của phòng, thêm/trả phòng trong lịch sử đổi phòng của sinh viên,
+# thanh toán, hợp đồng và khoản phạt đổi công nợ của sinh viên
+TRIGGER_TABLES = {
+    'Students': ('Rooms', 'StudentBalances'),
+    'RoomAllocationHistory': ('Students',),
+    'Payments': ('StudentBalances',),
+    'Contracts': ('StudentBalances',),
+    'FinesAndPenalties': ('StudentBalances',),
+    'StudentFines': ('StudentBalances',),
+}
+
+# Phiên bản schema mới nhất; thay đổi schema nào (kể cả trong create_tables_query) cũng phải đi kèm
+# một migration mới để database đã ở phiên bản cũ được cập nhật
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Tạo các bảng (nếu chưa có) rồi chạy các migration chưa áp dụng. Database đã ở phiên bản mới nhất
+# (trường hợp thường gặp mỗi lần khởi động) thì chỉ đọc user_version, không chạy DDL nào.
+def create_schema(db):
+    if db.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+        return
+    db.executescript(create_tables_query)
+    db.commit()
+    migrate(db)
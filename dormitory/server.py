@@ -0,0 +1,272 @@
+import argparse
+import inspect
+import json
+import queue
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from dormitory import auth, balances, bulk, dashboard, rooms
+from dormitory.audit import external_writes
+from dormitory.db import connect, load_db_config, open_database, set_audit_user
+from dormitory.remote import OPERATIONS, decode, encode
+from dormitory.repository import repositories
+
+# Các module khai báo thao tác bằng remote_operation (được import để đăng ký vào OPERATIONS)
+OPERATION_MODULES = (auth, balances, bulk, dashboard, rooms)
+
+SERVER_PORT = 8765
+# Số kết nối đọc dùng chung giữa các yêu cầu
+SERVER_READERS = 4
+# Chu kỳ (giây) chuyển nhật ký thay đổi sang AuditLog và kiểm tra tiến trình khác ghi vào database
+FLUSH_INTERVAL = 2
+# Số lần ghi gần nhất được nhớ để trả lời /api/changes; máy khách hỏi từ lâu hơn thì bỏ cả bộ đệm
+CHANGE_HISTORY = 1000
+# Kích thước tối đa (byte) của thân một yêu cầu
+MAX_BODY_SIZE = 16 * 1048576
+
+# Điều kiện where duy nhất mà page nhận từ máy khách: khoảng trên một cột của bảng
+# (lọc thanh toán theo tháng, hợp đồng sắp hết hạn...)
+RANGE_CONDITION = re.compile(r'(\w+) BETWEEN \? AND \?')
+
+# Database dùng chung cho nhiều máy khách: một nhóm kết nối đọc dùng song song, và đúng một luồng ghi
+# chạy lần lượt các thao tác ghi (mỗi thao tác một transaction), nên các máy không tranh khóa ghi
+# của SQLite với nhau. Ghi lại các bảng mà từng phiên đã ghi để máy khách khác biết cần tải lại gì.
+class DatabaseService:
+    def __init__(self, config, readers=SERVER_READERS):
+        self.config = config
+        open_database(config).close()
+        self.readers = queue.Queue()
+        for _ in range(readers):
+            self.readers.put(connect(config, check_same_thread=False))
+        self.write_jobs = queue.Queue()
+        self.lock = threading.Lock()
+        # Phiên đăng nhập: mã phiên -> tên đăng nhập (mất khi máy chủ khởi động lại)
+        self.sessions = {}
+        # Phiên bản dữ liệu tăng sau mỗi lần ghi; bắt đầu theo thời gian để máy khách còn giữ phiên bản
+        # của lần chạy trước nhận ra máy chủ đã khởi động lại
+        self.version = int(time.time() * 1000)
+        self.changes = deque(maxlen=CHANGE_HISTORY)
+        threading.Thread(target=self.writer, daemon=True).start()
+        threading.Thread(target=self.watch_external_writes, daemon=True).start()
+
+    # Chạy fn(db) trên một kết nối đọc (chờ nếu mọi kết nối đang bận)
+    def read(self, fn):
+        db = self.readers.get()
+        try:
+            return fn(db)
+        finally:
+            self.readers.put(db)
+
+    # Xếp fn(db) vào hàng đợi của luồng ghi và chờ kết quả; username được ghi vào nhật ký thay đổi
+    def write(self, fn, username=None):
+        future = Future()
+        self.write_jobs.put((fn, username, future))
+        return future.result()
+
+    def writer(self):
+        db = connect(self.config)
+        while True:
+            fn, username, future = self.write_jobs.get()
+            set_audit_user(username)
+            try:
+                with db:
+                    result = fn(db)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    # Định kỳ chuyển nhật ký thay đổi sang AuditLog trên luồng ghi; nếu một tiến trình khác (script,
+    # cron, doan.py mở thẳng file) đã ghi vào database thì báo cho mọi máy khách các bảng trong lô vừa
+    # chuyển (hoặc mọi bảng nếu lô rỗng)
+    def watch_external_writes(self):
+        last_version = None
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                tables, version = self.write(external_writes)
+            except sqlite3.Error:
+                continue
+            if last_version is not None and version != last_version:
+                self.record_change(None, tables or None)
+            last_version = version
+
+    # Ghi nhận phiên session vừa ghi vào các bảng tables (None là không rõ bảng nào)
+    def record_change(self, session, tables):
+        with self.lock:
+            self.version += 1
+            self.changes.append((self.version, session, tables))
+
+    # Các bảng do phiên khác ghi sau phiên bản since: {"version": phiên bản hiện tại, "tables": danh sách
+    # bảng, hoặc None nếu không xác định được (since quá cũ hoặc thuộc lần chạy trước của máy chủ)}
+    def changes_since(self, since, session):
+        with self.lock:
+            if since is None:
+                return {'version': self.version, 'tables': []}
+            oldest = self.changes[0][0] - 1 if self.changes else self.version
+            if since < oldest or since > self.version:
+                return {'version': self.version, 'tables': None}
+            tables = set()
+            for version, writer, written in self.changes:
+                if version > since and writer != session:
+                    if written is None:
+                        return {'version': self.version, 'tables': None}
+                    tables.update(written)
+            return {'version': self.version, 'tables': sorted(tables)}
+
+    # Đăng nhập; trả về mã phiên, hoặc None nếu sai tên đăng nhập hoặc mật khẩu.
+    # Mật khẩu được kiểm tra trên kết nối đọc; nếu cần băm lại thì băm ngay trên luồng xử lý yêu cầu
+    # và chỉ xếp câu UPDATE vào hàng đợi của luồng ghi.
+    def login(self, username, password):
+        valid, user_id, stored, outdated = self.read(lambda db: auth.check_password(db, username, password))
+        if not valid:
+            return None
+        if outdated:
+            hashed = auth.hash_password(password)
+            self.write(lambda db: auth.rehash_password(db, user_id, stored, hashed), username)
+        session = secrets.token_urlsafe(24)
+        with self.lock:
+            self.sessions[session] = username
+        return session
+
+    # Chạy thao tác name với tham số args, kwargs cho phiên session: thao tác đọc trên nhóm kết nối đọc,
+    # thao tác ghi qua hàng đợi của luồng ghi. Thao tác của TableRepository nhận tên bảng làm tham số đầu.
+    def call(self, session, name, args, kwargs):
+        if name not in OPERATIONS:
+            raise LookupError(f"Không có thao tác {name}")
+        fn, write, method = OPERATIONS[name]
+        if method:
+            if not args or args[0] not in repositories:
+                raise ValueError("Thiếu tên bảng hoặc bảng không tồn tại")
+            repository = repositories[args[0]]
+            check_arguments(repository, inspect.signature(fn).bind(repository, None, *args[1:], **kwargs).arguments)
+            run = lambda db: fn(repository, db, *args[1:], **kwargs)
+        else:
+            inspect.signature(fn).bind(None, *args, **kwargs)
+            run = lambda db: fn(db, *args, **kwargs)
+        if not write:
+            return self.read(run)
+        result = self.write(run, self.sessions[session])
+        # Thao tác ghi hàng loạt nhận tên bảng làm tham số đầu như các phương thức của TableRepository
+        self.record_change(session, [args[0]] if args and args[0] in repositories else None)
+        return result
+
+# Kiểm tra các tham số được ghép thẳng vào câu SQL (where và order_columns của page)
+def check_arguments(repository, arguments):
+    where = arguments.get('where')
+    if where is not None:
+        match = RANGE_CONDITION.fullmatch(where) if isinstance(where, str) else None
+        if match is None or match.group(1) not in repository.columns:
+            raise ValueError("Điều kiện lọc không được hỗ trợ")
+    for column in arguments.get('order_columns') or ():
+        if column not in repository.columns:
+            raise ValueError(f"Bảng {repository.table} không có cột: {column}")
+
+# Xử lý yêu cầu HTTP/JSON:
+#   POST /api/login          {"username", "password"} -> {"token"}
+#   POST /api/call/<thao tác> {"args": [...], "kwargs": {...}} -> {"result"}
+#   GET  /api/changes?since=<phiên bản> -> {"version", "tables"}
+# Mọi yêu cầu trừ đăng nhập cần header Authorization: Bearer <token>.
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != '/api/changes':
+            self.reply(404, {'error': "Không tìm thấy"})
+            return
+        session = self.session()
+        if session is None:
+            return
+        query = parse_qs(url.query)
+        try:
+            since = int(query['since'][0]) if 'since' in query else None
+        except ValueError:
+            self.reply(400, {'error': "Tham số since không hợp lệ"})
+            return
+        self.reply(200, self.server.service.changes_since(since, session))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > MAX_BODY_SIZE:
+                self.reply(413, {'error': "Yêu cầu quá lớn"})
+                self.close_connection = True
+                return
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self.reply(400, {'error': "Thân yêu cầu không phải JSON hợp lệ"})
+            return
+
+        service = self.server.service
+        if url.path == '/api/login':
+            token = service.login(str(body.get('username', '')), str(body.get('password', '')))
+            if token is None:
+                self.reply(401, {'error': "Sai tên đăng nhập hoặc mật khẩu"})
+            else:
+                self.reply(200, {'token': token})
+            return
+        if not url.path.startswith('/api/call/'):
+            self.reply(404, {'error': "Không tìm thấy"})
+            return
+        session = self.session()
+        if session is None:
+            return
+        try:
+            result = service.call(session, url.path[len('/api/call/'):], decode(body.get('args', [])),
+                                  decode(body.get('kwargs', {})))
+        except LookupError as e:
+            self.reply(404, {'error': str(e)})
+        except (ValueError, TypeError) as e:
+            self.reply(400, {'error': str(e)})
+        except sqlite3.IntegrityError as e:
+            self.reply(409, {'error': str(e)})
+        except Exception as e:
+            self.reply(500, {'error': str(e)})
+        else:
+            self.reply(200, {'result': encode(result)})
+
+    # Mã phiên của yêu cầu; trả lời 401 và trả về None nếu chưa đăng nhập
+    def session(self):
+        header = self.headers.get('Authorization', '')
+        token = header[len('Bearer '):] if header.startswith('Bearer ') else None
+        if token not in self.server.service.sessions:
+            self.reply(401, {'error': "Phiên đăng nhập không hợp lệ hoặc máy chủ đã khởi động lại, vui lòng đăng nhập lại"})
+            return None
+        return token
+
+    def reply(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chạy máy chủ HTTP/JSON để nhiều máy dùng chung một database")
+    parser.add_argument('--host', default='127.0.0.1', help="địa chỉ lắng nghe (0.0.0.0 để nhận kết nối từ máy khác)")
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--readers', type=int, default=SERVER_READERS, help="số kết nối đọc")
+    args = parser.parse_args(argv)
+    config = load_db_config()
+    server = ThreadingHTTPServer((args.host, args.port), ApiHandler)
+    server.service = DatabaseService(config, args.readers)
+    print(f"Máy chủ chạy tại http://{args.host}:{args.port} với database {config['path']}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
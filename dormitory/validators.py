@@ -0,0 +1,51 @@
+import re
+from datetime import date, timedelta
+
+# Hàm kiểm tra email hợp lệ
+def is_valid_email(email):
+    pattern = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
+    return re.match(pattern, email) is not None
+
+# Hàm kiểm tra số điện thoại hợp lệ
+def is_valid_phone(phone):
+    pattern = r'^\d{10,11}$'
+    return re.match(pattern, phone) is not None
+
+# Ngày dạng DD-MM-YYYY (ngày, tháng có thể có 1 chữ số như strptime chấp nhận)
+DATE_PATTERN = re.compile(r'(\d{1,2})-(\d{1,2})-(\d{4})')
+ISO_DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# Đọc ngày DD-MM-YYYY, trả về None nếu không hợp lệ. Dùng regex và date() thay cho strptime
+# vì hàm này được gọi cho từng ô khi nhập hàng chục nghìn dòng.
+def parse_date(date_text):
+    match = DATE_PATTERN.fullmatch(date_text)
+    if match is None:
+        return None
+    day, month, year = match.groups()
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+# Hàm kiểm tra ngày sinh hợp lệ
+def is_valid_date(date_text):
+    return parse_date(date_text) is not None
+
+# Chuyển ngày người dùng nhập (DD-MM-YYYY) sang dạng lưu trong database (ISO-8601 YYYY-MM-DD)
+def to_db_date(date_text):
+    if not date_text:
+        return None
+    day = parse_date(date_text)
+    return day.isoformat() if day else date_text
+
+# Chuyển ngày lưu trong database (YYYY-MM-DD) sang dạng hiển thị DD-MM-YYYY
+def to_display_date(value):
+    if isinstance(value, str) and ISO_DATE_PATTERN.fullmatch(value):
+        return f'{value[8:10]}-{value[5:7]}-{value[0:4]}'
+    return value
+
+# Ngày đầu và ngày cuối của tháng chứa ngày day
+def month_range(day):
+    start = day.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return start, end